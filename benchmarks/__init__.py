@@ -0,0 +1,3 @@
+"""
+性能测试模块（无界面，不依赖 PyQt5）
+"""
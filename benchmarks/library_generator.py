@@ -0,0 +1,144 @@
+"""
+合成游戏库生成模块
+"""
+
+import random
+import argparse
+from pathlib import Path
+from typing import Optional
+
+
+_WORDS = ["super", "mega", "dragon", "quest", "fighter", "star", "racing", "world", "legend",
+          "force", "ninja", "castle", "space", "tennis", "soccer", "puzzle", "战记", "三国志", "大冒险"]
+_DEVELOPERS = ["Nintendo", "Capcom", "Konami", "SEGA", "Square", "Namco", "Hudson Soft", "Taito", "光荣"]
+_GENRES = ["Action", "RPG", "Sports", "Racing", "Puzzle", "Shooter"]
+
+
+class LibraryOptions:
+    """合成游戏库的规模与格式参数"""
+    
+    def __init__(self, platforms: int = 5, games: int = 2000, description_length: int = 200,
+                 multiline_ratio: float = 0.3, comment_ratio: float = 0.05, crlf_ratio: float = 0.2,
+                 rom_ratio: float = 0.9, media_ratio: float = 0.5, seed: int = 1):
+        self.platforms = platforms  # 平台数
+        self.games = games  # 每个平台的游戏数
+        self.description_length = description_length  # 描述平均字符数
+        self.multiline_ratio = multiline_ratio  # 描述为多行的游戏比例
+        self.comment_ratio = comment_ratio  # 游戏块前带注释的比例
+        self.crlf_ratio = crlf_ratio  # 使用 CRLF 换行的平台比例
+        self.rom_ratio = rom_ratio  # 生成 ROM 文件（空文件）的游戏比例
+        self.media_ratio = media_ratio  # 生成 media 目录（logo/封面/视频）的游戏比例
+        self.seed = seed
+    
+    def to_dict(self) -> dict:
+        return dict(vars(self))
+
+
+def _title(rng: random.Random) -> str:
+    return " ".join(rng.choice(_WORDS).title() for _ in range(rng.randint(1, 4)))
+
+
+def _description(rng: random.Random, options: LibraryOptions) -> str:
+    """生成描述，多行描述的延续行缩进两个空格"""
+    length = max(0, int(rng.gauss(options.description_length, options.description_length / 4)))
+    words = []
+    size = 0
+    while size < length:
+        word = rng.choice(_WORDS)
+        words.append(word)
+        size += len(word) + 1
+    text = " ".join(words)
+    if rng.random() < options.multiline_ratio and len(words) > 4:
+        cut = len(words) // 2
+        text = " ".join(words[:cut]) + "\n  .\n  " + " ".join(words[cut:])
+    return text
+
+
+def generate_platform(platform_path: Path, options: LibraryOptions, rng: random.Random, crlf: bool) -> int:
+    """生成单个平台目录，返回元数据文件字节数"""
+    media_path = platform_path / "media"
+    media_path.mkdir(parents=True, exist_ok=True)
+    name = platform_path.name
+    blocks = [f"collection: {name}\nshortname: {name}\nextensions: zip, 7z\n"
+              f"launch: emulator\n  --fullscreen \"{{file.path}}\""]
+    for i in range(options.games):
+        file_name = f"{name}_{i:06d}.zip"
+        lines = []
+        if rng.random() < options.comment_ratio:
+            lines.append(f"# {name} #{i}")
+        lines.append(f"game: {_title(rng)} {i}")
+        lines.append(f"file: {file_name}")
+        if rng.random() < 0.3:
+            lines.append(f"sort-by: {i:06d}")
+        lines.append(f"developer: {rng.choice(_DEVELOPERS)}")
+        lines.append(f"genre: {rng.choice(_GENRES)}")
+        if rng.random() < 0.5:
+            lines.append(f"assets.boxFront: media/{name}_{i:06d}/boxFront.png")
+        lines.append("description: " + _description(rng, options))
+        blocks.append("\n".join(lines))
+        
+        if rng.random() < options.rom_ratio:
+            (platform_path / file_name).touch()
+        if rng.random() < options.media_ratio:
+            game_media = media_path / f"{name}_{i:06d}"
+            game_media.mkdir(exist_ok=True)
+            (game_media / "logo.png").touch()
+            if rng.random() < 0.5:
+                (game_media / "boxFront.jpg").touch()
+            if rng.random() < 0.2:
+                (game_media / "video.mp4").touch()
+    
+    text = "\n\n".join(blocks) + "\n"
+    data = text.replace("\n", "\r\n" if crlf else "\n").encode("utf-8")
+    (platform_path / "metadata.pegasus.txt").write_bytes(data)
+    return len(data)
+
+
+def generate_library(roms_root: Path, options: Optional[LibraryOptions] = None) -> dict:
+    """生成合成 Roms 根目录，返回统计信息（平台数、游戏数、元数据总字节数）"""
+    options = options or LibraryOptions()
+    rng = random.Random(options.seed)
+    roms_root = Path(roms_root)
+    roms_root.mkdir(parents=True, exist_ok=True)
+    metadata_bytes = 0
+    for p in range(options.platforms):
+        crlf = rng.random() < options.crlf_ratio
+        metadata_bytes += generate_platform(roms_root / f"platform{p:03d}", options, rng, crlf)
+    return {
+        "platforms": options.platforms,
+        "games": options.platforms * options.games,
+        "metadata_bytes": metadata_bytes,
+    }
+
+
+def add_options_arguments(parser: argparse.ArgumentParser):
+    """向命令行解析器添加游戏库参数"""
+    defaults = LibraryOptions()
+    parser.add_argument("--platforms", type=int, default=defaults.platforms, help="平台数")
+    parser.add_argument("--games", type=int, default=defaults.games, help="每个平台的游戏数")
+    parser.add_argument("--description-length", type=int, default=defaults.description_length, help="描述平均字符数")
+    parser.add_argument("--multiline-ratio", type=float, default=defaults.multiline_ratio, help="多行描述比例")
+    parser.add_argument("--comment-ratio", type=float, default=defaults.comment_ratio, help="带注释的游戏块比例")
+    parser.add_argument("--crlf-ratio", type=float, default=defaults.crlf_ratio, help="CRLF 平台比例")
+    parser.add_argument("--rom-ratio", type=float, default=defaults.rom_ratio, help="生成 ROM 文件的比例")
+    parser.add_argument("--media-ratio", type=float, default=defaults.media_ratio, help="生成 media 目录的比例")
+    parser.add_argument("--seed", type=int, default=defaults.seed, help="随机种子")
+
+
+def options_from_args(args: argparse.Namespace) -> LibraryOptions:
+    return LibraryOptions(args.platforms, args.games, args.description_length, args.multiline_ratio,
+                          args.comment_ratio, args.crlf_ratio, args.rom_ratio, args.media_ratio, args.seed)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="生成合成的天马G游戏库")
+    parser.add_argument("output", type=Path, help="输出的 Roms 根目录")
+    add_options_arguments(parser)
+    args = parser.parse_args()
+    stats = generate_library(args.output, options_from_args(args))
+    print(f"已生成 {stats['platforms']} 个平台、{stats['games']} 个游戏，"
+          f"元数据 {stats['metadata_bytes'] / 1024 / 1024:.1f} MB: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
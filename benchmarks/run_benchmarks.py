@@ -0,0 +1,253 @@
+"""
+元数据解析与写入性能测试
+
+在项目根目录运行：
+    python -m benchmarks.run_benchmarks --games 5000 --output result.json
+    python -m benchmarks.run_benchmarks --compare result.json
+"""
+
+import gc
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import statistics
+import subprocess
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from benchmarks.library_generator import LibraryOptions, generate_library, add_options_arguments, options_from_args
+from core.metadata_parser import MetadataParser
+from core.platform_header import PlatformHeader
+from core.game_manager import GameManager
+from core.copy_engine import TransferProgress
+from core.fast_copy import copy_file
+
+
+# 结果文件格式版本
+RESULT_VERSION = 1
+# 大文件复制测试的文件大小（光盘镜像、视频等）
+COPY_FILE_SIZE = 256 * 1024 * 1024
+
+
+class BenchmarkContext:
+    """性能测试共享的数据：合成游戏库及预先解析好的平台"""
+    
+    def __init__(self, roms_root: Path, work_dir: Path, stats: dict):
+        self.roms_root = roms_root
+        self.work_dir = work_dir  # 写入类测试的输出目录
+        self.stats = stats
+        self.platform_dirs = MetadataParser.find_platform_directories(roms_root)
+        self.parsed = {p: MetadataParser.parse_platform_directory(p) for p in self.platform_dirs}
+    
+    def output_file(self, platform_path: Path) -> Path:
+        """平台对应的写入测试输出文件"""
+        return self.work_dir / platform_path.name / "metadata.pegasus.txt"
+    
+    def copy_platform_metadata(self):
+        """把平台元数据复制到输出目录（写入测试的初始状态）"""
+        for platform_path in self.platform_dirs:
+            target = self.output_file(platform_path)
+            (target.parent / "media").mkdir(parents=True, exist_ok=True)
+            shutil.copyfile(platform_path / "metadata.pegasus.txt", target)
+
+
+def bench_parse_eager(ctx: BenchmarkContext):
+    for platform_path in ctx.platform_dirs:
+        MetadataParser.parse_platform_directory(platform_path)
+
+
+def bench_parse_lazy(ctx: BenchmarkContext):
+    for platform_path in ctx.platform_dirs:
+        MetadataParser.parse_platform_directory(platform_path, lazy=True)
+
+
+def bench_header_parse(ctx: BenchmarkContext):
+    for header, _ in ctx.parsed.values():
+        for _ in range(100):
+            PlatformHeader(header).fields()
+
+
+def bench_load_all_platforms(ctx: BenchmarkContext):
+    GameManager(ctx.roms_root, lazy=True).load_all_platforms()
+
+
+def setup_write(ctx: BenchmarkContext):
+    shutil.rmtree(ctx.work_dir, ignore_errors=True)
+
+
+def bench_write_full(ctx: BenchmarkContext):
+    """写入新文件：全部游戏块重新生成"""
+    for platform_path, (header, games) in ctx.parsed.items():
+        output_file = ctx.output_file(platform_path)
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        MetadataParser.write_metadata(games, output_file, header)
+
+
+def bench_write_single_change(ctx: BenchmarkContext):
+    """已有文件中修改一个游戏后写回"""
+    for platform_path, (header, games) in ctx.parsed.items():
+        output_file = ctx.output_file(platform_path)
+        _, current = MetadataParser.parse_platform_directory(output_file.parent, lazy=True)
+        if current:
+            current[len(current) // 2].developer += " (benchmark)"
+        MetadataParser.write_metadata(current, output_file, header)
+
+
+def bench_round_trip(ctx: BenchmarkContext):
+    """解析、原样写回并重新解析，校验结果一致"""
+    for platform_path in ctx.platform_dirs:
+        header, games = MetadataParser.parse_platform_directory(platform_path)
+        output_file = ctx.output_file(platform_path)
+        MetadataParser.write_metadata(games, output_file, header)
+        _, again = MetadataParser.parse_platform_directory(output_file.parent)
+        if [(g.game, g.file, g.description) for g in games] != [(g.game, g.file, g.description) for g in again]:
+            raise RuntimeError(f"往返结果不一致: {platform_path.name}")
+
+
+def setup_copy(ctx: BenchmarkContext):
+    """准备大文件复制测试的来源文件（只生成一次），删除上一轮的目标文件"""
+    source = ctx.work_dir.parent / "copy_source.bin"
+    if not source.exists():
+        block = os.urandom(1024 * 1024)
+        with open(source, 'wb') as f:
+            for _ in range(COPY_FILE_SIZE // len(block)):
+                f.write(block)
+    ctx.work_dir.mkdir(parents=True, exist_ok=True)
+    target = ctx.work_dir / "copy_target.bin"
+    if target.exists():
+        target.unlink()
+
+
+def bench_copy_copy2(ctx: BenchmarkContext):
+    """基准：shutil.copy2"""
+    shutil.copy2(ctx.work_dir.parent / "copy_source.bin", ctx.work_dir / "copy_target.bin")
+
+
+def bench_copy_file(ctx: BenchmarkContext):
+    """内核内复制（复制引擎未报告进度时）"""
+    copy_file(ctx.work_dir.parent / "copy_source.bin", ctx.work_dir / "copy_target.bin")
+
+
+def bench_copy_file_progress(ctx: BenchmarkContext):
+    """内核内复制并报告进度（执行任务窗口中的复制）"""
+    copy_file(ctx.work_dir.parent / "copy_source.bin", ctx.work_dir / "copy_target.bin", TransferProgress())
+
+
+# 名称 -> (测试函数, 每轮测试前的准备函数)
+BENCHMARKS: Dict[str, tuple] = {
+    "parse_eager": (bench_parse_eager, None),
+    "parse_lazy": (bench_parse_lazy, None),
+    "header_parse": (bench_header_parse, None),
+    "load_all_platforms": (bench_load_all_platforms, None),
+    "write_full": (bench_write_full, setup_write),
+    "write_single_change": (bench_write_single_change, BenchmarkContext.copy_platform_metadata),
+    "round_trip": (bench_round_trip, BenchmarkContext.copy_platform_metadata),
+    "copy_copy2": (bench_copy_copy2, setup_copy),
+    "copy_file": (bench_copy_file, setup_copy),
+    "copy_file_progress": (bench_copy_file_progress, setup_copy),
+}
+
+
+def run_benchmark(ctx: BenchmarkContext, func: Callable, setup: Optional[Callable], repeat: int) -> dict:
+    """运行 repeat 轮，准备函数不计时；返回各轮耗时统计（秒）"""
+    timings = []
+    for _ in range(repeat):
+        if setup:
+            setup(ctx)
+        gc.collect()
+        start = time.perf_counter()
+        func(ctx)
+        timings.append(time.perf_counter() - start)
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "mean": statistics.fmean(timings),
+        "runs": timings,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=Path(__file__).resolve().parent, timeout=10).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run_all(options: LibraryOptions, names: List[str], repeat: int, roms_root: Optional[Path] = None) -> dict:
+    """生成游戏库（或使用已有的 roms_root）并运行选定的测试，返回结果字典"""
+    temp_dir = Path(tempfile.mkdtemp(prefix="pegasus-bench-"))
+    generated = roms_root is None
+    try:
+        if generated:
+            roms_root = temp_dir / "roms"
+            stats = generate_library(roms_root, options)
+        else:
+            stats = {"roms_root": str(roms_root)}
+        ctx = BenchmarkContext(roms_root, temp_dir / "output", stats)
+        results = {}
+        for name in names:
+            func, setup = BENCHMARKS[name]
+            results[name] = run_benchmark(ctx, func, setup, repeat)
+            print(f"{name:24s} min {results[name]['min'] * 1000:9.1f} ms  "
+                  f"median {results[name]['median'] * 1000:9.1f} ms")
+        return {
+            "version": RESULT_VERSION,
+            "commit": _git_commit(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "library": options.to_dict() if generated else None,
+            "stats": stats,
+            "repeat": repeat,
+            "results": results,
+        }
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> List[str]:
+    """对比两次结果（按最短耗时），打印各项比值，返回变慢超过阈值的测试名"""
+    print(f"\n对比基准 {baseline.get('commit') or '?'} ({baseline.get('timestamp', '')}):")
+    regressions = []
+    for name, result in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if not base:
+            continue
+        ratio = result["min"] / base["min"] if base["min"] else float("inf")
+        flag = ""
+        if ratio > 1 + threshold:
+            flag = "  <-- 变慢"
+            regressions.append(name)
+        print(f"{name:24s} {base['min'] * 1000:9.1f} ms -> {result['min'] * 1000:9.1f} ms  x{ratio:.2f}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="元数据解析与写入性能测试")
+    add_options_arguments(parser)
+    parser.add_argument("--roms-root", type=Path, help="使用已有的 Roms 根目录而不生成合成库")
+    parser.add_argument("--repeat", type=int, default=3, help="每项测试的轮数")
+    parser.add_argument("--only", nargs="+", choices=list(BENCHMARKS), help="只运行指定的测试")
+    parser.add_argument("--output", type=Path, help="结果 JSON 文件")
+    parser.add_argument("--compare", type=Path, help="与之前的结果 JSON 对比")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定为变慢的比例（默认 0.1 即 10%%）")
+    args = parser.parse_args()
+    
+    result = run_all(options_from_args(args), args.only or list(BENCHMARKS), max(1, args.repeat), args.roms_root)
+    if args.output:
+        args.output.write_text(json.dumps(result, ensure_ascii=False, indent=2), encoding="utf-8")
+        print(f"结果已保存: {args.output}")
+    if args.compare:
+        baseline = json.loads(args.compare.read_text(encoding="utf-8"))
+        if compare(result, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
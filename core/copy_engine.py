@@ -0,0 +1,285 @@
+"""
+文件复制引擎模块
+"""
+
+import os
+import time
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+from core.file_sync import COMPARE_MTIME, SyncStats, sync_file
+from core.fast_copy import copy_file
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+
+# 同时进行的复制数上限
+DEFAULT_WORKERS = 8
+# 每个设备（来源或目标所在的文件系统）同时进行的复制数上限
+DEFAULT_DEVICE_WORKERS = 4
+
+# 部署方式：复制、硬链接、写时复制克隆（reflink）、符号链接
+DEPLOY_COPY = "copy"
+DEPLOY_HARDLINK = "hardlink"
+DEPLOY_REFLINK = "reflink"
+DEPLOY_SYMLINK = "symlink"
+DEPLOY_MODES = (DEPLOY_COPY, DEPLOY_HARDLINK, DEPLOY_REFLINK, DEPLOY_SYMLINK)
+
+# Linux ioctl FICLONE：目标文件与来源共享数据块（Btrfs、XFS 等）
+_FICLONE = 0x40049409
+
+
+class CopyCancelled(Exception):
+    """复制被取消"""
+
+
+class TransferProgress:
+    """一批复制的字节进度、平均速度和剩余时间，并提供暂停和取消
+    
+    暂停和取消在数据块之间生效：复制线程在每块之前调用 checkpoint()，暂停时阻塞，
+    取消后抛出 CopyCancelled。速度按已复制字节数除以未暂停的时间计算。可在多个线程中使用。
+    """
+    
+    def __init__(self):
+        self.total_bytes = 0
+        self.done_bytes = 0
+        self.cancelled = False
+        self._start = time.monotonic()
+        self._paused_at: Optional[float] = None
+        self._paused_total = 0.0
+        self._running = threading.Event()
+        self._running.set()
+        self._lock = threading.Lock()
+    
+    def add_total(self, size: int):
+        with self._lock:
+            self.total_bytes += size
+    
+    def advance(self, size: int):
+        with self._lock:
+            self.done_bytes += size
+    
+    @property
+    def paused(self) -> bool:
+        return not self._running.is_set()
+    
+    def pause(self):
+        with self._lock:
+            if self._paused_at is None:
+                self._paused_at = time.monotonic()
+                self._running.clear()
+    
+    def resume(self):
+        with self._lock:
+            if self._paused_at is not None:
+                self._paused_total += time.monotonic() - self._paused_at
+                self._paused_at = None
+            self._running.set()
+    
+    def cancel(self):
+        """取消：正在复制的文件在下一块之前中止，暂停中的线程随即继续并中止"""
+        self.cancelled = True
+        self.resume()
+    
+    def checkpoint(self):
+        """在数据块之间调用：暂停时等待继续，已取消时抛出 CopyCancelled"""
+        self._running.wait()
+        if self.cancelled:
+            raise CopyCancelled("已取消")
+    
+    def elapsed(self) -> float:
+        """未暂停的运行时间（秒）"""
+        with self._lock:
+            now = self._paused_at if self._paused_at is not None else time.monotonic()
+            return max(0.0, now - self._start - self._paused_total)
+    
+    def rate(self) -> float:
+        """平均速度（字节/秒）"""
+        elapsed = self.elapsed()
+        return self.done_bytes / elapsed if elapsed > 0 else 0.0
+    
+    def eta(self) -> Optional[float]:
+        """按平均速度估计的剩余时间（秒），尚无速度时返回 None"""
+        rate = self.rate()
+        if rate <= 0:
+            return None
+        return max(0, self.total_bytes - self.done_bytes) / rate
+
+
+class _FileProgress:
+    """单个文件的进度：转发给整批的 TransferProgress 并记录已计入的字节数"""
+    
+    def __init__(self, progress: TransferProgress):
+        self.progress = progress
+        self.done = 0
+    
+    def checkpoint(self):
+        self.progress.checkpoint()
+    
+    def advance(self, size: int):
+        self.done += size
+        self.progress.advance(size)
+
+
+def _prepare_target(target: str, mode: str):
+    """删除妨碍部署的已有目标：链接方式下删除任何已有文件，复制方式下只删除符号链接和硬链接
+    （否则会写穿链接修改来源文件）"""
+    try:
+        st = os.lstat(target)
+    except OSError:
+        return
+    if mode != DEPLOY_COPY or os.path.islink(target) or st.st_nlink > 1:
+        os.unlink(target)
+
+
+def _reflink(source: str, target: str) -> bool:
+    """用 FICLONE 克隆文件数据（与来源共享数据块），不支持时返回 False，由调用方改为复制"""
+    if fcntl is None:
+        return False
+    try:
+        with open(source, 'rb') as src, open(target, 'wb') as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        shutil.copystat(source, target)
+        return True
+    except OSError:
+        try:
+            os.unlink(target)
+        except OSError:
+            pass
+        return False
+
+
+def deploy_file(source: str, target: str, mode: str = DEPLOY_COPY, progress=None,
+                chunk_size: Optional[int] = None) -> str:
+    """按部署方式把 source 放到 target，返回实际使用的方式
+    
+    硬链接跨设备或文件系统不支持、克隆不支持、符号链接没有权限时退回复制。
+    复制见 fast_copy.copy_file（内核内复制，指定 progress 时报告进度）。
+    """
+    _prepare_target(target, mode)
+    if mode == DEPLOY_HARDLINK:
+        try:
+            os.link(source, target)
+            return DEPLOY_HARDLINK
+        except OSError:
+            pass
+    elif mode == DEPLOY_SYMLINK:
+        try:
+            os.symlink(os.path.abspath(source), target)
+            return DEPLOY_SYMLINK
+        except OSError:
+            pass
+    elif mode == DEPLOY_REFLINK:
+        if _reflink(source, target):
+            return DEPLOY_REFLINK
+    copy_file(source, target, progress, chunk_size)
+    return DEPLOY_COPY
+
+
+class CopyEngine:
+    """并发复制文件：线程池总数有上限，每个设备上同时进行的复制数另有上限
+    
+    设备按 os.stat().st_dev 区分，一次复制同时占用来源和目标两个设备的名额
+    （按设备号顺序获取，不会死锁）。机械硬盘、U 盘等随机读写慢的设备可以通过
+    set_device_workers() 设为 1，避免并发复制反而降低吞吐。
+    文件按 mode 部署（见 deploy_file），指定 copy_function 时改用该函数；目标已存在且按 compare
+    比较与来源相同时跳过（见 sync_file），跳过和复制的数量累计在 stats 中。
+    设置 progress（TransferProgress）时分块复制并报告字节进度，可暂停和取消；chunk_size 为每次复制的字节数
+    （默认见 fast_copy.copy_file），较大的值吞吐量更高，较小的值暂停和取消响应更快。
+    在 with 语句中使用：进入时创建线程池，退出时等待全部复制完成。
+    """
+    
+    def __init__(self, workers: int = DEFAULT_WORKERS, device_workers: int = DEFAULT_DEVICE_WORKERS,
+                 mode: str = DEPLOY_COPY, copy_function: Optional[Callable[[str, str], object]] = None,
+                 compare: str = COMPARE_MTIME, chunk_size: Optional[int] = None):
+        self.workers = max(1, workers)
+        self.device_workers = max(1, device_workers)
+        self.mode = mode
+        self.copy_function = copy_function
+        self.compare = compare  # 比较方式，COMPARE_NONE 表示总是复制
+        self.chunk_size = chunk_size
+        self.stats = SyncStats()
+        self.progress: Optional[TransferProgress] = None
+        self._device_limits: Dict[int, int] = {}  # 设备号 -> 并发上限
+        self._semaphores: Dict[int, threading.Semaphore] = {}
+        self._devices: Dict[str, int] = {}  # 目录 -> 设备号
+        self._lock = threading.Lock()
+        self._executor: Optional[ThreadPoolExecutor] = None
+    
+    def set_device_workers(self, path, workers: int):
+        """设置 path 所在设备同时进行的复制数上限"""
+        device = os.stat(path).st_dev
+        with self._lock:
+            self._device_limits[device] = max(1, workers)
+            self._semaphores.pop(device, None)
+    
+    def __enter__(self) -> 'CopyEngine':
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="copy")
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        executor, self._executor = self._executor, None
+        executor.shutdown(wait=True)
+    
+    def submit(self, source, target) -> Future:
+        """提交一次复制，目标所在目录须已存在；未在 with 语句中时直接复制"""
+        size = 0
+        if self.progress:
+            try:
+                size = os.stat(source).st_size
+            except OSError:
+                pass
+            self.progress.add_total(size)
+        if self._executor is None:
+            future = Future()
+            try:
+                future.set_result(self._copy(str(source), str(target), size))
+            except Exception as e:
+                future.set_exception(e)
+            return future
+        return self._executor.submit(self._copy, str(source), str(target), size)
+    
+    def _copy(self, source: str, target: str, size: int = 0):
+        progress = self.progress
+        devices = sorted({self._device(os.path.dirname(source)), self._device(os.path.dirname(target))})
+        semaphores = [self._semaphore(device) for device in devices]
+        for semaphore in semaphores:
+            semaphore.acquire()
+        file_progress = _FileProgress(progress) if progress else None
+        try:
+            if progress:
+                progress.checkpoint()
+            if self.copy_function:
+                copy = self.copy_function
+            else:
+                def copy(source, target):
+                    return deploy_file(source, target, self.mode, file_progress, self.chunk_size)
+            return sync_file(source, target, self.compare, self.stats, copy)
+        finally:
+            for semaphore in reversed(semaphores):
+                semaphore.release()
+            if file_progress:
+                # 跳过、链接或中止的文件按已处理计入剩余的字节
+                progress.advance(max(0, size - file_progress.done))
+    
+    def _device(self, directory: str) -> int:
+        device = self._devices.get(directory)
+        if device is None:
+            try:
+                device = os.stat(directory or os.curdir).st_dev
+            except OSError:
+                device = -1
+            self._devices[directory] = device
+        return device
+    
+    def _semaphore(self, device: int) -> threading.Semaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(device)
+            if semaphore is None:
+                limit = self._device_limits.get(device, self.device_workers)
+                semaphore = self._semaphores[device] = threading.Semaphore(limit)
+            return semaphore
@@ -0,0 +1,164 @@
+"""
+磁盘占用统计模块
+"""
+
+import os
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.metadata_parser import Game
+
+
+def format_size(size: int) -> str:
+    """字节数格式化为 B/KB/MB/GB/TB"""
+    value = float(size)
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TB"
+
+
+class DiskUsage:
+    """游戏（ROM 文件 + media/<基名>/ 目录）和平台目录的占用空间，按目录修改时间缓存
+    
+    目录的缓存项记录目录修改时间和直接包含的文件总大小，再次统计时修改时间未变化的目录
+    只需 stat 一次。目录修改时间只在直接子项增删时变化，原地覆盖同名文件不会被发现，
+    需要时调用 clear()。可在多个线程中同时使用。
+    """
+    
+    def __init__(self, workers: int = 4):
+        self.workers = max(1, workers)
+        # 目录 -> (mtime_ns, 直接包含的文件总大小, 子目录路径元组)
+        self._directories: Dict[str, Tuple[int, int, Tuple[str, ...]]] = {}
+        # 游戏 -> 字节数
+        self._games: Dict[Game, int] = {}
+        self._lock = threading.Lock()
+    
+    def clear(self):
+        with self._lock:
+            self._directories.clear()
+            self._games.clear()
+    
+    def path_size(self, path: str) -> int:
+        """文件大小或目录（递归）总大小，不存在时为 0"""
+        try:
+            st = os.stat(path)
+        except OSError:
+            return 0
+        if not stat.S_ISDIR(st.st_mode):
+            return st.st_size
+        return self._directory_size(path, st.st_mtime_ns)
+    
+    def _directory_size(self, path: str, mtime_ns: int) -> int:
+        cached = self._directories.get(path)
+        if cached is None or cached[0] != mtime_ns:
+            files_size = 0
+            subdirs = []
+            try:
+                with os.scandir(path) as entries:
+                    for entry in entries:
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                subdirs.append(entry.path)
+                            else:
+                                files_size += entry.stat().st_size
+                        except OSError:
+                            continue
+            except OSError:
+                pass
+            cached = (mtime_ns, files_size, tuple(subdirs))
+            with self._lock:
+                self._directories[path] = cached
+        total = cached[1]
+        for subdir in cached[2]:
+            try:
+                total += self._directory_size(subdir, os.stat(subdir).st_mtime_ns)
+            except OSError:
+                continue
+        return total
+    
+    def game_size(self, game: Game) -> int:
+        """游戏的 ROM 文件与 media 目录总大小（计算后缓存）"""
+        size = self._games.get(game)
+        if size is None:
+            size = 0
+            if game.platform_path:
+                platform = game._platform_entity()
+                if game.file:
+                    size += self.path_size(platform.file_path(game.file))
+                media_key = game._media_key()
+                if media_key:
+                    size += self.path_size(os.path.join(platform.media_str, media_key))
+            with self._lock:
+                self._games[game] = size
+        return size
+    
+    def cached_game_size(self, game: Game) -> Optional[int]:
+        """已计算过的游戏大小，未计算时返回 None（不访问磁盘）"""
+        return self._games.get(game)
+    
+    def forget_game(self, game: Game):
+        """丢弃游戏的缓存大小（文件变化后调用）"""
+        with self._lock:
+            self._games.pop(game, None)
+    
+    def game_sizes(self, games: Iterable[Game]) -> List[int]:
+        """并行计算多个游戏的大小"""
+        games = list(games)
+        if self.workers <= 1 or len(games) < 2:
+            return [self.game_size(game) for game in games]
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            return list(executor.map(self.game_size, games))
+
+
+class SizeTotal:
+    """一组游戏的总大小，集合变化时只计算新增游戏的差量
+    
+    set_games() 返回尚未统计大小的游戏，由调用方（通常在后台线程中）计算后
+    调用 resolve() 计入总数。
+    """
+    
+    def __init__(self, usage: DiskUsage):
+        self.usage = usage
+        self._members: Dict[Game, Optional[int]] = {}  # 游戏 -> 大小，None 表示未统计
+        self.total = 0
+        self.pending = 0  # 未统计的游戏数
+    
+    def __len__(self) -> int:
+        return len(self._members)
+    
+    def set_games(self, games: Iterable[Game]) -> List[Game]:
+        """更新游戏集合，返回需要统计大小的游戏"""
+        games = set(games)
+        for game in [g for g in self._members if g not in games]:
+            size = self._members.pop(game)
+            if size is None:
+                self.pending -= 1
+            else:
+                self.total -= size
+        missing = []
+        for game in games:
+            if game in self._members:
+                continue
+            size = self.usage.cached_game_size(game)
+            self._members[game] = size
+            if size is None:
+                self.pending += 1
+                missing.append(game)
+            else:
+                self.total += size
+        return missing
+    
+    def resolve(self) -> bool:
+        """把已统计完成的游戏计入总数，返回是否全部统计完成"""
+        if self.pending:
+            for game, size in self._members.items():
+                if size is None:
+                    size = self.usage.cached_game_size(game)
+                    if size is not None:
+                        self._members[game] = size
+                        self.total += size
+                        self.pending -= 1
+        return self.pending == 0
@@ -0,0 +1,83 @@
+"""
+任务执行计划模块
+"""
+
+import shutil
+from pathlib import Path
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+from core.task_system import Task
+
+
+# 文件操作类型
+OP_COPY = "copy"
+OP_DELETE = "delete"
+
+
+@dataclass
+class FileOperation:
+    """计划中的一次文件操作"""
+    kind: str  # OP_COPY / OP_DELETE
+    target: Path
+    source: Optional[Path] = None
+    size: int = 0  # 复制的来源大小或删除的大小
+    required: int = 0  # 目标磁盘需要的新增空间（覆盖时扣除原文件，链接时为 0）
+    overwrite: bool = False  # 目标已存在，复制时覆盖
+    unchanged: bool = False  # 目标与来源相同，执行时跳过
+
+
+@dataclass
+class TaskPlan:
+    """一个任务解析出的文件操作及需要注意的问题（来源缺失、与项目游戏冲突等）"""
+    task: Task
+    operations: List[FileOperation] = field(default_factory=list)
+    issues: List[str] = field(default_factory=list)
+
+
+class ExecutionPlan:
+    """执行任务队列前的计划：全部文件操作、目标磁盘空间和冲突，生成计划不修改任何文件"""
+    
+    def __init__(self, destination: Path, tasks: List[TaskPlan]):
+        self.destination = Path(destination)
+        self.tasks = tasks
+        self.free_bytes: Optional[int] = None
+        # 目标目录尚未创建时取最近的已存在的上级目录所在磁盘
+        for path in (self.destination, *self.destination.parents):
+            try:
+                self.free_bytes = shutil.disk_usage(path).free
+                break
+            except OSError:
+                continue
+    
+    def operations(self) -> List[FileOperation]:
+        return [op for plan in self.tasks for op in plan.operations]
+    
+    def issues(self) -> List[Tuple[Task, str]]:
+        """全部问题：(任务, 说明)"""
+        return [(plan.task, issue) for plan in self.tasks for issue in plan.issues]
+    
+    @property
+    def copy_bytes(self) -> int:
+        """需要复制的字节数（不含未变化而跳过的文件）"""
+        return sum(op.size for op in self.operations() if op.kind == OP_COPY and not op.unchanged)
+    
+    @property
+    def required_bytes(self) -> int:
+        """目标磁盘需要的新增空间（删除释放的空间不计入，执行顺序可能在复制之后）"""
+        return max(0, sum(op.required for op in self.operations() if op.kind == OP_COPY and not op.unchanged))
+    
+    @property
+    def delete_bytes(self) -> int:
+        return sum(op.size for op in self.operations() if op.kind == OP_DELETE)
+    
+    @property
+    def has_enough_space(self) -> bool:
+        """目标磁盘剩余空间是否足够（无法获取剩余空间时视为足够）"""
+        return self.free_bytes is None or self.required_bytes <= self.free_bytes
+    
+    def count(self, kind: str, overwrite: Optional[bool] = None, unchanged: Optional[bool] = None) -> int:
+        """符合条件的文件操作数"""
+        return sum(1 for op in self.operations()
+                   if op.kind == kind
+                   and (overwrite is None or op.overwrite == overwrite)
+                   and (unchanged is None or op.unchanged == unchanged))
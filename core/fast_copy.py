@@ -0,0 +1,99 @@
+"""
+快速文件复制模块
+"""
+
+import os
+import sys
+import errno
+import shutil
+from typing import Optional
+
+
+# 不报告进度时内核内复制每次调用的字节数（过大时页缓存压力反而降低吞吐）
+ZERO_COPY_CHUNK = 32 * 1024 * 1024
+# 报告进度（响应暂停和取消）时每块的字节数
+COPY_CHUNK = 8 * 1024 * 1024
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.copy_file_range(src_fd, dst_fd, count, offset, offset)
+
+
+def _send_file(src_fd: int, dst_fd: int, offset: int, count: int) -> int:
+    return os.sendfile(dst_fd, src_fd, offset, count)
+
+
+# 可用的内核内复制方式，按优先顺序：copy_file_range 在同一文件系统上可由文件系统直接复制
+# （NFS/SMB 服务端复制、Btrfs/XFS 共享数据块），sendfile 在 Linux 上可写入普通文件
+_KERNEL_COPIES = []
+if hasattr(os, 'copy_file_range'):
+    _KERNEL_COPIES.append(_copy_range)
+if hasattr(os, 'sendfile') and sys.platform.startswith('linux'):
+    _KERNEL_COPIES.append(_send_file)
+
+
+def _kernel_copy(copy, src_fd: int, dst_fd: int, size: int, progress, chunk_size: int) -> bool:
+    """用内核内复制方式复制全部数据，尚未复制任何数据时即不可用（跨文件系统、不支持等）返回 False"""
+    offset = 0
+    while True:
+        if progress is not None:
+            progress.checkpoint()
+        try:
+            copied = copy(src_fd, dst_fd, offset, chunk_size)
+        except OSError as e:
+            if offset == 0 and e.errno != errno.ENOSPC:
+                return False
+            raise
+        if copied == 0:
+            # 个别文件系统不支持时不报错而返回 0
+            return offset > 0 or size == 0
+        offset += copied
+        if progress is not None:
+            progress.advance(copied)
+
+
+def _buffered_copy(src, dst, progress, chunk_size: int):
+    """经用户空间缓冲区复制（重复使用同一缓冲区）"""
+    buffer = bytearray(min(chunk_size, COPY_CHUNK))
+    view = memoryview(buffer)
+    while True:
+        if progress is not None:
+            progress.checkpoint()
+        read = src.readinto(buffer)
+        if not read:
+            break
+        dst.write(view[:read])
+        if progress is not None:
+            progress.advance(read)
+
+
+def copy_file(source, target, progress=None, chunk_size: Optional[int] = None):
+    """复制文件数据及元信息（同 shutil.copy2），返回 target
+    
+    Linux 上依次尝试 copy_file_range 和 sendfile，数据不经过用户空间；都不可用时经缓冲区读写。
+    chunk_size 为每次复制的字节数，默认不报告进度时为 ZERO_COPY_CHUNK，报告进度时为 COPY_CHUNK。
+    指定 progress 时每块之前调用 progress.checkpoint()（可暂停或抛出异常中止）、之后调用
+    progress.advance(字节数)。复制数据时中止（取消或出错）删除不完整的目标文件。
+    """
+    if progress is None and not _KERNEL_COPIES:
+        # 其他系统上 shutil.copy2 有各自的快速路径（macOS fcopyfile、Windows CopyFile2）
+        return shutil.copy2(source, target)
+    if chunk_size is None:
+        chunk_size = COPY_CHUNK if progress is not None else ZERO_COPY_CHUNK
+    if os.path.exists(target) and os.path.samefile(source, target):
+        raise shutil.SameFileError(f"{source} 与 {target} 是同一文件")
+    with open(source, 'rb') as src, open(target, 'wb') as dst:
+        try:
+            src_fd, dst_fd = src.fileno(), dst.fileno()
+            size = os.fstat(src_fd).st_size
+            if not any(_kernel_copy(copy, src_fd, dst_fd, size, progress, chunk_size) for copy in _KERNEL_COPIES):
+                _buffered_copy(src, dst, progress, chunk_size)
+        except BaseException:
+            dst.close()
+            try:
+                os.unlink(target)
+            except OSError:
+                pass
+            raise
+    shutil.copystat(source, target)
+    return target
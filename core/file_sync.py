@@ -0,0 +1,98 @@
+"""
+文件同步比较模块
+"""
+
+import os
+import threading
+from typing import Callable, Optional
+from core.disk_usage import format_size
+from core.fast_copy import copy_file
+
+
+# 比较方式：按大小和修改时间（默认）、按文件内容、不比较（总是复制）
+COMPARE_MTIME = "mtime"
+COMPARE_CONTENT = "content"
+COMPARE_NONE = ""
+COMPARE_MODES = (COMPARE_MTIME, COMPARE_CONTENT, COMPARE_NONE)
+
+# 修改时间允许的误差：FAT32 只记录到 2 秒，复制到 SD 卡等设备后时间会被截断
+MTIME_TOLERANCE_NS = 2_000_000_000
+# 按内容比较时每次读取的字节数
+COMPARE_CHUNK = 1024 * 1024
+
+# 目标与来源相同、未复制时 sync_file 的返回值
+COPY_SKIPPED = "skipped"
+
+
+def _same_content(source, target) -> bool:
+    with open(source, 'rb') as a, open(target, 'rb') as b:
+        while True:
+            chunk = a.read(COMPARE_CHUNK)
+            if chunk != b.read(COMPARE_CHUNK):
+                return False
+            if not chunk:
+                return True
+
+
+def stats_identical(src: os.stat_result, dst: os.stat_result, compare: str = COMPARE_MTIME) -> Optional[bool]:
+    """只按 stat 结果判断目标是否与来源相同，需要比较内容才能确定时返回 None"""
+    if src.st_size != dst.st_size:
+        return False
+    if src.st_dev == dst.st_dev and src.st_ino == dst.st_ino:
+        return True
+    if compare == COMPARE_CONTENT:
+        return None
+    return abs(src.st_mtime_ns - dst.st_mtime_ns) <= MTIME_TOLERANCE_NS
+
+
+def files_identical(source, target, compare: str = COMPARE_MTIME) -> bool:
+    """目标文件是否与来源相同：大小相同，且修改时间相同（误差见 MTIME_TOLERANCE_NS）或内容相同
+    
+    目标是来源的硬链接或指向来源的符号链接时视为相同。
+    """
+    try:
+        identical = stats_identical(os.stat(source), os.stat(target), compare)
+        if identical is None:
+            identical = _same_content(source, target)
+    except OSError:
+        return False
+    return identical
+
+
+class SyncStats:
+    """一次同步跳过和复制的文件数及字节数，可在多个线程中使用"""
+    
+    def __init__(self):
+        self.skipped = 0
+        self.copied = 0
+        self.bytes_skipped = 0  # 跳过的字节数（节省的复制量）
+        self.bytes_copied = 0
+        self._lock = threading.Lock()
+    
+    def add(self, skipped: bool, size: int):
+        with self._lock:
+            if skipped:
+                self.skipped += 1
+                self.bytes_skipped += size
+            else:
+                self.copied += 1
+                self.bytes_copied += size
+    
+    def summary(self) -> str:
+        return f"跳过 {self.skipped} 个，复制 {self.copied} 个，节省 {format_size(self.bytes_skipped)}"
+
+
+def sync_file(source, target, compare: str = COMPARE_MTIME, stats: Optional[SyncStats] = None,
+              copy_function: Callable[[str, str], object] = copy_file):
+    """目标与来源相同时跳过并返回 COPY_SKIPPED，否则用 copy_function 复制并返回其结果"""
+    if compare and files_identical(source, target, compare):
+        if stats:
+            stats.add(True, os.path.getsize(source))
+        return COPY_SKIPPED
+    result = copy_function(source, target)
+    if stats:
+        try:
+            stats.add(False, os.path.getsize(source))
+        except OSError:
+            pass
+    return result
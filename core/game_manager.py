@@ -2,168 +2,831 @@
 游戏管理模块（重构版）
 """
 
+import os
 import shutil
 from pathlib import Path
-from typing import List, Dict
-from core.metadata_parser import Game, MetadataParser
-from core.task_system import TaskQueue, TaskType, TaskStatus
+from concurrent import futures
+from concurrent.futures import Future, ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from typing import List, Dict, Optional, Callable, Iterator, Tuple
+from core.metadata_parser import Game, MetadataParser, MetadataSource
+from core.game_table import GameTable, GameRows
+from core.metadata_document import MetadataDocument
+from core.platform import Platform
+from core.platform_header import PlatformHeader
+from core.parse_cache import ParseCache
+from core.library_watcher import LibraryWatcher, LibraryChanges
+from core.platform_discovery import PlatformDiscovery
+from core.disk_usage import DiskUsage
+from core.copy_engine import CopyEngine, CopyCancelled, TransferProgress, DEPLOY_HARDLINK, DEPLOY_MODES, DEPLOY_REFLINK, DEPLOY_SYMLINK
+from core.file_sync import COMPARE_MODES, COPY_SKIPPED, SyncStats, stats_identical
+from core.execution_plan import ExecutionPlan, FileOperation, TaskPlan, OP_COPY, OP_DELETE
+from core.task_journal import TaskJournal, JournalState, game_from_record
+from core.trash import Trash, TrashBatch
+from core.task_system import Task, TaskQueue, TaskType, TaskStatus
+
+
+# 待解析的元数据总量达到该值时才使用进程池（进程启动开销较大），否则使用线程池
+PROCESS_POOL_MIN_BYTES = 8 * 1024 * 1024
+# 任务数达到该值时并行生成执行计划（重叠网络存储上 stat 的访问延迟）
+PARALLEL_PLAN_MIN_TASKS = 64
+# 恢复执行时跳过的复制（上次执行已完整复制）的结果
+COPY_RESUMED = "resumed"
+# 复制日志中标注的部署方式（复制不标注）
+DEPLOY_NOTES = {DEPLOY_HARDLINK: "（硬链接）", DEPLOY_REFLINK: "（克隆）", DEPLOY_SYMLINK: "（符号链接）",
+                COPY_RESUMED: "（已复制，跳过）", COPY_SKIPPED: "（未变化，跳过）"}
+
+
+def _deploy_note(result) -> str:
+    return DEPLOY_NOTES.get(result, "") if isinstance(result, str) else ""
+
+
+def _parse_platform_worker(platform_path: Path, lazy: bool) -> tuple:
+    """在工作进程中解析平台，返回 (指纹, header, 游戏记录)
+    
+    以紧凑记录返回，跨进程传递比 Game 对象快得多。
+    """
+    fingerprint = ParseCache.fingerprint(platform_path / "metadata.pegasus.txt")
+    header, games = MetadataParser.parse_platform_directory(platform_path, lazy)
+    return fingerprint, header, ParseCache.game_records(games)
 
 
 class GameManager:
     """游戏管理器，负责游戏的增删改查"""
     
-    def __init__(self, roms_root: Path):
+    def __init__(self, roms_root: Path, cache_dir: Optional[Path] = None, lazy: bool = False,
+                 workers: Optional[int] = None, journal_file: Optional[Path] = None,
+                 trash_dir: Optional[Path] = None):
         self.roms_root = roms_root
-        self.platforms: Dict[str, List[Game]] = {}
+        self.lazy = lazy  # 懒加载模式：描述等字段按需从元数据文件解码
+        # 加载平台时的并行数，1 表示串行
+        self.workers = max(1, workers or min(32, os.cpu_count() or 1))
+        # 全部游戏的列式存储，platforms 中各平台只保存行号
+        self.table = GameTable()
+        self.platforms: Dict[str, GameRows] = {}
         self.headers: Dict[str, str] = {}  # 存储各平台的 Header
+        self.load_errors: Dict[str, str] = {}  # 加载失败的平台及原因
         self.task_queue = TaskQueue()
+        # 解析缓存（未指定缓存目录时不启用）
+        self.parse_cache = ParseCache(cache_dir, roms_root) if cache_dir else None
+        # 平台目录发现，启用缓存时清单与解析缓存保存在同一目录
+        manifest_file = self.parse_cache.cache_dir / "platforms.json" if self.parse_cache else None
+        self.discovery = PlatformDiscovery(roms_root, manifest_file, self.workers)
+        # 文件变化检测，refresh() 据此只重新加载有变化的平台
+        self.watcher = LibraryWatcher(roms_root, self.discovery)
+        # 执行添加任务时的并发文件复制（可按设备设置并发数），部署方式见 set_deploy_mode()
+        self.copy_engine = CopyEngine()
+        # 目录 -> 该目录所在设备同时进行的复制数上限，执行任务前交给复制引擎
+        self._device_workers: Dict[Path, int] = {}
+        # 执行任务的预写式日志（未指定日志文件时不启用），中断后可恢复执行
+        self.journal = TaskJournal(journal_file) if journal_file else None
+        self._resume: Optional[JournalState] = None  # 恢复执行时上次中断的执行
+        # 回收站（未指定目录时删除任务直接删除文件），须与 Roms 根目录在同一磁盘
+        self.trash = Trash(trash_dir) if trash_dir else None
+        self._trash_batch: Optional[TrashBatch] = None  # 本次执行删除的游戏所在的回收站批次
+        # 执行任务期间待从列表和元数据中移除的游戏：平台 -> {游戏名: 游戏}，按平台批量移除
+        self._removals: Dict[str, Dict[str, Game]] = {}
+        # 游戏和平台目录的占用空间统计（按目录修改时间缓存）
+        self.disk_usage = DiskUsage(self.workers)
+        # 各平台缺失 ROM 的游戏数缓存：平台 -> ((表修改计数, 游戏数, ROM 列表修改计数), 缺失数)
+        self._missing_counts: Dict[str, tuple] = {}
+        # 执行任务期间各平台待写入的元数据文档，任务全部执行完后统一写入
+        self._documents: Dict[str, MetadataDocument] = {}
+        # 执行任务期间添加的游戏的来源 Header：目标平台 -> {来源平台目录: Header}，执行结束前统一合并
+        self._header_sources: Dict[str, Dict[str, str]] = {}
+        # 执行任务期间从文件读取的来源 Header（来源游戏的平台实体没有 Header 时）：来源平台目录 -> Header
+        self._source_headers: Dict[str, str] = {}
     
-    def load_all_platforms(self) -> bool:
-        """加载所有平台的游戏"""
+    def load_all_platforms(self, progress_callback: Optional[Callable[[int, int, str], None]] = None) -> bool:
+        """加载所有平台的游戏
+        
+        平台目录取自目录发现的清单，未命中缓存的平台并行解析。结果按平台名排序，
+        单个平台加载失败只记录到 load_errors，不影响其余平台。
+        progress_callback(已完成数, 平台总数, 平台名) 在调用线程中依次调用。
+        """
         self.platforms.clear()
+        self.table = GameTable()
+        self._missing_counts.clear()
         self.headers.clear()
-        platform_dirs = MetadataParser.find_platform_directories(self.roms_root)
+        self.load_errors = {}
+        platform_dirs = self._find_platform_directories()
+        loaded = self._load_platform_dirs(platform_dirs, progress_callback)
         
+        # 按平台顺序写入列式存储
         for platform_path in platform_dirs:
-            platform_name = platform_path.name
-            header, games = MetadataParser.parse_platform_directory(platform_path)
-            self.platforms[platform_name] = games
-            self.headers[platform_name] = header
+            if platform_path.name in loaded:
+                self._install_platform(platform_path, loaded[platform_path.name])
         
+        self._build_platform_indexes([self.get_platform(name) for name in self.platforms])
         return True
     
-    def get_all_games(self) -> List[Game]:
+    def refresh(self) -> LibraryChanges:
+        """按文件系统的变化增量刷新，返回检测到的变化
+        
+        只重新加载元数据文件有变化的平台和新出现的平台，移除已删除的平台；
+        ROM 文件或 media 子目录有增删的平台只重建对应的索引。
+        """
+        changes = self.watcher.poll()
+        if not changes:
+            return changes
+        
+        for name in changes.removed:
+            self._remove_platform(name)
+        # ROM 文件或 media 目录可能有变化的平台，缓存的游戏大小不再可靠
+        for name in changes.metadata | changes.roms | changes.media:
+            self._forget_game_sizes(name)
+        
+        reload_names = sorted(changes.added | changes.metadata)
+        platform_dirs = [self.roms_root / name for name in reload_names]
+        for name in reload_names:
+            self.load_errors.pop(name, None)
+        loaded = self._load_platform_dirs(platform_dirs)
+        for platform_path in platform_dirs:
+            if platform_path.name in loaded:
+                self._install_platform(platform_path, loaded[platform_path.name])
+            else:
+                self._remove_platform(platform_path.name)
+        self.platforms = dict(sorted(self.platforms.items()))
+        self._build_platform_indexes([self.get_platform(name) for name in reload_names if name in self.platforms])
+        
+        for name in changes.roms - set(reload_names):
+            if name in self.platforms:
+                self.get_platform(name).build_rom_index()
+        for name in changes.media - set(reload_names):
+            if name in self.platforms:
+                self.get_platform(name).refresh_media_index()
+        return changes
+    
+    def _load_platform_dirs(self, platform_dirs: List[Path],
+                            progress_callback: Optional[Callable[[int, int, str], None]] = None) -> Dict[str, tuple]:
+        """读取缓存或解析多个平台，返回 平台名 -> (header, 指纹, 游戏记录)，失败的平台记录到 load_errors"""
+        total = len(platform_dirs)
+        loaded: Dict[str, tuple] = {}
+        done = 0
+        
+        def finish(platform_path: Path, result: Optional[tuple], error: Optional[str]):
+            nonlocal done
+            done += 1
+            if error is None:
+                loaded[platform_path.name] = result
+            else:
+                self.load_errors[platform_path.name] = error
+            if progress_callback:
+                progress_callback(done, total, platform_path.name)
+        
+        # 先读取解析缓存，未命中的平台再并行解析
+        pending = []
+        for platform_path in platform_dirs:
+            try:
+                cached = self._load_cached(platform_path)
+            except Exception as e:
+                finish(platform_path, None, str(e))
+                continue
+            if cached is None:
+                pending.append(platform_path)
+            else:
+                finish(platform_path, cached, None)
+        
+        for platform_path, result, error in self._parse_platforms(pending):
+            finish(platform_path, result, error)
+        return loaded
+    
+    def _install_platform(self, platform_path: Path, result: tuple):
+        """将平台的解析结果写入列式存储，懒加载的行共享平台的 MetadataSource
+        
+        重新加载时文件名相同的游戏写回原来的行（引用这些行的任务和列表项随之更新），
+        其余游戏追加为新行；不再存在的游戏的行留在表中，仍被引用的游戏对象保持可用。
+        """
+        header, fingerprint, records = result
+        _, size, mtime_ns = fingerprint
+        source = MetadataSource(platform_path / "metadata.pegasus.txt", size, mtime_ns)
+        previous = self.platforms.get(platform_path.name)
+        reuse = previous.ids if previous is not None else ()
+        rows = self.table.extend_records(platform_path, source, records, reuse)
+        self.platforms[platform_path.name] = GameRows(self.table, rows)
+        self._missing_counts.pop(platform_path.name, None)
+        self.set_header(platform_path.name, header)
+    
+    def _remove_platform(self, platform: str):
+        self._forget_game_sizes(platform)
+        self.platforms.pop(platform, None)
+        self.headers.pop(platform, None)
+        self._missing_counts.pop(platform, None)
+    
+    def _forget_game_sizes(self, platform: str):
+        """丢弃平台中全部游戏的缓存大小"""
+        for game in self.platforms.get(platform, ()):
+            self.disk_usage.forget_game(game)
+    
+    @staticmethod
+    def _build_platform_index(platform: Platform):
+        platform.build_rom_index()
+        platform.build_media_index()
+    
+    def _build_platform_indexes(self, platforms: List[Platform]):
+        """建立各平台的 ROM 列表和 media 索引（目录扫描受 I/O 延迟限制，使用线程池并行）"""
+        workers = min(self.workers, len(platforms))
+        if workers <= 1:
+            for platform in platforms:
+                self._build_platform_index(platform)
+            return
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(self._build_platform_index, platforms))
+    
+    def count_missing_files(self, platform: Optional[str] = None) -> int:
+        """ROM 文件缺失的游戏数（指定平台或全部平台），结果按平台缓存"""
+        names = [platform] if platform else list(self.platforms)
+        total = 0
+        for name in names:
+            games = self.platforms.get(name)
+            if games is None:
+                continue
+            entity = self.get_platform(name)
+            key = (self.table.version, len(games), entity.rom_version)
+            cached = self._missing_counts.get(name)
+            if cached is None or cached[0] != key:
+                cached = self._missing_counts[name] = (key, sum(1 for g in games if g.is_file_missing))
+            total += cached[1]
+        return total
+    
+    def game_size(self, game: Game) -> int:
+        """游戏 ROM 文件与 media 目录的总字节数"""
+        return self.disk_usage.game_size(game)
+    
+    def get_platform(self, platform: str) -> Platform:
+        """获取平台实体，尚未加载的平台按 Roms 根目录下的同名目录登记"""
+        return self.table.platform(platform, self.roms_root / platform)
+    
+    def get_header(self, platform: str) -> PlatformHeader:
+        """获取平台已解析的 Header，Header 文本被修改后重新解析"""
+        entity = self.get_platform(platform)
+        entity.header_text = self.headers.get(platform, "")
+        return entity.header
+    
+    def set_header(self, platform: str, header: str):
+        """设置平台 Header 文本（执行任务时写入文件）"""
+        self.headers[platform] = header
+        self.get_platform(platform).header_text = header
+    
+    def _find_platform_directories(self) -> List[Path]:
+        """按名称排序返回 Roms 根目录下的平台目录，同时以当前状态作为变化检测的基准
+        
+        候选目录取自目录发现（清单有效时不再探测每个子目录），变化检测的基准本身会 stat
+        各平台的元数据文件和 media 目录，据此排除清单之后失效的平台目录。
+        """
+        self.watcher.reset()
+        return [self.roms_root / name for name in self.watcher.platform_names()]
+    
+    def _load_cached(self, platform_path: Path) -> Optional[tuple]:
+        """读取平台的解析缓存，返回 (header, 指纹, 游戏记录)，未启用缓存或未命中时返回 None"""
+        if not self.parse_cache:
+            return None
+        fingerprint = ParseCache.fingerprint(platform_path / "metadata.pegasus.txt")
+        cached = self.parse_cache.load_records(platform_path, fingerprint)
+        if cached is None:
+            return None
+        header, records = cached
+        return header, fingerprint, records
+    
+    def _parse_platforms(self, platform_dirs: List[Path]) -> Iterator[Tuple[Path, Optional[tuple], Optional[str]]]:
+        """解析多个平台，按完成顺序产出 (平台目录, (header, 指纹, 游戏记录), 错误信息)
+        
+        元数据总量较大时使用进程池，否则使用线程池；进程池不可用时退回当前进程逐个解析。
+        """
+        workers = min(self.workers, len(platform_dirs))
+        remaining = list(platform_dirs)
+        if workers > 1:
+            # 进程数超过 CPU 核数没有意义；线程池主要用于重叠网络存储的读取延迟
+            use_processes = (self._metadata_size(platform_dirs) >= PROCESS_POOL_MIN_BYTES
+                             and (os.cpu_count() or 1) > 1)
+            executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            if use_processes:
+                workers = min(workers, os.cpu_count())
+            try:
+                with executor_class(max_workers=workers) as executor:
+                    if use_processes:
+                        pending = {executor.submit(_parse_platform_worker, p, self.lazy): p for p in platform_dirs}
+                    else:
+                        pending = {executor.submit(self._load_platform, p): p for p in platform_dirs}
+                    for future in as_completed(pending):
+                        platform_path = pending[future]
+                        try:
+                            result = future.result()
+                            if use_processes:
+                                result = self._store_worker_result(platform_path, *result)
+                        except BrokenProcessPool:
+                            raise
+                        except Exception as e:
+                            remaining.remove(platform_path)
+                            yield platform_path, None, str(e)
+                            continue
+                        remaining.remove(platform_path)
+                        yield platform_path, result, None
+            except (BrokenProcessPool, OSError, NotImplementedError):
+                pass
+        
+        for platform_path in remaining:
+            try:
+                yield platform_path, self._load_platform(platform_path), None
+            except Exception as e:
+                yield platform_path, None, str(e)
+    
+    def _load_platform(self, platform_path: Path) -> tuple:
+        """在当前进程中解析单个平台并写入解析缓存，返回 (header, 指纹, 游戏记录)"""
+        fingerprint = ParseCache.fingerprint(platform_path / "metadata.pegasus.txt")
+        header, games = MetadataParser.parse_platform_directory(platform_path, self.lazy)
+        records = ParseCache.game_records(games)
+        if self.parse_cache:
+            self.parse_cache.store_records(platform_path, fingerprint, header, records)
+        return header, fingerprint, records
+    
+    def _store_worker_result(self, platform_path: Path, fingerprint: tuple, header: str, records: list) -> tuple:
+        """将工作进程返回的记录写入解析缓存，返回 (header, 指纹, 游戏记录)"""
+        if self.parse_cache:
+            self.parse_cache.store_records(platform_path, fingerprint, header, records)
+        return header, fingerprint, records
+    
+    @staticmethod
+    def _metadata_size(platform_dirs: List[Path]) -> int:
+        """各平台元数据文件的总字节数"""
+        total = 0
+        for platform_path in platform_dirs:
+            try:
+                total += (platform_path / "metadata.pegasus.txt").stat().st_size
+            except OSError:
+                pass
+        return total
+    
+    def get_all_games(self) -> GameRows:
         """获取所有游戏"""
-        all_games = []
+        all_games = GameRows(self.table)
         for games in self.platforms.values():
-            all_games.extend(games)
+            all_games.ids.extend(games.ids)
         return all_games
     
-    def get_platform_games(self, platform: str) -> List[Game]:
+    def get_platform_games(self, platform: str) -> GameRows:
         """获取指定平台的游戏"""
-        return self.platforms.get(platform, [])
+        return self.platforms.get(platform, GameRows(self.table))
     
     def get_platform_names(self) -> List[str]:
         """获取Roms目录下的所有平台目录名称"""
-        try:
-            return sorted([item.name for item in self.roms_root.iterdir() if item.is_dir()])
-        except FileNotFoundError:
-            return []
+        return self.discovery.directory_names()
     
     def has_game(self, game: Game) -> bool:
         """判断是否已存在相同游戏（按平台+文件名或名称匹配）"""
-        platform_games = self.platforms.get(game.platform, [])
-        for g in platform_games:
-            if g.file == game.file or g.game == game.game:
-                return True
-        return False
-    
-    def execute_tasks(self) -> dict:
-        """执行任务队列中的所有任务"""
+        platform_games = self.platforms.get(game.platform)
+        return platform_games is not None and platform_games.find(game.file, game.game) >= 0
+    
+    def set_deploy_mode(self, mode: str):
+        """设置添加任务放置文件的方式（复制/硬链接/克隆/符号链接），不可用时自动退回复制"""
+        if mode not in DEPLOY_MODES:
+            raise ValueError(f"未知的部署方式: {mode}")
+        self.copy_engine.mode = mode
+    
+    def set_device_workers(self, path: Path, workers: int):
+        """设置 path 所在设备同时进行的复制数上限（执行任务时生效，同一设备以最后设置的为准）"""
+        self._device_workers[Path(path)] = max(1, workers)
+    
+    def set_sync_compare(self, compare: str):
+        """设置添加任务判断目标文件未变化（跳过复制）的比较方式，COMPARE_NONE 表示总是复制"""
+        if compare not in COMPARE_MODES:
+            raise ValueError(f"未知的比较方式: {compare}")
+        self.copy_engine.compare = compare
+    
+    def set_trash_retention(self, retention_bytes: int):
+        """设置回收站保留大小，超出时从最早删除的游戏开始永久删除"""
+        if self.trash:
+            self.trash.retention_bytes = max(0, retention_bytes)
+    
+    def plan_tasks(self) -> ExecutionPlan:
+        """生成执行计划：把任务队列解析为具体的文件操作，不修改任何文件
+        
+        列出每个任务要复制或删除的文件、大小、是否覆盖、是否未变化（按当前比较方式，只用 stat），
+        检查来源文件缺失、与项目中已有游戏的名称/文件冲突、同一批任务写入同一文件，
+        并统计目标磁盘需要的空间。任务较多时并行获取文件状态。
+        """
+        tasks = list(self.task_queue.tasks)
+        try:
+            device = os.stat(self.roms_root).st_dev
+        except OSError:
+            device = None
+        if self.workers > 1 and len(tasks) >= PARALLEL_PLAN_MIN_TASKS:
+            with ThreadPoolExecutor(max_workers=self.workers) as executor:
+                plans = list(executor.map(lambda task: self._plan_task(task, device), tasks))
+        else:
+            plans = [self._plan_task(task, device) for task in tasks]
+        
+        # 同一批任务写入同一文件（后执行的覆盖先执行的）
+        writers: Dict[Path, Task] = {}
+        for plan in plans:
+            for op in plan.operations:
+                if op.kind == OP_COPY:
+                    other = writers.setdefault(op.target, plan.task)
+                    if other is not plan.task:
+                        plan.issues.append(f"与任务 {other} 写入同一文件: {op.target.name}")
+        return ExecutionPlan(self.roms_root, plans)
+    
+    def _plan_task(self, task: Task, device: Optional[int]) -> TaskPlan:
+        plan = TaskPlan(task)
+        game = task.game
+        if task.task_type == TaskType.ADD:
+            _, _, rom, media = self._add_task_files(game)
+            op = self._plan_copy(*rom, device)
+            if op:
+                plan.operations.append(op)
+            else:
+                plan.issues.append(f"来源游戏文件不存在: {game.file}")
+            for _, source, target in media:
+                op = self._plan_copy(source, target, device)
+                if op:
+                    plan.operations.append(op)
+            # 执行时按文件或名称匹配替换项目中已有的游戏
+            rows = self.platforms.get(game.platform)
+            position = rows.find(game.file, game.game) if rows is not None else -1
+            if position >= 0:
+                existing = rows[position]
+                if existing.game != game.game:
+                    plan.issues.append(f"文件 {game.file} 属于项目中的游戏 {existing.game}，将被替换")
+                elif existing.file != game.file:
+                    plan.issues.append(f"项目中已有同名游戏（文件 {existing.file}），将被替换")
+        elif task.task_type == TaskType.REMOVE:
+            platform_path = self.roms_root / game.platform
+            game_file = platform_path / game.file
+            try:
+                plan.operations.append(FileOperation(OP_DELETE, game_file, size=os.stat(game_file).st_size))
+            except OSError:
+                pass
+            media_dir = platform_path / "media" / (Path(game.file).stem or game.game)
+            if media_dir.is_dir():
+                plan.operations.append(FileOperation(OP_DELETE, media_dir, size=self.disk_usage.path_size(str(media_dir))))
+        return plan
+    
+    def _plan_copy(self, source: Path, target: Path, device: Optional[int]) -> Optional[FileOperation]:
+        """一次复制的计划，来源不存在时返回 None"""
+        try:
+            src = os.stat(source)
+        except OSError:
+            return None
+        mode = self.copy_engine.mode
+        linked = mode == DEPLOY_SYMLINK or (mode == DEPLOY_HARDLINK and src.st_dev == device)
+        op = FileOperation(OP_COPY, target, source, size=src.st_size, required=0 if linked else src.st_size)
+        try:
+            dst = os.stat(target)
+        except OSError:
+            return op
+        op.overwrite = True
+        op.unchanged = bool(self.copy_engine.compare) and stats_identical(src, dst, self.copy_engine.compare) is True
+        # 覆盖时原文件占用的空间可以复用；链接不占空间，不把释放的空间计为负数
+        op.required = max(0, op.required - dst.st_size)
+        return op
+    
+    def execute_tasks(self, progress: Optional[TransferProgress] = None) -> dict:
+        """执行任务队列中的所有任务
+        
+        元数据修改先累积在各平台的文档中，全部任务执行完后每个平台只写入一次，
+        results['bytes_written'] 记录各平台写入的字节数，results['sync'] 为文件同步统计（SyncStats）。
+        添加任务的文件复制交给复制引擎并发进行，按任务顺序等待各任务的复制完成后
+        再在当前线程中修改元数据（与后续任务的复制重叠），复制失败的任务不修改元数据。
+        指定 progress 时分块复制并报告字节进度；暂停在数据块和任务之间生效，取消后不再开始新任务，
+        已完成的任务照常写入元数据，被取消和未执行的任务（results['cancelled']）保留在队列中。
+        删除任务把文件移入回收站的同一批次（可用 undo_last_removal() 撤销），执行结束后在后台清理回收站。
+        """
         results = {
             'total': len(self.task_queue.tasks),
             'success': 0,
-            'failed': 0
+            'failed': 0,
+            'cancelled': 0,
+            'bytes_written': {}
         }
+        stats = self.copy_engine.stats = SyncStats()
+        self.copy_engine.progress = progress
+        for path, workers in self._device_workers.items():
+            try:
+                self.copy_engine.set_device_workers(path, workers)
+            except OSError:
+                # 目录不存在时所在设备未知，按默认上限
+                pass
+        self._documents = {}
+        self._header_sources = {}
+        self._source_headers = {}
+        self._removals = {}
+        self._trash_batch = None
+        platform_tasks: Dict[str, List[Task]] = {}
         
-        for task in self.task_queue.tasks:
-            task.status = TaskStatus.RUNNING
-            self.task_queue.log(f"开始执行: {task}", "info")
-            
+        if self.journal:
+            platforms = {task.game.platform for task in self.task_queue.tasks}
             try:
-                if task.task_type == TaskType.ADD:
-                    self._execute_add_task(task)
-                elif task.task_type == TaskType.REMOVE:
-                    self._execute_remove_task(task)
-                elif task.task_type == TaskType.UPDATE:
-                    self._execute_update_task(task)
-                
+                self.journal.begin(self.roms_root, self.task_queue.tasks,
+                                   {p: h for p, h in self.headers.items() if p in platforms})
+            except OSError as e:
+                self.journal.close()
+                self.task_queue.log(f"无法写入执行日志，中断后将不能恢复: {e}", "warning")
+        
+        def finish(task: Task, step: Callable[[], None]):
+            try:
+                step()
                 task.status = TaskStatus.SUCCESS
                 results['success'] += 1
+                platform_tasks.setdefault(task.game.platform, []).append(task)
                 self.task_queue.log(f"执行成功: {task.game.game}", "success")
+            except CopyCancelled:
+                task.status = TaskStatus.PENDING
+                results['cancelled'] += 1
+                self.task_queue.log(f"已取消: {task.game.game}", "warning")
             except Exception as e:
                 task.status = TaskStatus.FAILED
                 task.error_message = str(e)
                 results['failed'] += 1
                 self.task_queue.log(f"执行失败: {task.game.game} - {e}", "error")
         
-        # 清空已执行的任务
-        self.task_queue.clear()
+        try:
+            with self.copy_engine:
+                # 已提交复制、尚未完成的添加任务：(任务, 完成函数)
+                pending: List[Tuple[Task, Callable[[], None]]] = []
+                for task in self.task_queue.tasks:
+                    if progress:
+                        try:
+                            progress.checkpoint()
+                        except CopyCancelled:
+                            break
+                    task.status = TaskStatus.RUNNING
+                    self.task_queue.log(f"开始执行: {task}", "info")
+                    if task.task_type == TaskType.ADD:
+                        try:
+                            complete = self._start_add_task(task)
+                        except Exception as e:
+                            def complete(error=e):
+                                raise error
+                        pending.append((task, complete))
+                        continue
+                    # 其他任务按队列顺序在之前的添加任务完成后执行
+                    if pending:
+                        self._apply_removals()
+                    for added, complete in pending:
+                        finish(added, complete)
+                    pending.clear()
+                    if task.task_type == TaskType.REMOVE:
+                        finish(task, lambda task=task: self._execute_remove_task(task))
+                    elif task.task_type == TaskType.UPDATE:
+                        self._apply_removals()
+                        finish(task, lambda task=task: self._execute_update_task(task))
+                    else:
+                        finish(task, lambda: None)
+                if pending:
+                    self._apply_removals()
+                for added, complete in pending:
+                    finish(added, complete)
+            
+            # 每个目标平台合并一次来源 Header，再合并写入各平台的元数据
+            self._apply_removals()
+            self._merge_source_headers()
+            self._flush_documents(platform_tasks, results)
+        except BaseException:
+            # 执行异常中止时保留日志，下次可以恢复
+            if self.journal:
+                self.journal.close()
+            raise
+        finally:
+            self.copy_engine.progress = None
+        
+        if stats.skipped or stats.copied:
+            self.task_queue.log(f"文件同步: {stats.summary()}", "info")
+        results['sync'] = stats
+        
+        batch, self._trash_batch = self._trash_batch, None
+        if batch is not None:
+            if batch.platforms():
+                self.task_queue.log(f"删除的文件已移入回收站 ({batch.name})，可撤销", "info")
+                self.trash.purge_async()
+            else:
+                batch.discard()
+        
+        # 执行结束，删除日志并清空已执行的任务（取消时保留未完成的任务）
+        self._resume = None
+        if self.journal:
+            self.journal.finish()
+        if progress and progress.cancelled:
+            self.task_queue.keep_pending()
+            results['cancelled'] = len(self.task_queue.tasks)
+            self.task_queue.log(f"执行已取消，{results['cancelled']} 个任务未完成，保留在任务队列中", "warning")
+        else:
+            self.task_queue.clear()
         return results
     
-    def _execute_add_task(self, task):
-        """执行添加任务"""
+    def interrupted_execution(self) -> Optional[JournalState]:
+        """上次中断的执行（执行日志仍存在），没有时返回 None"""
+        if self.journal is None or not self.journal.exists():
+            return None
+        return self.journal.load()
+    
+    def resume_tasks(self, source_manager: Optional['GameManager'] = None) -> int:
+        """把上次中断的执行中未完成的任务恢复到任务队列，返回恢复的任务数
+        
+        元数据已写入的平台的任务视为完成；之后的 execute_tasks() 跳过已完整复制的文件。
+        添加任务优先使用 source_manager 中已加载的来源游戏（保留来源游戏块原文）。
+        """
+        state = self.interrupted_execution()
+        if state is None:
+            return 0
+        for platform, header in state.headers.items():
+            if platform not in state.flushed and header != self.headers.get(platform, ""):
+                self.set_header(platform, header)
+        tasks = state.pending_tasks()
+        for task_type, record in tasks:
+            manager = source_manager if task_type == TaskType.ADD else self
+            self.task_queue.add_task(task_type, self._resumed_game(task_type, record, manager))
+        self._resume = state
+        return len(tasks)
+    
+    def discard_interrupted_execution(self) -> List[str]:
+        """放弃上次中断的执行：删除未复制完成的文件和日志，返回删除的文件"""
+        self._resume = None
+        return self.journal.discard() if self.journal else []
+    
+    @staticmethod
+    def _resumed_game(task_type: TaskType, record: dict, manager: Optional['GameManager']) -> Game:
+        """日志中的游戏对应的已加载游戏（更新任务写回日志中的字段），找不到时由日志记录还原"""
+        game = game_from_record(record)
+        rows = manager.platforms.get(game.platform) if manager else None
+        position = rows.find(game.file, game.game) if rows is not None else -1
+        if position < 0:
+            return game
+        existing = rows[position]
+        if task_type == TaskType.ADD and existing.platform_path != game.platform_path:
+            return game
+        if task_type == TaskType.UPDATE:
+            existing.game = game.game
+            existing.sort_by = game.sort_by
+            existing.developer = game.developer
+            existing.description = game.description
+            existing.extra_fields = game.extra_fields
+        return existing
+    
+    def _source_header(self, source_game: Game) -> str:
+        """来源游戏所属平台的 Header
+        
+        来源游戏来自已加载的来源管理器时直接使用其平台实体中的 Header，
+        否则只读取元数据文件的 Header 部分，每次执行每个来源平台只读取一次。
+        """
+        header = source_game._platform_entity().header_text
+        if header:
+            return header
+        source_key = str(source_game.platform_path)
+        header = self._source_headers.get(source_key)
+        if header is None:
+            header = self._source_headers[source_key] = MetadataParser.read_platform_header(source_game.platform_path)
+        return header
+    
+    def _merge_source_headers(self):
+        """合并来源 Header：目标平台 Header 缺少的字段从来源复制，每个目标平台只合并一次"""
+        header_sources, self._header_sources = self._header_sources, {}
+        for platform, sources in header_sources.items():
+            project_header = self.headers.get(platform, "")
+            try:
+                merged_header = project_header
+                for source_header in sources.values():
+                    merged_header = MetadataParser.merge_header_fields(
+                        merged_header,
+                        source_header,
+                        ["collection", "sort-by", "extensions", "launch"],
+                        platform
+                    )
+                if merged_header != project_header:
+                    self.set_header(platform, merged_header)
+                    self.task_queue.log(f"合并平台配置 (Header): {platform}", "info")
+            except Exception as e:
+                self.task_queue.log(f"合并平台配置失败: {platform} - {e}", "warning")
+    
+    def _metadata_document(self, platform: str) -> MetadataDocument:
+        """获取平台待写入的元数据文档，同一次执行中每个平台只读取一次"""
+        doc = self._documents.get(platform)
+        if doc is None:
+            doc = MetadataDocument.load(self.roms_root / platform / "metadata.pegasus.txt")
+            self._documents[platform] = doc
+        return doc
+    
+    def _flush_documents(self, platform_tasks: Dict[str, List[Task]], results: dict):
+        """每个平台一次原子写入累积的全部修改，写入失败时该平台的任务记为失败"""
+        documents, self._documents = self._documents, {}
+        for platform, doc in documents.items():
+            doc.set_header(self.headers.get(platform, ""))
+            if not doc.is_dirty:
+                continue
+            try:
+                written = doc.save()
+                if self.journal:
+                    self.journal.flushed(platform)
+                results['bytes_written'][platform] = written
+                self.task_queue.log(f"写入元数据: {platform} ({written} 字节)", "info")
+            except Exception as e:
+                self.task_queue.log(f"写入元数据失败: {platform} - {e}", "error")
+                for task in platform_tasks.get(platform, []):
+                    task.status = TaskStatus.FAILED
+                    task.error_message = str(e)
+                    results['success'] -= 1
+                    results['failed'] += 1
+    
+    def _add_task_files(self, source_game: Game) -> Tuple[Path, str, Tuple[Path, Path], List[Tuple[str, Path, Path]]]:
+        """添加任务的目标平台目录、media 子目录名、游戏文件 (来源, 目标) 和媒体文件 [(类别, 来源, 目标)]
+        
+        只计算路径，不访问来源游戏文件；媒体文件取自来源平台的 media 索引。
+        """
+        platform_path = self.roms_root / source_game.platform
+        # media目录使用文件名去除扩展名作为目录名
+        media_dir_name = Path(source_game.file).stem or source_game.game
+        media_dir = platform_path / "media" / media_dir_name
+        rom = (source_game.platform_path / source_game.file, platform_path / source_game.file)
+        media = []
+        for label, media_path in (("logo", source_game.get_logo_path()),
+                                  ("封面", source_game.get_boxfront_path()),
+                                  ("视频", source_game.get_video_path())):
+            if media_path:
+                media.append((label, media_path, media_dir / media_path.name))
+        return platform_path, media_dir_name, rom, media
+    
+    def _start_add_task(self, task) -> Callable[[], None]:
+        """提交添加任务的文件复制，返回完成函数：等待复制结束后记录文件并修改元数据"""
         source_game = task.game
         platform = source_game.platform
+        platform_path, media_dir_name, (source_file, dest_file), media = self._add_task_files(source_game)
         
-        # 确保平台目录存在
-        platform_path = self.roms_root / platform
+        # 确保平台目录和media目录存在
         platform_path.mkdir(parents=True, exist_ok=True)
-        
-        # 创建media目录（使用文件名去除扩展名作为目录名）
-        media_dir_name = Path(source_game.file).stem or source_game.game
         media_dir = platform_path / "media" / media_dir_name
         media_dir.mkdir(parents=True, exist_ok=True)
         
         # 复制游戏文件
-        source_file = source_game.platform_path / source_game.file
-        dest_file = platform_path / source_game.file
-        if source_file.exists():
-            shutil.copy2(source_file, dest_file)
-            self.task_queue.log(f"  复制游戏文件: {source_game.file}", "info")
-        
-        # 复制logo
-        logo_path = source_game.get_logo_path()
-        if logo_path and logo_path.exists():
-            dest_logo = media_dir / logo_path.name
-            shutil.copy2(logo_path, dest_logo)
-            self.task_queue.log(f"  复制logo: {logo_path.name}", "info")
-        
-        # 复制封面
-        boxfront_path = source_game.get_boxfront_path()
-        if boxfront_path and boxfront_path.exists():
-            dest_boxfront = media_dir / boxfront_path.name
-            shutil.copy2(boxfront_path, dest_boxfront)
-            self.task_queue.log(f"  复制封面: {boxfront_path.name}", "info")
-        
-        # 复制视频
-        video_path = source_game.get_video_path()
-        if video_path and video_path.exists():
-            dest_video = media_dir / video_path.name
-            shutil.copy2(video_path, dest_video)
-            self.task_queue.log(f"  复制视频: {video_path.name}", "info")
-        
-        # 处理 Header 合并：如果项目 Header 缺失特定字段，从来源复制
-        project_header = self.headers.get(platform, "")
-        try:
-            source_header, _ = MetadataParser.parse_platform_directory(source_game.platform_path)
-            merged_header = MetadataParser.merge_header_fields(
-                project_header, 
-                source_header, 
-                ["collection", "sort-by", "extensions", "launch"],
-                platform
-            )
-            if merged_header != project_header:
-                self.headers[platform] = merged_header
-                self.task_queue.log(f"  合并平台配置 (Header)", "info")
-        except Exception as e:
-            self.task_queue.log(f"  合并平台配置失败: {e}", "warning")
-
-        # 更新元数据文件
-        if platform not in self.platforms:
-            self.platforms[platform] = []
+        rom_copy = self._submit_copy(source_file, dest_file) if source_file.exists() else None
+        
+        # 复制logo、封面、视频：(日志文本, 复制结果)
+        media_copies = []
+        for label, media_path, target in media:
+            if media_path.exists():
+                media_copies.append((f"  复制{label}: {media_path.name}", self._submit_copy(media_path, target)))
+        
+        def complete():
+            # 等待该任务的全部复制结束后再更新索引，任一复制失败则任务失败、不修改元数据
+            futures.wait([f for f in [rom_copy] + [f for _, f in media_copies] if f])
+            try:
+                if rom_copy:
+                    rom_copy.result()
+                    self.get_platform(platform).add_file(source_game.file)
+                    self.task_queue.log(f"  复制游戏文件: {source_game.file}{_deploy_note(rom_copy.result())}", "info")
+                for message, future in media_copies:
+                    self.task_queue.log(f"{message}{_deploy_note(future.result())}", "info")
+            finally:
+                self.get_platform(platform).update_media_dir(media_dir_name)
+            self._add_game_metadata(source_game, platform, platform_path)
+        
+        return complete
+    
+    def _submit_copy(self, source: Path, target: Path) -> Future:
+        """提交一次复制并记入执行日志；恢复执行时跳过上次已完整复制的文件"""
+        journal = self.journal
+        if self._resume and self._resume.is_copied(source, target):
+            if journal:
+                journal.copy_planned(source, target)
+                journal.copy_done(source, target)
+            future = Future()
+            future.set_result(COPY_RESUMED)
+            return future
+        if not journal:
+            return self.copy_engine.submit(source, target)
+        
+        def done(future: Future):
+            if not future.cancelled() and future.exception() is None:
+                journal.copy_done(source, target)
         
+        journal.copy_planned(source, target)
+        future = self.copy_engine.submit(source, target)
+        future.add_done_callback(done)
+        return future
+    
+    def _add_game_metadata(self, source_game: Game, platform: str, platform_path: Path):
+        """添加任务的元数据部分：记录来源 Header（执行结束前合并）、插入游戏并记录文档修改"""
+        source_key = str(source_game.platform_path)
+        sources = self._header_sources.setdefault(platform, {})
+        if source_key not in sources:
+            try:
+                sources[source_key] = self._source_header(source_game)
+            except Exception as e:
+                sources[source_key] = ""
+                self.task_queue.log(f"  读取来源平台配置失败: {e}", "warning")
+
         # 创建新游戏对象，去重后插入
         new_game = self._create_game_copy(source_game, platform_path)
-        self._upsert_platform_game(platform, new_game)
+        replaced = self._upsert_platform_game(platform, new_game)
         
-        # 写入元数据
-        metadata_file = platform_path / "metadata.pegasus.txt"
-        header = self.headers.get(platform, "")
-        MetadataParser.write_metadata(self.platforms[platform], metadata_file, header)
+        # 记录元数据修改（执行结束后统一写入）
+        doc = self._metadata_document(platform)
+        if replaced:
+            self.disk_usage.forget_game(replaced)
+            doc.replace_game(replaced, new_game)
+        else:
+            doc.append_game(new_game)
     
     def _execute_remove_task(self, task):
-        """执行删除任务"""
+        """执行删除任务：游戏文件和 media 目录移入回收站，从列表和元数据中移除由 _apply_removals() 批量进行"""
         game = task.game
         platform = game.platform
         platform_path = self.roms_root / platform
@@ -171,39 +834,137 @@ class GameManager:
         # 删除游戏文件
         game_file = platform_path / game.file
         if game_file.exists():
-            game_file.unlink()
-            self.task_queue.log(f"  删除游戏文件: {game.file}", "info")
+            note = self._discard_path(game_file, platform, game.file)
+            self.get_platform(platform).discard_file(game.file)
+            self.task_queue.log(f"  删除游戏文件: {game.file}{note}", "info")
         
         # 删除media目录（使用文件名去除扩展名）
         media_dir_name = Path(game.file).stem or game.game
         media_dir = platform_path / "media" / media_dir_name
         if media_dir.exists():
-            shutil.rmtree(media_dir)
-            self.task_queue.log(f"  删除media目录: {media_dir_name}", "info")
+            note = self._discard_path(media_dir, platform, f"media/{media_dir_name}")
+            self.task_queue.log(f"  删除media目录: {media_dir_name}{note}", "info")
+            self.get_platform(platform).update_media_dir(media_dir_name)
         
-        # 从列表中移除
+        self.disk_usage.forget_game(game)
+        
+        # 从列表和元数据中移除（连续的删除任务合并处理）
         if platform in self.platforms:
-            self.platforms[platform] = [
-                g for g in self.platforms[platform] 
-                if g.game != game.game
-            ]
+            self._removals.setdefault(platform, {})[game.game] = game
+    
+    def _discard_path(self, path: Path, platform: str, relative: str) -> str:
+        """把文件或目录移入本次执行的回收站批次，未启用回收站时直接删除，返回日志标注；
+        启用回收站但无法移入时抛出 OSError，保留原文件（删除任务失败，不会永久删除）"""
+        if self.trash:
+            if self._trash_batch is None:
+                self._trash_batch = self.trash.new_batch()
+            if not self._trash_batch.stage(path, platform, relative):
+                raise OSError(f"无法移入回收站，未删除: {relative}")
+            return "（移入回收站）"
+        if path.is_dir():
+            shutil.rmtree(path)
+        else:
+            path.unlink()
+        return ""
+    
+    def _apply_removals(self):
+        """从平台列表和元数据中移除已执行的删除任务的游戏（每个平台只遍历一次列表），
+        被删除的游戏块原文写入回收站批次，用于撤销"""
+        removals, self._removals = self._removals, {}
+        for platform, targets in removals.items():
+            games = self.platforms.get(platform)
+            if games is None:
+                continue
+            table = games.table
+            removed = [table.row(i) for i in games.ids if table.games[i] in targets]
+            games.remove_rows(removed)
             
-            # 更新元数据
-            metadata_file = platform_path / "metadata.pegasus.txt"
-            header = self.headers.get(platform, "")
-            MetadataParser.write_metadata(self.platforms[platform], metadata_file, header)
+            # 记录元数据修改（执行结束后统一写入）
+            doc = self._metadata_document(platform)
+            removed = removed or list(targets.values())
+            blocks = [doc.game_bytes(g) for g in removed]
+            for g in removed:
+                doc.remove_game(g)
+            if self._trash_batch is not None:
+                try:
+                    self._trash_batch.add_blocks(platform, blocks)
+                except OSError as e:
+                    self.task_queue.log(f"  回收站无法保存元数据，撤销时不能恢复: {platform} - {e}", "warning")
+    
+    def undo_last_removal(self) -> int:
+        """撤销最近一次执行的删除：从回收站移回游戏文件和 media 目录，恢复元数据中的游戏块原文，
+        返回恢复的游戏数。目标位置已有同名文件时保留现有文件，未能恢复的文件留在回收站批次中。"""
+        batch = self.trash.last_batch() if self.trash else None
+        if batch is None:
+            return 0
+        self._documents = {}
+        restored: Dict[str, int] = {}
+        for platform in batch.platforms():
+            source_path = batch.platform_path(platform)
+            platform_path = self.roms_root / platform
+            try:
+                _, games = MetadataParser.parse_platform_directory(source_path, lazy=True)
+            except Exception as e:
+                self.task_queue.log(f"回收站中没有可恢复的元数据: {platform} - {e}", "warning")
+                continue
+            entity = self.get_platform(platform)
+            doc = self._metadata_document(platform)
+            for game in games:
+                if self._restore_path(source_path / game.file, platform_path / game.file):
+                    entity.add_file(game.file)
+                media_dir_name = Path(game.file).stem or game.game
+                if self._restore_path(source_path / "media" / media_dir_name, platform_path / "media" / media_dir_name):
+                    entity.update_media_dir(media_dir_name)
+                
+                # 保留块原文写入；懒加载字段现在解码（回收站中的文件随后删除）
+                new_game = self._create_game_copy(game, platform_path)
+                new_game.description = game.description
+                new_game.extra_fields = dict(game.extra_fields)
+                replaced = self._upsert_platform_game(platform, new_game)
+                if replaced:
+                    self.disk_usage.forget_game(replaced)
+                    doc.replace_game(replaced, new_game)
+                else:
+                    doc.append_game(new_game)
+                restored[platform] = restored.get(platform, 0) + 1
+                self.task_queue.log(f"恢复: {game.game}", "success")
+        
+        results = {'success': 0, 'failed': 0, 'bytes_written': {}}
+        self._flush_documents({}, results)
+        if not all(platform in results['bytes_written'] for platform in restored):
+            self.task_queue.log(f"部分元数据未能写入，回收站批次 {batch.name} 保留", "warning")
+        elif batch.has_files():
+            # 元数据缺失或移回失败的文件留在回收站中，不能随批次删除
+            self.task_queue.log(f"部分文件未能恢复，回收站批次 {batch.name} 保留", "warning")
+        else:
+            batch.discard()
+        return sum(restored.values())
+    
+    def _restore_path(self, source: Path, target: Path) -> bool:
+        """把回收站中的文件或目录移回原处，来源不存在、目标已存在或移动失败时返回 False"""
+        if not os.path.lexists(source):
+            return False
+        if os.path.lexists(target):
+            self.task_queue.log(f"  目标已存在，保留现有文件: {target}", "warning")
+            return False
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(source, target)
+        except OSError as e:
+            self.task_queue.log(f"  无法恢复: {target} - {e}", "warning")
+            return False
+        return True
     
     def _execute_update_task(self, task):
         """执行更新任务"""
         game = task.game
         platform = game.platform
-        platform_path = self.roms_root / platform
         
-        # 更新元数据文件
+        # 记录元数据修改（执行结束后统一写入）；只修改 Header 时任务中的游戏不在平台列表中
         if platform in self.platforms:
-            metadata_file = platform_path / "metadata.pegasus.txt"
-            header = self.headers.get(platform, "")
-            MetadataParser.write_metadata(self.platforms[platform], metadata_file, header)
+            doc = self._metadata_document(platform)
+            if not doc.update_game(game) and game in self.platforms[platform]:
+                doc.append_game(game)
             self.task_queue.log(f"  更新元数据", "info")
     
     def _create_game_copy(self, source_game: Game, platform_path: Path) -> Game:
@@ -213,35 +974,28 @@ class GameManager:
         new_game.file = source_game.file
         new_game.sort_by = source_game.sort_by
         new_game.developer = source_game.developer
-        new_game.description = source_game.description
+        # 懒加载字段不在此解码，写入时直接复制来源游戏块的原文
+        new_game.description = source_game._description
+        if source_game._extra_fields is not None:
+            new_game.extra_fields = dict(source_game._extra_fields)
+        new_game._block = source_game._block
         new_game.platform = source_game.platform
         new_game.platform_path = platform_path
         return new_game
 
-    def _upsert_platform_game(self, platform: str, new_game: Game):
-        """在平台列表中去重插入/更新游戏，按文件或名称匹配"""
+    def _upsert_platform_game(self, platform: str, new_game: Game) -> Optional[Game]:
+        """在平台列表中去重插入/更新游戏，按文件或名称匹配，返回被替换的游戏"""
         if platform not in self.platforms:
-            self.platforms[platform] = []
+            self.platforms[platform] = GameRows(self.table)
         games = self.platforms[platform]
-        replaced = False
-        for idx, g in enumerate(games):
-            if g.file == new_game.file or g.game == new_game.game:
-                games[idx] = new_game
-                replaced = True
-                break
-        if not replaced:
-            games.append(new_game)
-    
-    def search_games(self, keyword: str) -> List[Game]:
-        """搜索游戏"""
-        keyword = keyword.lower()
-        results = []
-        
-        for games in self.platforms.values():
-            for game in games:
-                if (keyword in game.game.lower() or
-                    keyword in game.platform.lower() or
-                    keyword in game.developer.lower()):
-                    results.append(game)
-        
-        return results
+        position = games.find(new_game.file, new_game.game)
+        if position >= 0:
+            replaced = games[position]
+            games[position] = new_game
+            return replaced
+        games.append(new_game)
+        return None
+    
+    def search_games(self, keyword: str) -> GameRows:
+        """搜索游戏（名称、平台、开发者，不区分大小写）"""
+        return self.get_all_games().filter(keyword)
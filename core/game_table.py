@@ -0,0 +1,525 @@
+"""
+游戏列式存储模块
+"""
+
+from array import array
+from bisect import bisect_right
+from pathlib import Path
+from typing import List, Dict, Optional, Iterable, Iterator, Tuple, Union
+from core.metadata_parser import Game, MetadataSource, media_key
+from core.platform import Platform
+
+
+# StringColumn 修改过的值超过该数量（且超过行数的 1/8）时写回缓冲区
+_COMPACT_OVERRIDES = 1024
+
+
+class StringColumn:
+    """字符串列：全部值以 UTF-8 连续存放在一块缓冲区中，按行读取时再解码"""
+    
+    __slots__ = ('_data', '_offsets', '_overrides')
+    
+    def __init__(self):
+        self._data = bytearray()
+        self._offsets = array('I', [0])  # 第 i 行位于 [offsets[i], offsets[i + 1])
+        self._overrides: Dict[int, str] = {}  # 修改过的值（修改很少，不重排缓冲区）
+    
+    def append(self, value: str):
+        self._data += value.encode('utf-8')
+        self._offsets.append(len(self._data))
+    
+    def __getitem__(self, i: int) -> str:
+        if self._overrides:
+            value = self._overrides.get(i)
+            if value is not None:
+                return value
+        offsets = self._offsets
+        return self._data[offsets[i]:offsets[i + 1]].decode('utf-8')
+    
+    def __setitem__(self, i: int, value: str):
+        self._overrides[i] = value
+        if len(self._overrides) > max(_COMPACT_OVERRIDES, len(self) // 8):
+            self.compact()
+    
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+    
+    def compact(self):
+        """把修改过的值写回缓冲区并重新计算偏移（未修改的连续行整段复制）"""
+        overrides = self._overrides
+        if not overrides:
+            return
+        old_data = self._data
+        old_offsets = self._offsets
+        data = bytearray()
+        offsets = array('I', [0])
+        row = 0  # 下一个未复制的行
+        for i in sorted(overrides):
+            start = old_offsets[row]
+            shift = len(data) - start
+            data += old_data[start:old_offsets[i]]
+            offsets.extend(offset + shift for offset in old_offsets[row + 1:i + 1])
+            data += overrides[i].encode('utf-8')
+            offsets.append(len(data))
+            row = i + 1
+        start = old_offsets[row]
+        shift = len(data) - start
+        data += old_data[start:]
+        offsets.extend(offset + shift for offset in old_offsets[row + 1:])
+        self._data = data
+        self._offsets = offsets
+        self._overrides = {}
+
+
+class InternColumn:
+    """低基数字符串列（如开发者）：相同的值只存一份，每行只存编号"""
+    
+    __slots__ = ('_values', '_codes', '_ids')
+    
+    def __init__(self):
+        self._values: List[str] = [""]
+        self._codes: Dict[str, int] = {"": 0}
+        self._ids = array('I')
+    
+    def _code(self, value: str) -> int:
+        code = self._codes.get(value)
+        if code is None:
+            code = self._codes[value] = len(self._values)
+            self._values.append(value)
+        return code
+    
+    def append(self, value: str):
+        self._ids.append(self._code(value))
+    
+    def __getitem__(self, i: int) -> str:
+        return self._values[self._ids[i]]
+    
+    def __setitem__(self, i: int, value: str):
+        self._ids[i] = self._code(value)
+    
+    def __len__(self) -> int:
+        return len(self._ids)
+
+
+class GameTable:
+    """游戏的列式存储，行号即游戏 id
+    
+    每个游戏不再是独立对象：字符串存放在连续缓冲区，平台、来源文件和块区间存为整数数组。
+    通过 GameRow 视图按 Game 的接口读写。行只追加不删除，删除游戏只是从 GameRows 中移除行号；
+    重新加载平台时原有的行按文件名重复使用。
+    """
+    
+    def __init__(self):
+        # 平台实体表，下标即平台 id
+        self.platforms: List[Platform] = []
+        self._platform_codes: Dict[Tuple[str, Optional[Path]], int] = {}
+        # 来源元数据文件表，0 表示没有来源块
+        self.sources: List[Optional[MetadataSource]] = [None]
+        self._source_codes: Dict[int, int] = {}
+        
+        self.platform_ids = array('I')
+        self.games = StringColumn()
+        self.files = StringColumn()
+        self.sort_bys = StringColumn()
+        self.developers = InternColumn()
+        self.source_ids = array('I')
+        self.block_starts = array('q')
+        self.block_ends = array('q')
+        # 已解码（或非懒加载）的描述和其余字段；不在其中且有来源块的行按需从文件读取
+        self.descriptions: Dict[int, str] = {}
+        self.extra_fields: Dict[int, Dict[str, str]] = {}
+        
+        self.version = 0  # 修改计数，用于使搜索索引失效
+        self._search_index: Optional[tuple] = None
+        # 各行的媒体资源位掩码，按平台在表或平台 media 索引修改后重新计算
+        self._asset_masks = array('B')
+        self._asset_state: Dict[int, Tuple[int, int]] = {}  # 平台 id -> (表修改计数, media 索引修改计数)
+    
+    def __len__(self) -> int:
+        return len(self.platform_ids)
+    
+    def platform_id(self, name: str, path: Optional[Path]) -> int:
+        """获取（或登记）平台 id"""
+        key = (name, path)
+        code = self._platform_codes.get(key)
+        if code is None:
+            code = self._platform_codes[key] = len(self.platforms)
+            self.platforms.append(Platform(code, name, path))
+        return code
+    
+    def platform(self, name: str, path: Optional[Path]) -> Platform:
+        """获取（或登记）平台实体"""
+        return self.platforms[self.platform_id(name, path)]
+    
+    def source_id(self, source: Optional[MetadataSource]) -> int:
+        """获取（或登记）来源元数据文件 id"""
+        if source is None:
+            return 0
+        code = self._source_codes.get(id(source))
+        if code is None:
+            code = self._source_codes[id(source)] = len(self.sources)
+            self.sources.append(source)
+        return code
+    
+    def extend_records(self, platform_path: Path, source: Optional[MetadataSource], records: Iterable[tuple],
+                       reuse: Iterable[int] = ()) -> array:
+        """写入一个平台的紧凑记录（见 ParseCache.game_records），返回各记录的行号
+        
+        reuse 为重新加载前平台的行：文件名相同的记录写回原来的行（仍被引用的视图随之看到新的内容），
+        其余记录追加为新行，重复加载同一平台时表不会增长。
+        """
+        free: Dict[str, List[int]] = {}
+        files = self.files
+        for i in reversed(reuse):
+            free.setdefault(files[i], []).append(i)
+        
+        pid = self.platform_id(platform_path.name, platform_path)
+        sid = self.source_id(source)
+        rows = array('I')
+        for record in records:
+            reusable = free.get(record[1])
+            if reusable:
+                row = reusable.pop()
+                self._write_record(row, pid, sid, record)
+            else:
+                row = len(self.platform_ids)
+                self._append_record(pid, sid, record)
+            rows.append(row)
+        self.version += 1
+        return rows
+    
+    def _append_record(self, pid: int, sid: int, record: tuple):
+        game, file, sort_by, developer, description, extra, start, end = record
+        row = len(self.platform_ids)
+        self.platform_ids.append(pid)
+        self.games.append(game)
+        self.files.append(file)
+        self.sort_bys.append(sort_by)
+        self.developers.append(developer)
+        if description is None:
+            self.source_ids.append(sid)
+            self.block_starts.append(start)
+            self.block_ends.append(end)
+        else:
+            self.source_ids.append(0)
+            self.block_starts.append(0)
+            self.block_ends.append(0)
+            if description:
+                self.descriptions[row] = description
+        if extra:
+            self.extra_fields[row] = extra
+    
+    def _write_record(self, row: int, pid: int, sid: int, record: tuple):
+        """记录写回已有的行，只改写值有变化的字符串列"""
+        game, file, sort_by, developer, description, extra, start, end = record
+        self.platform_ids[row] = pid
+        for column, value in ((self.games, game), (self.files, file), (self.sort_bys, sort_by)):
+            if column[row] != value:
+                column[row] = value
+        self.developers[row] = developer
+        if description is None:
+            self.source_ids[row] = sid
+            self.block_starts[row] = start
+            self.block_ends[row] = end
+        else:
+            self.source_ids[row] = 0
+            self.block_starts[row] = self.block_ends[row] = 0
+        if description:
+            self.descriptions[row] = description
+        else:
+            self.descriptions.pop(row, None)
+        if extra:
+            self.extra_fields[row] = extra
+        else:
+            self.extra_fields.pop(row, None)
+    
+    def append_game(self, game: Game) -> int:
+        """复制一个 Game 到表中，返回行号"""
+        row = len(self)
+        self.platform_ids.append(self.platform_id(game.platform, game.platform_path))
+        self.games.append(game.game)
+        self.files.append(game.file)
+        self.sort_bys.append(game.sort_by)
+        self.developers.append(game.developer)
+        self.source_ids.append(0)
+        self.block_starts.append(0)
+        self.block_ends.append(0)
+        self.version += 1
+        row_view = GameRow(self, row)
+        row_view._block = game._block
+        row_view._description = game._description
+        if game._extra_fields is not None:
+            row_view._extra_fields = dict(game._extra_fields)
+        return row
+    
+    def row(self, index: int) -> 'GameRow':
+        return GameRow(self, index)
+    
+    def search_ids(self, text: str) -> bytearray:
+        """名称、平台或开发者包含 text（不区分大小写）的行标记，第 i 字节为 1 表示第 i 行匹配
+        
+        首次搜索时把各行的搜索文本拼接为一个字符串，之后每次搜索只是在其上做子串查找，
+        每行找到一次匹配后直接跳到下一行。
+        """
+        text = text.lower()
+        index = self._search_index
+        if index is None or index[0] != self.version:
+            # 逐行转小写后再计算偏移（个别字符转小写后长度会变化）
+            parts = []
+            names = [platform.name for platform in self.platforms]
+            for i in range(len(self)):
+                parts.append(f"{self.games[i]}\x1f{names[self.platform_ids[i]]}\x1f{self.developers[i]}".lower())
+            starts = array('I')
+            pos = 0
+            for part in parts:
+                starts.append(pos)
+                pos += len(part) + 1
+            starts.append(pos)  # 哨兵：最后一行之后
+            index = self._search_index = (self.version, '\n'.join(parts), starts)
+        
+        _, haystack, starts = index
+        matched = bytearray(len(starts) - 1)
+        find = haystack.find
+        pos = find(text)
+        while pos >= 0:
+            row = bisect_right(starts, pos) - 1
+            matched[row] = 1
+            pos = find(text, starts[row + 1])
+        return matched
+    
+    def asset_masks(self) -> array:
+        """各行的媒体资源位掩码（位定义见 core.platform.ASSET_BITS）
+        
+        掩码取自平台 media 索引中预先计算的子目录掩码，不访问磁盘；
+        只重新计算表或 media 索引有修改的平台的行。
+        """
+        masks = self._asset_masks
+        if len(masks) < len(self):
+            masks.extend(bytes(len(self) - len(masks)))
+        stale = set()
+        for platform in self.platforms:
+            state = (self.version, platform.media_version)
+            if self._asset_state.get(platform.id) != state:
+                self._asset_state[platform.id] = state
+                stale.add(platform.id)
+        if stale:
+            platforms = self.platforms
+            games = self.games
+            files = self.files
+            for i, pid in enumerate(self.platform_ids):
+                if pid in stale:
+                    masks[i] = platforms[pid].asset_mask(media_key(files[i], games[i]))
+        return masks
+    
+    def set_value(self, column: str, index: int, value):
+        getattr(self, column)[index] = value
+        self.version += 1
+
+
+def _column_property(column: str, doc: str) -> property:
+    def fget(self):
+        return getattr(self.table, column)[self.index]
+    
+    def fset(self, value):
+        self.table.set_value(column, self.index, value or "")
+    
+    return property(fget, fset, doc=doc)
+
+
+class GameRow(Game):
+    """GameTable 中一行的视图，接口与 Game 相同，读写直接作用于表中的列
+    
+    视图按需创建，同一行的不同视图相等且哈希相同。
+    """
+    
+    __slots__ = ('table', 'index')
+    
+    def __init__(self, table: GameTable, index: int):
+        self.table = table
+        self.index = index
+    
+    game = _column_property('games', "游戏名称")
+    file = _column_property('files', "游戏文件名")
+    sort_by = _column_property('sort_bys', "排序")
+    developer = _column_property('developers', "开发者")
+    
+    def _platform_entity(self) -> Platform:
+        return self.table.platforms[self.table.platform_ids[self.index]]
+    
+    @property
+    def platform(self) -> str:
+        return self._platform_entity().name
+    
+    @platform.setter
+    def platform(self, value: str):
+        table = self.table
+        table.platform_ids[self.index] = table.platform_id(value or "", self.platform_path)
+        table.version += 1
+    
+    @property
+    def platform_path(self) -> Optional[Path]:
+        return self._platform_entity().path
+    
+    @platform_path.setter
+    def platform_path(self, value: Optional[Path]):
+        table = self.table
+        table.platform_ids[self.index] = table.platform_id(self.platform, value)
+    
+    @property
+    def _description(self) -> Optional[str]:
+        table = self.table
+        value = table.descriptions.get(self.index)
+        if value is None:
+            return None if table.source_ids[self.index] else ""
+        return value
+    
+    @_description.setter
+    def _description(self, value: Optional[str]):
+        if value is None:
+            self.table.descriptions.pop(self.index, None)
+        else:
+            self.table.descriptions[self.index] = value
+    
+    @property
+    def _extra_fields(self) -> Optional[Dict[str, str]]:
+        return self.table.extra_fields.get(self.index)
+    
+    @_extra_fields.setter
+    def _extra_fields(self, value: Optional[Dict[str, str]]):
+        if value is None:
+            self.table.extra_fields.pop(self.index, None)
+        else:
+            self.table.extra_fields[self.index] = value
+    
+    @property
+    def _block(self) -> Optional[Tuple[MetadataSource, int, int]]:
+        table = self.table
+        sid = table.source_ids[self.index]
+        if not sid:
+            return None
+        return table.sources[sid], table.block_starts[self.index], table.block_ends[self.index]
+    
+    @_block.setter
+    def _block(self, value: Optional[Tuple[MetadataSource, int, int]]):
+        table = self.table
+        i = self.index
+        if value is None:
+            table.source_ids[i] = 0
+            table.block_starts[i] = table.block_ends[i] = 0
+        else:
+            source, start, end = value
+            table.source_ids[i] = table.source_id(source)
+            table.block_starts[i] = start
+            table.block_ends[i] = end
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, GameRow) and other.index == self.index and other.table is self.table
+    
+    def __hash__(self) -> int:
+        return hash((id(self.table), self.index))
+    
+    def __repr__(self) -> str:
+        return f"GameRow({self.index}, {self.game!r})"
+
+
+class GameRows:
+    """GameTable 中若干行组成的序列，用法与游戏列表相同（只存行号，按需生成行视图）"""
+    
+    __slots__ = ('table', 'ids', '_lookup')
+    
+    def __init__(self, table: GameTable, ids: Iterable[int] = ()):
+        self.table = table
+        self.ids = ids if isinstance(ids, array) else array('I', ids)
+        # 按文件名/名称查找位置的索引：(表修改计数, {file: 位置}, {game: 位置})
+        self._lookup: Optional[tuple] = None
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    def __iter__(self) -> Iterator[GameRow]:
+        table = self.table
+        for i in self.ids:
+            yield GameRow(table, i)
+    
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return GameRows(self.table, self.ids[key])
+        return GameRow(self.table, self.ids[key])
+    
+    def __setitem__(self, position: int, game: Game):
+        self.ids[position] = self._row_id(game)
+        self._lookup = None
+    
+    def __contains__(self, game) -> bool:
+        if isinstance(game, GameRow) and game.table is self.table:
+            return game.index in self.ids
+        return False
+    
+    def __add__(self, other: 'GameRows') -> 'GameRows':
+        return GameRows(self.table, self.ids + other.ids)
+    
+    def _row_id(self, game: Game) -> int:
+        if isinstance(game, GameRow) and game.table is self.table:
+            return game.index
+        return self.table.append_game(game)
+    
+    def append(self, game: Game):
+        version = self.table.version
+        row = self._row_id(game)
+        self.ids.append(row)
+        # 追加行不影响已有行，查找索引增量更新
+        lookup = self._lookup
+        if lookup is not None and lookup[0] == version:
+            position = len(self.ids) - 1
+            lookup[1].setdefault(self.table.files[row], position)
+            lookup[2].setdefault(self.table.games[row], position)
+            self._lookup = (self.table.version, lookup[1], lookup[2])
+    
+    def remove(self, game: Game):
+        """移除第一个等于 game 的行"""
+        if not (isinstance(game, GameRow) and game.table is self.table):
+            raise ValueError("游戏不在列表中")
+        self.ids.remove(game.index)
+        self._lookup = None
+    
+    def remove_rows(self, games: Iterable[Game]):
+        """移除多个行（只遍历一次）"""
+        ids = {game.index for game in games if isinstance(game, GameRow) and game.table is self.table}
+        if ids:
+            self.ids = array('I', [i for i in self.ids if i not in ids])
+            self._lookup = None
+    
+    def find(self, file: str, name: str) -> int:
+        """第一个文件名或名称相同的游戏的位置，找不到时返回 -1"""
+        lookup = self._lookup
+        if lookup is None or lookup[0] != self.table.version:
+            files: Dict[str, int] = {}
+            names: Dict[str, int] = {}
+            table = self.table
+            for position, i in enumerate(self.ids):
+                files.setdefault(table.files[i], position)
+                names.setdefault(table.games[i], position)
+            lookup = self._lookup = (table.version, files, names)
+        positions = [p for p in (lookup[1].get(file), lookup[2].get(name)) if p is not None]
+        return min(positions) if positions else -1
+    
+    def filter(self, text: str = "", platform: Optional[str] = None, assets: int = 0) -> 'GameRows':
+        """按平台、关键字（匹配名称、平台、开发者，不区分大小写）和必须具有的媒体资源筛选"""
+        ids = self.ids
+        table = self.table
+        if platform:
+            codes = {p.id for p in table.platforms if p.name == platform}
+            platform_ids = table.platform_ids
+            ids = array('I', [i for i in ids if platform_ids[i] in codes])
+        if text:
+            matched = table.search_ids(text)
+            ids = array('I', [i for i in ids if matched[i]])
+        if assets:
+            return GameRows(table, ids).filter_assets(assets)
+        return GameRows(table, ids)
+
+    def filter_assets(self, include: int = 0, exclude: int = 0) -> 'GameRows':
+        """具有 include 中全部媒体资源、且不具有 exclude 中任何资源的游戏"""
+        masks = self.table.asset_masks()
+        return GameRows(self.table, array('I', [i for i in self.ids
+                                                if masks[i] & include == include and not masks[i] & exclude]))
@@ -35,6 +35,11 @@ class Translator:
 
             "menu_extract_metadata": "提取元数据(&E)",
             "menu_merge_metadata": "整合元数据(&M)",
+            "menu_undo_removal": "撤销上次删除(&U)",
+            "undo_removal_title": "撤销删除",
+            "undo_removal_msg": "从回收站恢复上次删除的游戏 ({name})?",
+            "undo_removal_done": "已恢复 {count} 个游戏",
+            "msg_trash_empty": "回收站中没有可恢复的游戏",
 
 
 
@@ -55,6 +60,9 @@ class Translator:
             "status_no_project": "请创建或打开项目",
             "status_tasks": "任务: {count}",
             "status_project": "项目: {name}",
+            "status_loading": "正在加载平台 ({done}/{total}): {platform}",
+            "status_missing_roms": "缺失ROM: {count}",
+            "status_disk_usage": "选中: {selected} | 任务: {tasks}",
             "view_label": "当前视图: ",
             "view_source": "来源目录",
             "view_project": "收藏目录",
@@ -68,12 +76,23 @@ class Translator:
             "platform_label": "平台:",
             "all_platforms": "全部平台",
             "search_placeholder": "输入游戏名称、平台或开发者...",
+            "assets_label": "媒体:",
+            "assets_tooltip": "只显示具有所选媒体资源的游戏",
+            "asset_logo": "Logo",
+            "asset_boxFront": "封面",
+            "asset_boxBack": "背面",
+            "asset_screenshot": "截图",
+            "asset_marquee": "横幅",
+            "asset_video": "视频",
             "game_count_label": "游戏数量: {total} | 已选择: {selected}",
             "pagination_label": "分页: {current}/{total_pages} | 显示 {start}-{end} / {total}",
             "prev_page": "上一页",
             "next_page": "下一页",
             "confirm_exec_title": "确认执行",
             "confirm_exec_msg": "即将执行以下任务:\n\n添加: {add} 个\n删除: {remove} 个\n更新: {update} 个\n\n确定要执行吗?",
+            "resume_exec_title": "恢复执行",
+            "resume_exec_msg": "上次执行（{time}）未完成:\n\n未完成的任务: {count} 个\n未复制完成的文件: {partial} 个\n\n是否恢复执行？已完成的复制会被跳过。\n选择“否”将放弃并删除未复制完成的文件。",
+            "resume_discarded": "已放弃未完成的执行，删除 {count} 个未复制完成的文件",
             "project_saved": "项目已保存",
             "error": "错误",
             "info": "提示",
@@ -89,9 +108,26 @@ class Translator:
             "dialog_select_source": "选择来源ROM根目录",
             "dialog_select_project": "选择收藏目录",
             "dialog_save_project": "保存项目文件",
+            "dialog_deploy_mode": "文件部署方式:",
+            "dialog_deploy_mode_tooltip": "添加游戏时放置文件的方式，链接或克隆不可用时（如跨磁盘）自动改为复制",
+            "deploy_copy": "复制",
+            "deploy_hardlink": "硬链接",
+            "deploy_reflink": "克隆 (reflink)",
+            "deploy_symlink": "符号链接",
+            "dialog_sync_compare": "跳过未变化的文件:",
+            "dialog_trash_retention": "回收站保留大小:",
+            "dialog_trash_retention_tooltip": "删除的游戏先移入收藏目录下的回收站，可撤销；超出此大小时从最早删除的开始永久删除",
+            "dialog_source_device_workers": "来源磁盘并发复制数:",
+            "dialog_target_device_workers": "收藏磁盘并发复制数:",
+            "dialog_device_workers_tooltip": "同一磁盘上同时复制的文件数，机械硬盘、U 盘等设为 1 通常更快",
+            "dialog_sync_compare_tooltip": "目标位置已有同名文件时，与来源比较相同则不再复制",
+            "sync_compare_mtime": "比较大小和修改时间",
+            "sync_compare_content": "比较文件内容（较慢）",
+            "sync_compare_none": "不比较，总是复制",
 
             "msg_load_failed": "加载项目失败",
             "msg_init_failed": "初始化失败: {error}",
+            "msg_platform_load_errors": "以下平台加载失败，已跳过:\n{errors}",
             "msg_no_pending_tasks": "没有待执行的任务",
             "batch_add_input_title": "批量添加",
             "batch_add_input_label": "请输入游戏名称列表(每行一个):",
@@ -136,6 +172,31 @@ class Translator:
             "log_starting": "正在开始任务执行...",
             "log_finished": "任务执行完成",
             "log_failed": "任务执行失败: {error}",
+            "log_progress": "已处理 {done} / {total}，平均 {rate}/s，剩余 {eta}",
+            "log_paused": "（已暂停）",
+            "log_cancelling": "正在取消，等待当前数据块完成...",
+            "log_cancelled": "任务执行已取消，{count} 个任务保留在任务队列中",
+            "btn_pause": "暂停",
+            "btn_resume": "继续",
+            "btn_stop": "停止",
+            "btn_execute": "执行",
+            "plan_computing": "正在生成执行计划...",
+            "plan_failed": "生成执行计划失败: {error}",
+            "plan_tasks": "任务: 添加 {add} 个，删除 {remove} 个，更新 {update} 个",
+            "plan_copy": "复制 {count} 个文件，共 {size}（覆盖 {overwrite} 个，未变化跳过 {unchanged} 个）",
+            "plan_delete": "删除 {count} 项，共 {size}",
+            "plan_space": "目标磁盘需要 {required}，剩余 {free}",
+            "plan_space_unknown": "目标磁盘需要 {required}，无法获取剩余空间",
+            "plan_no_space": "目标磁盘剩余空间不足，无法执行",
+            "plan_issues": "需要注意的问题 ({count}):",
+            "plan_col_operation": "任务 / 操作",
+            "plan_col_target": "目标",
+            "plan_col_size": "大小",
+            "plan_col_note": "说明",
+            "plan_op_copy": "复制",
+            "plan_op_delete": "删除",
+            "plan_overwrite": "覆盖",
+            "plan_unchanged": "未变化，跳过",
             "warning": "警告",
             "success": "成功"
         },
@@ -154,6 +215,11 @@ class Translator:
             "menu_tools": "Tools(&T)",
             "menu_extract_metadata": "Extract Metadata(&E)",
             "menu_merge_metadata": "Merge Metadata(&M)",
+            "menu_undo_removal": "Undo Last Removal(&U)",
+            "undo_removal_title": "Undo Removal",
+            "undo_removal_msg": "Restore the games removed last time ({name}) from the trash?",
+            "undo_removal_done": "{count} games restored",
+            "msg_trash_empty": "There are no removed games to restore",
             "menu_theme": "Theme",
 
             "menu_settings": "Settings(S)",
@@ -182,6 +248,9 @@ class Translator:
             "status_no_project": "Please create or open a project",
             "status_tasks": "Tasks: {count}",
             "status_project": "Project: {name}",
+            "status_loading": "Loading platforms ({done}/{total}): {platform}",
+            "status_missing_roms": "Missing ROMs: {count}",
+            "status_disk_usage": "Selected: {selected} | Tasks: {tasks}",
             "view_label": "Current View: ",
             "view_source": "Source Directory",
             "view_project": "Favorites",
@@ -195,12 +264,23 @@ class Translator:
             "platform_label": "Platform:",
             "all_platforms": "All Platforms",
             "search_placeholder": "Search by name, platform, or developer...",
+            "assets_label": "Media:",
+            "assets_tooltip": "Only show games that have the selected media assets",
+            "asset_logo": "Logo",
+            "asset_boxFront": "Box Front",
+            "asset_boxBack": "Box Back",
+            "asset_screenshot": "Screenshot",
+            "asset_marquee": "Marquee",
+            "asset_video": "Video",
             "game_count_label": "Games: {total} | Selected: {selected}",
             "pagination_label": "Page: {current}/{total_pages} | Showing {start}-{end} of {total}",
             "prev_page": "Previous",
             "next_page": "Next",
             "confirm_exec_title": "Confirm Execution",
             "confirm_exec_msg": "The following tasks will be executed:\n\nAdd: {add}\nRemove: {remove}\nUpdate: {update}\n\nDo you want to continue?",
+            "resume_exec_title": "Resume Execution",
+            "resume_exec_msg": "The last execution ({time}) did not finish:\n\nUnfinished tasks: {count}\nPartially copied files: {partial}\n\nResume execution? Completed copies will be skipped.\nChoose \"No\" to discard it and delete partially copied files.",
+            "resume_discarded": "Discarded the unfinished execution, deleted {count} partially copied files",
             "project_saved": "Project saved",
             "error": "Error",
             "info": "Info",
@@ -216,9 +296,26 @@ class Translator:
             "dialog_select_source": "Select Source ROM Root Directory",
             "dialog_select_project": "Select Favorites Directory",
             "dialog_save_project": "Save Project File",
+            "dialog_deploy_mode": "File Deployment:",
+            "dialog_deploy_mode_tooltip": "How files are placed when adding games; falls back to copying when linking or cloning is unavailable (e.g. across drives)",
+            "deploy_copy": "Copy",
+            "deploy_hardlink": "Hard link",
+            "deploy_reflink": "Clone (reflink)",
+            "deploy_symlink": "Symbolic link",
+            "dialog_sync_compare": "Skip Unchanged Files:",
+            "dialog_trash_retention": "Trash Retention:",
+            "dialog_trash_retention_tooltip": "Removed games are moved to a trash folder inside the favorites directory and can be restored; the oldest are deleted permanently beyond this size",
+            "dialog_source_device_workers": "Source Disk Copy Threads:",
+            "dialog_target_device_workers": "Favorites Disk Copy Threads:",
+            "dialog_device_workers_tooltip": "Number of files copied at the same time on one disk; 1 is usually faster for hard drives and USB sticks",
+            "dialog_sync_compare_tooltip": "When a file already exists at the destination, skip copying it if it matches the source",
+            "sync_compare_mtime": "Compare size and modification time",
+            "sync_compare_content": "Compare file contents (slower)",
+            "sync_compare_none": "Don't compare, always copy",
 
             "msg_load_failed": "Failed to load project",
             "msg_init_failed": "Initialization failed: {error}",
+            "msg_platform_load_errors": "The following platforms failed to load and were skipped:\n{errors}",
             "msg_no_pending_tasks": "No pending tasks",
             "batch_add_input_title": "Batch Add",
             "batch_add_input_label": "Enter game names (one per line):",
@@ -263,6 +360,31 @@ class Translator:
             "log_starting": "Starting execution...",
             "log_finished": "Execution finished",
             "log_failed": "Execution failed: {error}",
+            "log_progress": "Processed {done} / {total}, average {rate}/s, {eta} remaining",
+            "log_paused": "(paused)",
+            "log_cancelling": "Cancelling, waiting for the current chunk to finish...",
+            "log_cancelled": "Execution cancelled, {count} tasks kept in the queue",
+            "btn_pause": "Pause",
+            "btn_resume": "Resume",
+            "btn_stop": "Stop",
+            "btn_execute": "Execute",
+            "plan_computing": "Building execution plan...",
+            "plan_failed": "Failed to build execution plan: {error}",
+            "plan_tasks": "Tasks: add {add}, remove {remove}, update {update}",
+            "plan_copy": "Copy {count} files, {size} in total ({overwrite} overwritten, {unchanged} unchanged and skipped)",
+            "plan_delete": "Delete {count} items, {size} in total",
+            "plan_space": "Destination needs {required}, {free} free",
+            "plan_space_unknown": "Destination needs {required}, free space unknown",
+            "plan_no_space": "Not enough free space on the destination drive",
+            "plan_issues": "Issues to review ({count}):",
+            "plan_col_operation": "Task / Operation",
+            "plan_col_target": "Target",
+            "plan_col_size": "Size",
+            "plan_col_note": "Note",
+            "plan_op_copy": "Copy",
+            "plan_op_delete": "Delete",
+            "plan_overwrite": "Overwrite",
+            "plan_unchanged": "Unchanged, skipped",
             "warning": "Warning",
             "success": "Success"
         }
@@ -0,0 +1,116 @@
+"""
+游戏库文件变化检测模块
+"""
+
+import os
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+
+
+class LibraryChanges:
+    """一次检测到的变化（均为平台名集合）"""
+    
+    def __init__(self):
+        self.added: Set[str] = set()  # 新出现的平台
+        self.removed: Set[str] = set()  # 已删除的平台
+        self.metadata: Set[str] = set()  # 元数据文件变化，需要重新加载
+        self.roms: Set[str] = set()  # 平台目录中的条目增删（ROM 文件）
+        self.media: Set[str] = set()  # media 目录中的子目录增删
+    
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.metadata or self.roms or self.media)
+    
+    def __repr__(self) -> str:
+        return (f"LibraryChanges(added={sorted(self.added)}, removed={sorted(self.removed)}, "
+                f"metadata={sorted(self.metadata)}, roms={sorted(self.roms)}, media={sorted(self.media)})")
+
+
+class LibraryWatcher:
+    """按修改时间检测 Roms 根目录的变化（轮询）
+    
+    每次检测只 stat 每个平台目录、元数据文件和 media 目录，开销与平台数成正比，
+    与游戏数无关。指定目录发现（PlatformDiscovery）时候选平台取自其结果，否则扫描根目录。
+    
+    目录修改时间只在直接子项增删时变化，因此 ROM 文件和 media 子目录的增删可以被检测到，
+    media 子目录内的文件变化由平台的 media 索引增量刷新处理。
+    """
+    
+    def __init__(self, roms_root: Path, discovery=None):
+        self.roms_root = Path(roms_root)
+        self.discovery = discovery
+        # 平台名 -> (元数据文件 (大小, mtime_ns), 平台目录 mtime_ns, media 目录 mtime_ns)
+        self._snapshot: Dict[str, tuple] = {}
+    
+    def reset(self):
+        """以当前状态为基准（加载全部平台之前调用，加载期间的变化会在下次检测时发现）"""
+        self._snapshot = self.scan()
+    
+    def platform_names(self) -> List[str]:
+        """基准状态中的平台名（按名称排序）"""
+        return sorted(self._snapshot)
+    
+    def scan(self) -> Dict[str, tuple]:
+        """当前各平台目录的状态，只包含同时有元数据文件和 media 目录的平台目录"""
+        snapshot = {}
+        if self.discovery is not None:
+            for name in self.discovery.platform_names():
+                state = self._platform_state(os.path.join(self.roms_root, name))
+                if state is not None:
+                    snapshot[name] = state
+            return snapshot
+        try:
+            with os.scandir(self.roms_root) as entries:
+                for entry in entries:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if not entry.is_dir():
+                            continue
+                    except OSError:
+                        continue
+                    state = self._platform_state(entry.path)
+                    if state is not None:
+                        snapshot[entry.name] = state
+        except OSError:
+            pass
+        return snapshot
+    
+    @staticmethod
+    def _platform_state(path: str) -> Optional[tuple]:
+        try:
+            meta = os.stat(os.path.join(path, "metadata.pegasus.txt"))
+            media = os.stat(os.path.join(path, "media"))
+            directory = os.stat(path)
+        except OSError:
+            return None
+        return (meta.st_size, meta.st_mtime_ns), directory.st_mtime_ns, media.st_mtime_ns
+    
+    def poll(self) -> LibraryChanges:
+        """与上次检测（或 reset）时的状态对比，返回变化并更新基准"""
+        current = self.scan()
+        changes = LibraryChanges()
+        for name, state in current.items():
+            previous = self._snapshot.get(name)
+            if previous is None:
+                changes.added.add(name)
+                continue
+            if state[0] != previous[0]:
+                changes.metadata.add(name)
+            if state[1] != previous[1]:
+                changes.roms.add(name)
+            if state[2] != previous[2]:
+                changes.media.add(name)
+        changes.removed = set(self._snapshot) - set(current)
+        self._snapshot = current
+        return changes
+    
+    def watched_paths(self) -> Tuple[list, list]:
+        """需要监视的 (目录, 文件) 列表，供 QFileSystemWatcher 使用"""
+        directories = [str(self.roms_root)]
+        files = []
+        for name in self._snapshot:
+            platform_path = self.roms_root / name
+            directories.append(str(platform_path))
+            directories.append(str(platform_path / "media"))
+            files.append(str(platform_path / "metadata.pegasus.txt"))
+        return directories, files
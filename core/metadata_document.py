@@ -0,0 +1,488 @@
+"""
+元数据文档模型：无损读写 metadata.pegasus.txt
+"""
+
+import io
+import os
+import re
+import mmap
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+from core.metadata_parser import Game, MetadataParser, MetadataSource, _FIELD_RE, _GAME_FIELDS, _BLANK_LINES
+
+
+# 块状态
+BLOCK_CLEAN = 0      # 未修改，写入时复制原始字节
+BLOCK_DIRTY = 1      # 已修改，写入时重新生成改动的字段
+BLOCK_REMOVED = 2    # 已删除
+
+# 生成字段时的顺序（其余字段排在之后）
+_FIELD_ORDER = ('game', 'file', 'sort-by', 'developer', 'description')
+# 行尾（\r\n 也以 \n 结尾）
+_LINE_ENDS = (b'\n', b'\r')
+# 沿用文件中第一个换行符（\n、\r\n 或单独的 \r）
+_NEWLINE_RE = re.compile(rb'\r\n|\r|\n')
+
+
+class DocumentBlock:
+    """文档中的一个游戏块"""
+    
+    __slots__ = ('start', 'end', 'fields', 'state', 'game', 'native')
+    
+    def __init__(self, start: int, end: int, fields: Dict[str, str]):
+        self.start = start  # 块在原始文件中的字节区间 [start, end)
+        self.end = end
+        self.fields = fields  # 扫描时解码的字段（game/file/sort-by/developer）
+        self.state = BLOCK_CLEAN
+        self.game: Optional[Game] = None  # 修改后的游戏
+        self.native = False  # game 是否正是从本块解析得到（未解码的懒加载字段视为未修改）
+    
+    @property
+    def key(self) -> Tuple[str, str]:
+        return self.fields.get('game', ""), MetadataParser._unquote_file(self.fields.get('file', ""))
+
+
+class _SourceReader:
+    """读取追加游戏的来源块：每个来源文件只打开并映射一次，用完后 close()
+    
+    来源文件已变化或游戏没有块区间时按 (game, file) 定位游戏块，
+    索引存入 indexes（按文件指纹区分），可跨多个读取器复用。
+    """
+    
+    def __init__(self, indexes: Dict[Path, tuple]):
+        self.indexes = indexes  # 路径 -> (size, mtime_ns, {(game, file): (start, end)})
+        self._files: Dict[Path, Optional[Tuple[mmap.mmap, int, int]]] = {}
+    
+    def read_block(self, path: Path, game_key: Tuple[str, str],
+                   block: Optional[Tuple[int, int, int, int]] = None) -> Optional[bytes]:
+        """读取游戏块原始字节，block 为 (start, end, size, mtime_ns)；找不到时返回 None"""
+        opened = self._open(path)
+        if opened is None:
+            return None
+        mm, size, mtime_ns = opened
+        if block is not None and block[2:] == (size, mtime_ns):
+            return mm[block[0]:block[1]]
+        
+        cached = self.indexes.get(path)
+        if cached is None or cached[:2] != (size, mtime_ns):
+            mm.seek(0)
+            cached = self.indexes[path] = (size, mtime_ns, MetadataSource.index_blocks(mm))
+        span = cached[2].get(game_key)
+        return mm[span[0]:span[1]] if span else None
+    
+    def _open(self, path: Path) -> Optional[Tuple[mmap.mmap, int, int]]:
+        if path not in self._files:
+            try:
+                with open(path, 'rb') as f:
+                    st = os.fstat(f.fileno())
+                    mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                self._files[path] = (mm, st.st_size, st.st_mtime_ns)
+            except (OSError, ValueError):
+                self._files[path] = None
+        return self._files[path]
+    
+    def close(self):
+        for opened in self._files.values():
+            if opened is not None:
+                opened[0].close()
+        self._files.clear()
+
+
+class MetadataDocument:
+    """metadata.pegasus.txt 的无损文档模型
+    
+    保留文件的原始字节：Header、各游戏块以及块之间的注释和空行。
+    只有标记为修改的块会重新生成，且只重写值有变化的字段，
+    未知字段（assets.*、genre、x-* 等）和原有格式保持不变；
+    其余块直接复制原始字节，写入开销与修改的游戏数量成正比。
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.data = b''  # 原始文件内容
+        self.size = 0
+        self.mtime_ns = 0
+        self.newline = os.linesep.encode('ascii')  # 新文件沿用文本模式写入时的换行符
+        self.header = ""  # 原始 Header 文本
+        self.header_end = 0  # Header 区域结束偏移（第一个游戏块之前的全部内容）
+        self.blocks: List[DocumentBlock] = []
+        self.appended: List[Game] = []
+        self._new_header: Optional[str] = None
+        self._by_start: Dict[int, DocumentBlock] = {}
+        self._by_key: Dict[Tuple[str, str], List[DocumentBlock]] = {}
+        self._by_file: Dict[str, List[DocumentBlock]] = {}
+        self._source_indexes: Dict[Path, tuple] = {}  # 追加游戏来源文件的 (game, file) 索引
+    
+    @classmethod
+    def load(cls, path: Path) -> 'MetadataDocument':
+        """读取元数据文件，文件不存在时返回空文档"""
+        doc = cls(path)
+        try:
+            with open(doc.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                data = f.read()
+        except FileNotFoundError:
+            return doc
+        except Exception as e:
+            raise Exception(f"读取元数据文件失败: {e}")
+        
+        doc.data = data
+        doc.size = st.st_size
+        doc.mtime_ns = st.st_mtime_ns
+        
+        eol = _NEWLINE_RE.search(data)
+        if eol:
+            doc.newline = eol.group()
+        
+        header, chunks = MetadataParser._read_header(io.BytesIO(data))
+        doc.header = MetadataParser._decode_header(header)
+        doc.header_end = len(header)
+        for start, end, fields in MetadataParser._iter_field_blocks(
+                chunks, len(header), MetadataParser.EAGER_FIELDS):
+            if fields.get('game') and fields.get('file'):
+                doc._add_block(DocumentBlock(start, end, fields))
+        return doc
+    
+    def _add_block(self, block: DocumentBlock):
+        self.blocks.append(block)
+        self._by_start[block.start] = block
+        game_key = block.key
+        self._by_key.setdefault(game_key, []).append(block)
+        self._by_file.setdefault(game_key[1], []).append(block)
+    
+    @property
+    def is_dirty(self) -> bool:
+        """是否有待写入的修改"""
+        return (self._new_header is not None or bool(self.appended)
+                or any(b.state != BLOCK_CLEAN for b in self.blocks))
+    
+    def find_block(self, game: Game) -> Optional[DocumentBlock]:
+        """查找游戏对应的块，找不到时返回 None"""
+        block, _ = self._lookup(game)
+        return block
+    
+    def _lookup(self, game: Game, taken: Optional[set] = None) -> Tuple[Optional[DocumentBlock], bool]:
+        """查找游戏对应的块，返回 (块, 游戏是否正是从该块解析得到)
+        
+        优先按游戏记录的块区间定位（游戏名被修改后仍能找到），
+        其次按 (game, file)，最后按 file。
+        """
+        if game._block and self._is_current_source(game._block[0]):
+            block = self._by_start.get(game._block[1])
+            if (block is not None and block.end == game._block[2]
+                    and block.state != BLOCK_REMOVED and (taken is None or id(block) not in taken)):
+                return block, True
+        
+        for candidates in (self._by_key.get((game.game, game.file)), self._by_file.get(game.file)):
+            for block in candidates or ():
+                if block.state != BLOCK_REMOVED and (taken is None or id(block) not in taken):
+                    return block, False
+        return None, False
+    
+    def _is_current_source(self, source: MetadataSource) -> bool:
+        """懒加载来源是否正是本文档读取的这一版文件"""
+        if source.size != self.size or source.mtime_ns != self.mtime_ns or not self.data:
+            return False
+        return os.path.normcase(os.path.abspath(source.path)) == os.path.normcase(os.path.abspath(self.path))
+    
+    def set_header(self, header: str):
+        """设置 Header 文本，与原 Header 相同时不视为修改"""
+        header = (header or "").strip()
+        self._new_header = None if header == self.header else header
+    
+    def update_game(self, game: Game) -> bool:
+        """将游戏对应的块标记为已修改，找不到对应块时返回 False"""
+        block, native = self._lookup(game)
+        if block is None:
+            return False
+        block.state = BLOCK_DIRTY
+        block.game = game
+        block.native = native
+        return True
+    
+    def remove_game(self, game: Game) -> bool:
+        """删除游戏对应的块（或尚未写入的追加游戏），找不到时返回 False"""
+        for i, appended in enumerate(self.appended):
+            if appended is game:
+                del self.appended[i]
+                return True
+        block = self.find_block(game)
+        if block is None:
+            return False
+        block.state = BLOCK_REMOVED
+        block.game = None
+        return True
+    
+    def game_bytes(self, game: Game) -> bytes:
+        """游戏当前的块内容（含尚未写入的修改），找不到对应块时按游戏字段生成"""
+        block = None if any(appended is game for appended in self.appended) else self.find_block(game)
+        if block is None:
+            reader = _SourceReader(self._source_indexes)
+            try:
+                return self._render_appended(game, reader)
+            finally:
+                reader.close()
+        raw = self.data[block.start:block.end]
+        if block.state == BLOCK_DIRTY:
+            return self._render_block(raw, block.game, block.native)
+        return raw
+    
+    def append_game(self, game: Game):
+        """在文件末尾追加游戏块"""
+        self.appended.append(game)
+    
+    def replace_game(self, old_game: Game, new_game: Game):
+        """用新游戏替换已有游戏，保持其在文件中的位置；找不到旧游戏时追加"""
+        for i, appended in enumerate(self.appended):
+            if appended is old_game:
+                self.appended[i] = new_game
+                return
+        block = self.find_block(old_game)
+        if block is None:
+            self.appended.append(new_game)
+            return
+        raw = self.data[block.start:block.end]
+        if self._render_block(raw, new_game, False) == raw:
+            # 新游戏生成的块与原块相同，写入时直接复制原始字节
+            block.state = BLOCK_CLEAN
+            block.game = None
+            block.native = False
+            return
+        block.state = BLOCK_DIRTY
+        block.game = new_game
+        block.native = False
+    
+    def sync_games(self, games: List[Game]):
+        """按给定的游戏列表同步文档
+        
+        列表中没有的块标记为删除，值有变化的块标记为修改，找不到对应块的游戏追加到末尾。
+        已有块保持文件中的原有顺序。
+        """
+        taken = set()
+        self.appended = []
+        for game in games:
+            block, native = self._lookup(game, taken)
+            if block is None:
+                self.appended.append(game)
+                continue
+            taken.add(id(block))
+            if self._game_differs(block, game, native):
+                block.state = BLOCK_DIRTY
+                block.game = game
+                block.native = native
+            else:
+                block.state = BLOCK_CLEAN
+                block.game = None
+        
+        for block in self.blocks:
+            if id(block) not in taken:
+                block.state = BLOCK_REMOVED
+                block.game = None
+    
+    def _game_differs(self, block: DocumentBlock, game: Game, native: bool) -> bool:
+        """游戏的字段值与块中的是否不同"""
+        fields = block.fields
+        if (game.game != fields.get('game', "")
+                or game.file != MetadataParser._unquote_file(fields.get('file', ""))
+                or game.sort_by != fields.get('sort-by', "")
+                or game.developer != fields.get('developer', "")):
+            return True
+        
+        # 从本块懒加载且从未解码的字段不可能被修改过
+        check_description = not (native and game._description is None)
+        check_extra = not (native and game._extra_fields is None)
+        if not check_description and not check_extra:
+            return False
+        
+        all_fields = self._parse_block(self.data[block.start:block.end])
+        if check_description and game.description != all_fields.get('description', ""):
+            return True
+        if check_extra:
+            extra_fields = {k: v for k, v in all_fields.items() if k not in _GAME_FIELDS}
+            if game.extra_fields != extra_fields:
+                return True
+        return False
+    
+    def to_bytes(self) -> bytes:
+        """生成写入内容：未修改的部分复制原始字节，修改的块重新生成"""
+        data = self.data
+        nl = self.newline
+        parts = []
+        pos = 0
+        
+        if self._new_header is not None:
+            if self._new_header:
+                parts.append(self._encode(self._new_header) + nl + nl)
+            pos = self.header_end
+        
+        for block in self.blocks:
+            if block.state == BLOCK_CLEAN:
+                continue
+            parts.append(data[pos:block.start])
+            if block.state == BLOCK_DIRTY:
+                parts.append(self._render_block(data[block.start:block.end], block.game, block.native))
+                pos = block.end
+            else:
+                # 删除块时一并去掉其后的空行
+                pos = block.end
+                while data.startswith(_BLANK_LINES, pos):
+                    pos += 2 if data.startswith(b'\r\n', pos) else 1
+        parts.append(data[pos:])
+        content = b''.join(parts)
+        
+        if self.appended:
+            # 追加的块与前文之间保留一个空行
+            parts = [content]
+            if content and not content.endswith(_LINE_ENDS):
+                parts.append(nl)
+                content += nl
+            if content and not content.endswith((b'\n\n', b'\n\r\n', b'\r\r')):
+                parts.append(nl)
+            reader = _SourceReader(self._source_indexes)
+            try:
+                for i, game in enumerate(self.appended):
+                    if i > 0:
+                        parts.append(nl)
+                    parts.append(self._render_appended(game, reader))
+            finally:
+                reader.close()
+            content = b''.join(parts)
+        
+        return content
+    
+    def save(self, output_file: Optional[Path] = None) -> int:
+        """写入文件（先写临时文件再替换，中途失败不会损坏原文件），返回写入的字节数"""
+        output_file = Path(output_file) if output_file else self.path
+        content = self.to_bytes()
+        output_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = output_file.with_name(output_file.name + ".tmp")
+        try:
+            with open(tmp_file, 'wb') as f:
+                f.write(content)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, output_file)
+        except BaseException:
+            try:
+                tmp_file.unlink()
+            except OSError:
+                pass
+            raise
+        return len(content)
+    
+    def _render_appended(self, game: Game, reader: _SourceReader) -> bytes:
+        """生成追加的游戏块：以来源块原文为基础，保留全部字段与格式（字段名大小写、file 的引号等）
+        
+        懒加载的游戏按记录的块区间读取来源块；非懒加载解析的游戏没有块区间，
+        按 (game, file) 在其平台的元数据文件中查找。都找不到时按游戏字段生成。
+        """
+        raw = None
+        native = False
+        game_key = (game.game, game.file)
+        if game._block:
+            source, start, end = game._block
+            raw = reader.read_block(source.path, game_key, (start, end, source.size, source.mtime_ns))
+            native = raw is not None
+        elif game.platform_path:
+            raw = reader.read_block(Path(game.platform_path) / "metadata.pegasus.txt", game_key)
+        if not raw:
+            return self._render_block(b'', game, False)
+        base = self.newline.join(raw.splitlines())
+        if raw.endswith(_LINE_ENDS):
+            base += self.newline
+        return self._render_block(base, game, native)
+    
+    def _render_block(self, base: bytes, game: Game, native: bool) -> bytes:
+        """以块原文为基础重新生成游戏块，只重写值有变化的字段
+        
+        native=True 表示 game 正是从 base 解析得到，其未解码的懒加载字段视为未修改。
+        """
+        nl = self.newline
+        chunks = self._split_fields(base)
+        
+        # 需要与原文比较的字段及其新值
+        values = {
+            'game': game.game,
+            'file': game.file,
+            'sort-by': game.sort_by,
+            'developer': game.developer,
+        }
+        if not (native and game._description is None):
+            values['description'] = game.description
+        managed_extra = not (native and game._extra_fields is None)
+        if managed_extra:
+            values.update(game.extra_fields)
+        
+        # 每个字段以最后一次出现为准
+        last_chunk = {}
+        for i, (key, _, _) in enumerate(chunks):
+            if key is not None:
+                last_chunk[key] = i
+        
+        out = []
+        for i, (key, name, lines) in enumerate(chunks):
+            if key is None or not (key in values or (managed_extra and key not in _GAME_FIELDS)):
+                out.append(self._terminated(lines))
+                continue
+            value = values.get(key, "")
+            if not value and key not in ('game', 'file'):
+                continue  # 字段被清空或删除
+            if i != last_chunk[key]:
+                out.append(self._terminated(lines))
+                continue
+            old_value = self._chunk_value(lines)
+            if key == 'file':
+                old_value = MetadataParser._unquote_file(old_value)
+            if value == old_value:
+                out.append(self._terminated(lines))
+            else:
+                out.append(self._render_field(name, value))
+        
+        # 原文中没有的字段追加在块末尾
+        extra_keys = [k for k in values if k not in _FIELD_ORDER]
+        for key in list(_FIELD_ORDER) + extra_keys:
+            value = values.get(key)
+            if value and key not in last_chunk:
+                out.append(self._render_field(key.encode('utf-8'), value))
+        
+        return b''.join(out)
+    
+    def _split_fields(self, base: bytes) -> List[Tuple[Optional[str], bytes, List[bytes]]]:
+        """把块原文拆分为字段片段 (小写字段名, 原始字段名, 原始行)，字段之前的行字段名为 None"""
+        chunks = []
+        for raw in base.splitlines(keepends=True):
+            m = _FIELD_RE.match(raw)
+            if m:
+                name = m.group(1)
+                chunks.append((name.decode('ascii').lower(), name, [raw]))
+            elif chunks:
+                chunks[-1][2].append(raw)
+            else:
+                chunks.append((None, b'', [raw]))
+        return chunks
+    
+    @staticmethod
+    def _chunk_value(lines: List[bytes]) -> str:
+        """字段片段的值，与解析时的规则一致"""
+        first = _FIELD_RE.match(lines[0])
+        return MetadataParser._join_value(lines[0][first.end():], lines[1:])
+    
+    def _terminated(self, lines: List[bytes]) -> bytes:
+        """片段原文，保证以换行结尾（文件最后一行可能没有换行）"""
+        text = b''.join(lines)
+        return text if text.endswith(_LINE_ENDS) else text + self.newline
+    
+    def _render_field(self, name: bytes, value: str) -> bytes:
+        """生成字段行，多行值的延续行缩进两个空格"""
+        lines = value.strip().split('\n')
+        text = (self.newline + b'  ').join(line.encode('utf-8') for line in lines)
+        return name + b': ' + text + self.newline
+    
+    def _encode(self, text: str) -> bytes:
+        return text.replace('\n', self.newline.decode('ascii')).encode('utf-8')
+    
+    @staticmethod
+    def _parse_block(data: bytes) -> Dict[str, str]:
+        for _, _, fields in MetadataParser._iter_field_blocks((data,)):
+            return fields
+        return {}
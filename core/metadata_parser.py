@@ -2,80 +2,276 @@
 天马G元数据解析模块（重构版）
 """
 
+import gc
+import os
+import re
+import mmap
 from pathlib import Path
-from typing import List, Dict, Optional, Any
+from itertools import chain
+from typing import List, Dict, Optional, Any, Iterable, Iterator, Tuple, Union
+from core.platform_header import PlatformHeader
+from core.platform import Platform, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, asset_bits
+from core.platform_discovery import scan_directories
+
+
+# 行首字段名，如 "game:"、"sort-by :"、"assets.boxFront:"（按字节匹配，避免逐行解码）
+_FIELD_RE = re.compile(rb'([A-Za-z0-9_-][A-Za-z0-9_.-]*)[ \t\f\v]*:')
+# Header 结束于第一个行首的 game: 字段
+_HEADER_END_RE = re.compile(rb'(?<![^\r\n])game[ \t\f\v]*:', re.IGNORECASE)
+# 字段名可能的首字符
+_KEY_START = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789_-')
+_KEY_START_CHARS = frozenset(chr(c) for c in _KEY_START)
+# 字段名（原始字节）到小写字段名的缓存
+_KEY_NAMES: Dict[bytes, str] = {}
+# 字段行 ": " 之前的文本（如 "sort-by "）到小写字段名的缓存，由逐行状态机遇到字段时填充
+_FIELD_NAMES: Dict[str, str] = {}
+# Game 对象直接持有的字段，其余字段保存在 Game.extra_fields
+_GAME_FIELDS = frozenset({'game', 'file', 'sort-by', 'developer', 'description'})
+# 空行即游戏块分隔符
+_BLANK_LINES = (b'\n', b'\r\n', b'\r')
+# 行尾加空行（数据块在最后一处切开）
+_BLOCK_SEPARATORS = (b'\n\n', b'\r\r', b'\r\n\r\n')
+
+# 游戏块扫描状态
+_BLOCK_IDLE = 0      # 块外（空行之后）
+_BLOCK_FIELDS = 1    # 正在读取字段
+_BLOCK_COMMENT = 2   # 注释块，忽略至下一个空行
+
+
+def _read_chunks(f, chunk_size: int = 1024 * 1024) -> Iterator[bytes]:
+    """分块读取二进制文件"""
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def _split_regions(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """把数据块重新切分为在空行处结束的区域（最后一个区域到数据末尾），游戏块不会跨越区域
+    
+    每块在最后一个空行之后切开，剩余部分与下一块拼接；连续空行或 \\r\\n 被切开时
+    下一区域以换行开头，仍按空行处理。
+    """
+    rest = b''
+    for chunk in chunks:
+        data = rest + chunk if rest else chunk
+        cut = 0
+        for separator in _BLOCK_SEPARATORS:
+            pos = data.rfind(separator)
+            if pos >= 0:
+                cut = max(cut, pos + len(separator))
+        if cut:
+            yield data[:cut]
+            rest = data[cut:]
+        else:
+            rest = data
+    if rest:
+        yield rest
+
+
+class MetadataSource:
+    """元数据文件的按需读取句柄
+    
+    懒加载模式下游戏只记录所在块的字节区间，需要时通过 mmap 读取该区间。
+    读取前校验文件指纹；文件已被修改时重新扫描一次文件，按 (game, file)
+    重新定位游戏块。读取完成即关闭映射，不长期占用文件
+    （避免 Windows 下文件无法被改写）。
+    """
+    
+    def __init__(self, path: Path, size: int, mtime_ns: int):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        # 文件变化后的重定位索引：(size, mtime_ns, {(game, file): (start, end)})
+        self._relocated: Optional[tuple] = None
+    
+    def read_fields(self, start: int, end: int, game_key: Tuple[str, str]) -> Dict[str, str]:
+        """读取并解析单个游戏块的全部字段，无法读取时返回空字典"""
+        data = self.read_block(start, end, game_key)
+        if not data:
+            return {}
+        for _, _, fields in MetadataParser._iter_field_blocks((data,)):
+            return fields
+        return {}
+    
+    def read_block(self, start: int, end: int, game_key: Tuple[str, str]) -> Optional[bytes]:
+        """读取单个游戏块的原始字节，无法读取时返回 None"""
+        data = self._read(start, end, self.size, self.mtime_ns)
+        if data is None:
+            data = self._read_relocated(game_key)
+        return data
+    
+    def _read(self, start: int, end: int, size: int, mtime_ns: int) -> Optional[bytes]:
+        """读取 [start, end) 字节，文件指纹与预期不符时返回 None"""
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                if st.st_size != size or st.st_mtime_ns != mtime_ns:
+                    return None
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    return mm[start:end]
+        except (OSError, ValueError):
+            return None
+    
+    def _read_relocated(self, game_key: Tuple[str, str]) -> Optional[bytes]:
+        """文件已变化：按当前文件内容重建索引后再读取"""
+        for _ in range(2):
+            if self._relocated is None or not self._relocated_is_current():
+                self._relocated = self._build_index()
+                if self._relocated is None:
+                    return None
+            size, mtime_ns, index = self._relocated
+            span = index.get(game_key)
+            if span is None:
+                return None
+            data = self._read(span[0], span[1], size, mtime_ns)
+            if data is not None:
+                return data
+        return None
+    
+    def _relocated_is_current(self) -> bool:
+        try:
+            st = self.path.stat()
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == self._relocated[:2]
+    
+    def _build_index(self) -> Optional[tuple]:
+        """扫描当前文件，建立 (game, file) 到块区间的索引"""
+        try:
+            with open(self.path, 'rb') as f:
+                st = os.fstat(f.fileno())
+                index = MetadataSource.index_blocks(f)
+            return st.st_size, st.st_mtime_ns, index
+        except (OSError, ValueError):
+            return None
+    
+    @staticmethod
+    def index_blocks(f) -> Dict[Tuple[str, str], Tuple[int, int]]:
+        """从头扫描二进制文件对象（文件或 mmap），返回 (game, file) 到块区间的索引"""
+        index = {}
+        header, chunks = MetadataParser._read_header(f)
+        for start, end, fields in MetadataParser._iter_field_blocks(
+                chunks, len(header), MetadataParser.EAGER_FIELDS):
+            game_key = (fields.get('game', ""), MetadataParser._unquote_file(fields.get('file', "")))
+            index[game_key] = (start, end)
+        return index
+
+
+def media_key(file: str, game: str) -> Optional[str]:
+    """media目录使用的基名，优先用file去掉扩展名"""
+    if file:
+        # 与 Path(file).stem 相同，不创建 Path 对象
+        name = os.path.basename(file.rstrip('/' + os.sep))
+        dot = name.rfind('.')
+        stem = name[:dot] if 0 < dot < len(name) - 1 else name
+        if stem:
+            return stem
+    return game or None
 
 
 class Game:
     """游戏元数据类"""
     
+    __slots__ = ('game', 'file', 'sort_by', 'developer', '_description', 'platform', 'platform_path',
+                 '_extra_fields', '_block')
+    
     def __init__(self):
         self.game: str = ""  # 游戏名称（用于显示）
         self.file: str = ""  # 游戏文件名
         self.sort_by: str = ""  # 排序
         self.developer: str = ""  # 开发者
-        self.description: str = ""  # 游戏描述
+        self.description: str = ""  # 游戏描述（懒加载时为 None，访问时再解码）
         self.platform: str = ""  # 平台名称（从目录结构获取）
         self.platform_path: Optional[Path] = None  # 平台目录路径
+        # 其余字段（assets.*、genre、x-* 等），按文件中的顺序；None 表示尚未解码或为空
+        self._extra_fields: Optional[Dict[str, str]] = None
+        # 来源游戏块：(MetadataSource, 块起始偏移, 块结束偏移)
+        self._block: Optional[Tuple[MetadataSource, int, int]] = None
+    
+    @property
+    def description(self) -> str:
+        """游戏描述，懒加载模式下按需从元数据文件解码（不常驻内存）"""
+        if self._description is None:
+            return self._read_block_fields().get('description', "")
+        return self._description
+    
+    @description.setter
+    def description(self, value: Optional[str]):
+        self._description = value
+    
+    @property
+    def extra_fields(self) -> Dict[str, str]:
+        """Game 未直接持有的其余字段（字段名小写），懒加载模式下按需解码"""
+        if self._extra_fields is None:
+            fields = self._read_block_fields() if self._block else {}
+            self._extra_fields = {k: v for k, v in fields.items() if k not in _GAME_FIELDS}
+        return self._extra_fields
+    
+    @extra_fields.setter
+    def extra_fields(self, value: Optional[Dict[str, str]]):
+        self._extra_fields = value
+    
+    @property
+    def is_lazy(self) -> bool:
+        """是否仍有字段未解码"""
+        return self._description is None
+    
+    def _read_block_fields(self) -> Dict[str, str]:
+        """从元数据文件读取本游戏块的全部字段"""
+        if not self._block:
+            return {}
+        source, start, end = self._block
+        return source.read_fields(start, end, (self.game, self.file))
 
+    def _platform_entity(self) -> Platform:
+        """游戏所属的平台实体"""
+        return Platform.shared(self.platform, self.platform_path)
+    
     @property
     def is_file_missing(self) -> bool:
         """检查元数据中指定的游戏文件在磁盘上是否存在"""
         if self.platform_path and self.file:
-            # 处理可能的路径分隔符
-            file_path = self.platform_path / self.file
-            return not file_path.exists()
+            return not self._platform_entity().has_file(self.file)
         return True
     
     def _media_key(self) -> Optional[str]:
         """media目录使用的基名，优先用file去掉扩展名"""
-        if self.file:
-            stem = Path(self.file).stem
-            if stem:
-                return stem
-        return self.game or None
+        return media_key(self.file, self.game)
         
-    def get_logo_path(self) -> Optional[Path]:
-        """获取logo图片路径，media子目录按文件名去扩展"""
+    @property
+    def asset_mask(self) -> int:
+        """已有媒体资源的位掩码（位定义见 core.platform.ASSET_BITS）"""
+        if not self.platform_path:
+            return 0
+        return self._platform_entity().asset_mask(self._media_key())
+    
+    def has_assets(self, *names: str) -> bool:
+        """是否具有全部指定的媒体资源（如 "logo"、"video"）"""
+        required = asset_bits(names)
+        return self.asset_mask & required == required
+    
+    def _find_media(self, name: str, extensions: Iterable[str]) -> Optional[Path]:
+        """在 media/<基名>/ 下按扩展名顺序查找媒体文件"""
         if not self.platform_path:
             return None
         media_key = self._media_key()
         if not media_key:
             return None
-        logo_dir = self.platform_path / "media" / media_key
-        for ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
-            logo_file = logo_dir / f"logo{ext}"
-            if logo_file.exists():
-                return logo_file
-        return None
+        return self._platform_entity().find_media(media_key, name, extensions)
+    
+    def get_logo_path(self) -> Optional[Path]:
+        """获取logo图片路径，media子目录按文件名去扩展"""
+        return self._find_media("logo", IMAGE_EXTENSIONS)
     
     def get_boxfront_path(self) -> Optional[Path]:
         """获取封面图片路径"""
-        if not self.platform_path:
-            return None
-        media_key = self._media_key()
-        if not media_key:
-            return None
-        boxfront_dir = self.platform_path / "media" / media_key
-        for ext in ['.png', '.jpg', '.jpeg', '.gif', '.bmp']:
-            boxfront_file = boxfront_dir / f"boxFront{ext}"
-            if boxfront_file.exists():
-                return boxfront_file
-        return None
+        return self._find_media("boxFront", IMAGE_EXTENSIONS)
     
     def get_video_path(self) -> Optional[Path]:
         """获取视频路径"""
-        if not self.platform_path:
-            return None
-        media_key = self._media_key()
-        if not media_key:
-            return None
-        video_dir = self.platform_path / "media" / media_key
-        for ext in ['.mp4', '.avi', '.mkv', '.mov']:
-            video_file = video_dir / f"video{ext}"
-            if video_file.exists():
-                return video_file
-        return None
+        return self._find_media("video", VIDEO_EXTENSIONS)
 
 
 class MetadataParser:
@@ -84,9 +280,48 @@ class MetadataParser:
     SUPPORTED_IMAGE_FORMATS = {'.png', '.jpg', '.jpeg', '.gif', '.bmp'}
     SUPPORTED_VIDEO_FORMATS = {'.mp4', '.avi', '.mkv', '.mov'}
     
+    # 懒加载模式下解析时解码的字段，其余字段访问时再从文件读取
+    EAGER_FIELDS = frozenset({'game', 'file', 'sort-by', 'developer'})
+    
+    @staticmethod
+    def parse_platform_directory(platform_path: Path, lazy: bool = False) -> tuple:
+        """解析平台目录，返回 (header, 游戏列表)
+        
+        lazy=True 时游戏只记录所在块的字节区间，description 等字段在访问时再解码。
+        """
+        metadata_file = MetadataParser._check_platform_directory(platform_path)
+        
+        try:
+            with open(metadata_file, 'rb') as f:
+                entries = MetadataParser._iter_metadata(f, platform_path, lazy)
+                header = next(entries)
+                # 一次创建数万个 Game，期间暂停循环垃圾回收，避免反复扫描已创建的对象
+                gc_enabled = gc.isenabled()
+                gc.disable()
+                try:
+                    games = list(entries)
+                finally:
+                    if gc_enabled:
+                        gc.enable()
+            return header, games
+        except Exception as e:
+            raise Exception(f"解析元数据文件失败: {e}")
+    
     @staticmethod
-    def parse_platform_directory(platform_path: Path) -> tuple:
-        """解析平台目录，返回 (header, 游戏列表)"""
+    def read_platform_header(platform_path: Path) -> str:
+        """只读取平台的 Header（读到第一个游戏块为止，不解析游戏）"""
+        metadata_file = MetadataParser._check_platform_directory(platform_path)
+        
+        try:
+            with open(metadata_file, 'rb') as f:
+                header, _ = MetadataParser._read_header(f)
+            return MetadataParser._decode_header(header)
+        except Exception as e:
+            raise Exception(f"解析元数据文件失败: {e}")
+    
+    @staticmethod
+    def _check_platform_directory(platform_path: Path) -> Path:
+        """检查平台目录结构，返回元数据文件路径"""
         metadata_file = platform_path / "metadata.pegasus.txt"
         
         if not metadata_file.exists():
@@ -96,207 +331,321 @@ class MetadataParser:
         if not media_dir.exists():
             raise FileNotFoundError(f"找不到media目录: {media_dir}")
         
-        try:
-            with open(metadata_file, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 分离 Header 和 Game 块
-            # 找到第一个 "game:" 出现的位置
-            import re
-            # 改进正则：确保匹配的是行首的 game: 字段，防止匹配到 description 里的内容
-            match = re.search(r'^game\s*:', content, re.MULTILINE | re.IGNORECASE)
-            if match:
-                header = content[:match.start()].strip()
-                game_content = content[match.start():]
+        return metadata_file
+    
+    @staticmethod
+    def _iter_metadata(f, platform_path: Path, lazy: bool = False) -> Iterator[Union[str, Game]]:
+        """先产出 Header 文本，再逐个产出游戏
+        
+        Header 为第一个行首 game: 之前的全部内容，其余部分交给 _iter_field_blocks。
+        """
+        platform_name = platform_path.name
+        source = None
+        keys = None
+        if lazy:
+            st = os.fstat(f.fileno())
+            source = MetadataSource(Path(f.name), st.st_size, st.st_mtime_ns)
+            keys = MetadataParser.EAGER_FIELDS
+        
+        header, chunks = MetadataParser._read_header(f)
+        yield MetadataParser._decode_header(header)
+        
+        game_from_fields = MetadataParser._game_from_fields
+        blocks = MetadataParser._iter_field_blocks(chunks, len(header), keys)
+        for start, end, fields in blocks:
+            game = game_from_fields(fields, platform_path, platform_name)
+            if game:
+                if source is not None:
+                    game.description = None
+                    game._block = (source, start, end)
+                yield game
+    
+    @staticmethod
+    def _read_header(f) -> Tuple[bytes, Iterator[bytes]]:
+        """从二进制文件读取 Header 原始字节，返回 (Header, 从首个游戏块开始的剩余数据块)"""
+        chunks = _read_chunks(f)
+        data = b''
+        pos = 0
+        for chunk in chunks:
+            data += chunk
+            m = _HEADER_END_RE.search(data, pos)
+            if m:
+                return data[:m.start()], chain((data[m.start():],), chunks)
+            # 最后一行可能不完整，下次从这一行开头继续查找
+            pos = max(data.rfind(b'\n'), data.rfind(b'\r')) + 1
+        return data, iter(())
+    
+    @staticmethod
+    def _iter_field_blocks(chunks: Iterable[bytes], offset: int = 0,
+                           keys: Optional[frozenset] = None) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        """按空行切分游戏块，产出 (块起始偏移, 块结束偏移, 字段字典)
+        
+        - 块内第一行非空内容以 # 开头时，整块视为注释跳过
+        - 行首 key: 开始新字段，其余行视为上一字段的延续行
+        - 字段值每行去除首尾空白后以换行连接，重复的字段以后者为准
+        - 指定 keys 时只解码其中的字段，其余字段不放入字段字典
+        
+        只用一种换行符（\\n 或 \\r\\n）的区域整体按空行切分，每块解码后由 _iter_region_blocks 解析；
+        混用换行符的区域交给逐行状态机 _iter_line_blocks。
+        """
+        for region in _split_regions(chunks):
+            if b'\r' not in region:
+                yield from MetadataParser._iter_region_blocks(region, offset, b'\n', keys)
+            elif region.count(b'\r') == region.count(b'\n') == region.count(b'\r\n'):
+                yield from MetadataParser._iter_region_blocks(region, offset, b'\r\n', keys)
             else:
-                header = content.strip()
-                game_content = ""
-
-            games = []
-            game_blocks = game_content.split('\n\n')
-            platform_name = platform_path.name
-            
-            for block in game_blocks:
-                block = block.strip()
-                if not block or block.startswith('#'):
-                    continue
-                
-                game = MetadataParser._parse_game_block(block, platform_path, platform_name)
-                if game:
-                    games.append(game)
+                yield from MetadataParser._iter_line_blocks(region.splitlines(keepends=True), offset, keys)
+            offset += len(region)
+    
+    @staticmethod
+    def _iter_region_blocks(region: bytes, offset: int, newline: bytes,
+                            keys: Optional[frozenset]) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        """切分只用一种换行符的区域，产出同 _iter_field_blocks
+        
+        常见格式的块直接在这里逐行解析：字段行为 "key: value" 且字段名已出现过（在 _FIELD_NAMES 中），
+        延续行以空白等字段名不能使用的字符开头。其余的块（以延续行开头、新出现的字段名、
+        "key:value" 形式的字段行、以字母数字开头的延续行、非法 UTF-8）交给 _iter_line_blocks。
+        """
+        names = _FIELD_NAMES
+        key_start = _KEY_START_CHARS
+        join_lines = MetadataParser._join_lines
+        text_newline = newline.decode('ascii')
+        newline_size = len(newline)
+        separator_size = newline_size * 2
+        region_end = offset + len(region)
+        pos = offset
+        for part in region.split(newline * 2):
+            start = pos
+            pos += len(part) + separator_size
+            if part.startswith(newline):
+                # 连续多个空行
+                stripped = part.lstrip(newline)
+                start += len(part) - len(stripped)
+                part = stripped
+            if not part or part[0] == 35:  # 注释块以 # 开头
+                continue
+            end = start + len(part) + newline_size
+            if end > region_end:
+                # 文件末尾没有空行
+                end = region_end
+                if part.endswith(newline):
+                    part = part[:-newline_size]
+            try:
+                lines = part.decode('utf-8').split(text_newline)
+            except UnicodeDecodeError:
+                # 懒加载时不解码的字段可以不是合法的 UTF-8
+                lines = ('',)  # 空行使下面的循环立即转入逐行状态机
             
-            return header, games
-        except Exception as e:
-            raise Exception(f"解析元数据文件失败: {e}")
+            fields: Dict[str, str] = {}
+            more: Optional[Dict[str, List[str]]] = None  # 有延续行的字段
+            name = None  # 当前字段，"" 表示不解码的字段
+            first = ''  # 当前字段首行（冒号之后，未去除空白）
+            current = None  # 当前字段的各行，单行字段为 None
+            for line in lines:
+                key, _, value = line.partition(': ')
+                field = names.get(key)
+                if field is not None:
+                    if keys is None or field in keys:
+                        name = field
+                        first = value
+                        current = None
+                        fields[field] = value.strip()
+                        if more is not None:
+                            more.pop(field, None)
+                    else:
+                        name = ""
+                elif name is None or line[:1] in key_start:
+                    break
+                elif name:
+                    if current is None:
+                        current = [first]
+                        if more is None:
+                            more = {}
+                        more[name] = current
+                    current.append(line)
+            else:
+                if more:
+                    for field, field_lines in more.items():
+                        fields[field] = join_lines(field_lines)
+                yield start, end, fields
+                continue
+            lines = region[start - offset:end - offset].splitlines(keepends=True)
+            yield from MetadataParser._iter_line_blocks(lines, start, keys)
     
     @staticmethod
-    def _parse_game_block(block: str, platform_path: Path, platform_name: str) -> Optional[Game]:
-        """解析单个游戏块"""
-        import re
-        game = Game()
-        game.platform = platform_name
-        game.platform_path = platform_path
+    def _iter_line_blocks(lines: Iterable[bytes], offset: int = 0,
+                          keys: Optional[frozenset] = None) -> Iterator[Tuple[int, int, Dict[str, str]]]:
+        """单遍逐行状态机，产出同 _iter_field_blocks（处理任意换行符和格式）
         
-        # 使用正则表达式匹配字段，支持多行延续
-        pattern = r'^([a-zA-Z0-9_-]+)\s*:(.*?)(?=\n[a-zA-Z0-9_-]+\s*:|\Z)'
-        matches = re.finditer(pattern, block, re.MULTILINE | re.DOTALL | re.IGNORECASE)
+        遇到的字段名记入 _FIELD_NAMES，之后同样格式的块可以由 _iter_region_blocks 直接解析。
+        """
+        join_value = MetadataParser._join_value
+        match_field = _FIELD_RE.match
+        key_start = _KEY_START
+        key_names = _KEY_NAMES
+        field_names = _FIELD_NAMES
         
-        field_data = {}
-        for m in matches:
-            key = m.group(1).lower()
-            value = m.group(2).strip()
-            # 合并多行并清理前导空格
-            val_lines = [line.strip() for line in value.splitlines()]
-            field_data[key] = '\n'.join(val_lines)
-            
-        if 'game' in field_data:
-            game.game = field_data['game']
+        state = _BLOCK_IDLE
+        fields: Dict[str, str] = {}
+        key = None
+        first = b''         # 当前字段首行（冒号之后）
+        more = None         # 当前字段的延续行，单行字段为 None
+        start = offset
         
-        if 'file' in field_data:
-            value = field_data['file']
-            # 去除包裹的引号
-            if value.startswith('"') and value.endswith('"') and len(value) >= 2:
-                value = value[1:-1].strip()
-            game.file = value
+        for raw in lines:
+            pos = offset
+            offset += len(raw)
             
-        if 'sort-by' in field_data:
-            game.sort_by = field_data['sort-by']
+            if raw in _BLANK_LINES:
+                if state == _BLOCK_FIELDS:
+                    if key is not None:
+                        fields[key] = first.decode('utf-8').strip() if more is None else join_value(first, more)
+                    yield start, pos, fields
+                    fields = {}
+                    key = None
+                state = _BLOCK_IDLE
+                continue
             
-        if 'developer' in field_data:
-            game.developer = field_data['developer']
+            if state == _BLOCK_IDLE:
+                stripped = raw.strip()
+                if not stripped:
+                    continue
+                if stripped.startswith(b'#'):
+                    state = _BLOCK_COMMENT
+                    continue
+                state = _BLOCK_FIELDS
+                start = pos
+            elif state == _BLOCK_COMMENT:
+                continue
             
-        if 'description' in field_data:
-            game.description = field_data['description']
+            # 行首字符不可能是字段名时跳过正则匹配（多行描述的常见情况）
+            if raw[0] in key_start:
+                m = match_field(raw)
+                if m:
+                    if key is not None:
+                        fields[key] = first.decode('utf-8').strip() if more is None else join_value(first, more)
+                    name = m.group(1)
+                    key = key_names.get(name)
+                    if key is None:
+                        key = key_names.setdefault(name, name.decode('ascii').lower())
+                    field_names[m.group()[:-1].decode('ascii')] = key
+                    if keys is not None and key not in keys:
+                        # 懒加载字段：丢弃本字段及其延续行
+                        key = None
+                        continue
+                    first = raw[m.end():]
+                    more = None
+                    continue
+            if key is not None:
+                if more is None:
+                    more = [raw]
+                else:
+                    more.append(raw)
         
-        return game if game.game and game.file else None
+        if state == _BLOCK_FIELDS:
+            if key is not None:
+                fields[key] = first.decode('utf-8').strip() if more is None else join_value(first, more)
+            yield start, offset, fields
     
     @staticmethod
-    def parse_header_fields(header_text: str) -> Dict[str, str]:
-        """解析 Header 中的字段，支持多行延续字段 (如 launch)"""
-        import re
-        fields = {}
-        
-        # 预处理：去除纯注释行，保持空行（空行可能在多行字段中）
-        lines = []
-        for line in header_text.splitlines():
-            if line.strip().startswith('#'):
-                continue
-            lines.append(line)
-        clean_text = '\n'.join(lines)
+    def _decode_header(header: bytes) -> str:
+        """Header 原始字节解码为文本，统一换行符"""
+        return header.decode('utf-8').replace('\r\n', '\n').replace('\r', '\n').strip()
+    
+    @staticmethod
+    def _join_value(first: bytes, more: List[bytes]) -> str:
+        """合并多行字段的首行与延续行"""
+        value = (first + b''.join(more)).decode('utf-8').strip()
+        return '\n'.join([line.strip() for line in value.splitlines()])
+    
+    @staticmethod
+    def _join_lines(lines: List[str]) -> str:
+        """合并多行字段的首行（冒号之后）与延续行"""
+        value = '\n'.join(lines).strip()
+        return '\n'.join([line.strip() for line in value.splitlines()])
+    
+    @staticmethod
+    def _game_from_fields(field_data: Dict[str, str], platform_path: Path, platform_name: str) -> Optional[Game]:
+        """由字段字典构造 Game，缺少 game 或 file 时返回 None
         
-        # 改进正则：
-        # 1. 匹配行首的 key:
-        # 2. 内容 (.*?) 非贪婪匹配
-        # 3. 停止条件：遇到 下一个行首的 key: (前面可能有多个换行符) 或者 字符串结束
-        pattern = r'^([a-zA-Z0-9_-]+)\s*:(.*?)(?=\n+\s*[a-zA-Z0-9_-]+\s*:|\Z)'
-        matches = re.finditer(pattern, clean_text, re.MULTILINE | re.DOTALL | re.IGNORECASE)
+        Game 直接持有的字段会从 field_data 中弹出，剩余字段直接作为 extra_fields。
+        """
+        pop = field_data.pop
+        name = pop('game', "")
+        file = pop('file', "")
+        if file.startswith('"'):
+            file = MetadataParser._unquote_file(file)
+        if not (name and file):
+            return None
         
-        for m in matches:
-            key = m.group(1).lower()
-            value = m.group(2).strip()
-            
-            # 处理多行延续：合并行并清理多余空格
-            val_lines = [line.strip() for line in value.splitlines()]
-            fields[key] = '\n'.join(val_lines)
-            
-        return fields
+        game = Game()
+        game.game = name
+        game.file = file
+        game.platform = platform_name
+        game.platform_path = platform_path
+        if field_data:
+            game.sort_by = pop('sort-by', "")
+            game.developer = pop('developer', "")
+            game.description = pop('description', "")
+            if field_data:
+                game.extra_fields = field_data
+        return game
+    
+    @staticmethod
+    def _unquote_file(value: str) -> str:
+        """去除 file 字段包裹的引号"""
+        if value.startswith('"') and value.endswith('"') and len(value) >= 2:
+            value = value[1:-1].strip()
+        return value
+    
+    @staticmethod
+    def parse_header_fields(header_text: str) -> Dict[str, str]:
+        """解析 Header 中的字段，支持多行延续字段 (如 launch)"""
+        return PlatformHeader(header_text).fields()
 
     @staticmethod
     def merge_header_fields(target_header: str, source_header: str, field_names: List[str], platform_name: str = "") -> str:
-        """合并 Header 字段：确保 target 中包含 field_names 中的所有字段"""
-        target_fields = MetadataParser.parse_header_fields(target_header)
-        source_fields = MetadataParser.parse_header_fields(source_header)
+        """合并 Header 字段：确保 target 中包含 field_names 中的所有字段
         
-        # 合并所有字段
-        merged_fields = target_fields.copy()
-        for field in field_names:
-            f_lower = field.lower()
-            if f_lower not in merged_fields:
-                if f_lower in source_fields:
-                    merged_fields[f_lower] = source_fields[f_lower]
-                else:
-                    # 如果来源也没有，给个默认值
-                    if f_lower == "collection":
-                        merged_fields[f_lower] = platform_name or "Unknown Collection"
-                    else:
-                        merged_fields[f_lower] = ""
-        
-        # 构建新的 header 字符串
-        final_lines = []
-        processed_keys = set()
+        target 原有的字段、注释、顺序和大小写保持不变，缺少的字段按 field_names 的顺序追加。
+        """
+        target = PlatformHeader(target_header)
+        source = PlatformHeader(source_header)
         
-        # 为了美观，先按 field_names 的顺序排放核心字段
         for field in field_names:
-            f_lower = field.lower()
-            if f_lower in merged_fields:
-                value = merged_fields[f_lower]
-                if '\n' in value:
-                    lines = value.split('\n')
-                    formatted = lines[0]
-                    for l in lines[1:]:
-                        formatted += '\n  ' + l
-                    final_lines.append(f"{field}: {formatted}")
-                else:
-                    final_lines.append(f"{field}: {value}")
-                processed_keys.add(f_lower)
-        
-        # 再添加其他字段
-        for key, value in merged_fields.items():
-            if key not in processed_keys:
-                # 尝试找回原始的大小写（如果有的话，这里简单处理）
-                if '\n' in value:
-                    lines = value.split('\n')
-                    formatted = lines[0]
-                    for l in lines[1:]:
-                        formatted += '\n  ' + l
-                    final_lines.append(f"{key}: {formatted}")
-                else:
-                    final_lines.append(f"{key}: {value}")
+            if field in target:
+                continue
+            if field in source:
+                target.set(field, source.get(field))
+            elif field.lower() == "collection":
+                # 如果来源也没有，给个默认值
+                target.set(field, platform_name or "Unknown Collection")
+            else:
+                target.set(field, "")
         
-        return '\n'.join(final_lines)
+        return target.to_text()
 
     @staticmethod
     def write_metadata(games: List[Game], output_file: Path, header: str = "") -> bool:
-        """写入元数据到文件"""
+        """写入元数据到文件
+        
+        基于 MetadataDocument 无损写入：文件中已有的游戏块保持原样（包括未知字段、
+        注释和格式），只重写值有变化的字段；列表中没有的块被删除，新游戏追加到末尾。
+        """
+        from core.metadata_document import MetadataDocument
+        
         try:
-            output_file.parent.mkdir(parents=True, exist_ok=True)
-            
-            with open(output_file, 'w', encoding='utf-8') as f:
-                if header:
-                    f.write(header)
-                    f.write('\n\n')
-                
-                for i, game in enumerate(games):
-                    if i > 0:
-                        f.write('\n\n')
-                    
-                    f.write(f'game: {game.game}\n')
-                    f.write(f'file: {game.file}\n')
-                    if game.sort_by:
-                        f.write(f'sort-by: {game.sort_by}\n')
-                    if game.developer:
-                        f.write(f'developer: {game.developer}\n')
-                    if game.description:
-                        # 处理描述的多行缩进
-                        desc = game.description.strip()
-                        if '\n' in desc:
-                            desc = desc.replace('\n', '\n  ')
-                        f.write(f'description: {desc}\n')
-            
+            doc = MetadataDocument.load(output_file)
+            doc.set_header(header)
+            doc.sync_games(games)
+            if doc.is_dirty or not output_file.exists():
+                doc.save(output_file)
             return True
         except Exception as e:
             raise Exception(f"写入元数据失败: {e}")
     
     @staticmethod
     def find_platform_directories(roms_root: Path) -> List[Path]:
-        """查找Roms根目录下的所有平台目录"""
-        platform_dirs = []
-        
-        for item in roms_root.iterdir():
-            if item.is_dir():
-                metadata_file = item / "metadata.pegasus.txt"
-                media_dir = item / "media"
-                if metadata_file.exists() and media_dir.exists():
-                    platform_dirs.append(item)
-        
-        return platform_dirs
+        """查找Roms根目录下的所有平台目录（按名称排序）"""
+        _, names = scan_directories(roms_root)
+        return [roms_root / name for name in names]
@@ -0,0 +1,89 @@
+"""
+元数据解析缓存模块
+"""
+
+import os
+import pickle
+import hashlib
+from pathlib import Path
+from typing import List, Optional, Tuple
+from core.metadata_parser import Game
+
+
+# 缓存格式版本，记录结构变化时递增
+CACHE_VERSION = 3
+
+
+class ParseCache:
+    """metadata.pegasus.txt 解析结果的磁盘缓存
+    
+    每个 Roms 根目录对应一个缓存子目录，每个平台一个缓存文件。
+    以 路径 + 文件大小 + mtime_ns 作为指纹，指纹不变时直接读取缓存，
+    否则重新解析并覆盖该平台的缓存。
+    懒加载的游戏只缓存块的字节区间，读取缓存后仍按需从元数据文件解码描述等字段。
+    """
+    
+    def __init__(self, cache_dir: Path, roms_root: Path):
+        root_key = hashlib.sha1(str(Path(roms_root).resolve()).encode('utf-8')).hexdigest()[:16]
+        self.cache_dir = Path(cache_dir) / root_key
+    
+    @staticmethod
+    def fingerprint(metadata_file: Path) -> Tuple[str, int, int]:
+        """计算元数据文件指纹 (路径, 大小, mtime_ns)"""
+        st = metadata_file.stat()
+        return str(metadata_file), st.st_size, st.st_mtime_ns
+    
+    def load_records(self, platform_path: Path, fingerprint: tuple) -> Optional[Tuple[str, list]]:
+        """读取平台缓存的紧凑记录（不还原为 Game），指纹不一致或缓存损坏时返回 None"""
+        try:
+            with open(self._cache_file(platform_path), 'rb') as f:
+                data = pickle.load(f)
+        except Exception:
+            return None
+        
+        if not isinstance(data, dict) or data.get("version") != CACHE_VERSION:
+            return None
+        if tuple(data.get("fingerprint", ())) != fingerprint:
+            return None
+        
+        return data["header"], data["games"]
+    
+    def store_records(self, platform_path: Path, fingerprint: tuple, header: str, records: list) -> bool:
+        """写入已转换为紧凑记录的平台缓存（先写临时文件再替换），失败时返回 False
+        
+        fingerprint 应在解析之前获取，避免解析期间文件被修改后缓存旧内容。
+        """
+        try:
+            data = {
+                "version": CACHE_VERSION,
+                "fingerprint": tuple(fingerprint),
+                "header": header,
+                "games": records,
+            }
+            cache_file = self._cache_file(platform_path)
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = cache_file.with_name(cache_file.name + ".tmp")
+            with open(tmp_file, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_file, cache_file)
+            return True
+        except Exception:
+            return False
+    
+    @staticmethod
+    def game_records(games: List[Game]) -> list:
+        """游戏列表转换为紧凑记录（用于缓存及跨进程传递）"""
+        return [ParseCache._game_record(g) for g in games]
+    
+    @staticmethod
+    def _game_record(game: Game) -> tuple:
+        """游戏的紧凑记录，懒加载游戏不含描述和其余字段，只含块区间"""
+        if game.is_lazy and game._block:
+            _, start, end = game._block
+            return game.game, game.file, game.sort_by, game.developer, None, None, start, end
+        return (game.game, game.file, game.sort_by, game.developer,
+                game.description, game._extra_fields or None, 0, 0)
+    
+    def _cache_file(self, platform_path: Path) -> Path:
+        """平台对应的缓存文件"""
+        return self.cache_dir / f"{platform_path.name}.cache"
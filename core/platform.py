@@ -0,0 +1,303 @@
+"""
+平台实体模块
+"""
+
+import os
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.platform_header import PlatformHeader
+
+
+# 文件系统是否不区分大小写（Windows）
+_CASE_INSENSITIVE = os.path.normcase("A") == "a"
+
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.gif', '.bmp')
+VIDEO_EXTENSIONS = ('.mp4', '.avi', '.mkv', '.mov')
+# 媒体资源类型：(资源名, 按优先级排列的扩展名)，第 i 项对应资源位掩码的第 i 位
+MEDIA_ASSETS = (
+    ("logo", IMAGE_EXTENSIONS),
+    ("boxFront", IMAGE_EXTENSIONS),
+    ("boxBack", IMAGE_EXTENSIONS),
+    ("screenshot", IMAGE_EXTENSIONS),
+    ("marquee", IMAGE_EXTENSIONS),
+    ("video", VIDEO_EXTENSIONS),
+)
+# 资源名 -> 位
+ASSET_BITS: Dict[str, int] = {name: 1 << i for i, (name, _) in enumerate(MEDIA_ASSETS)}
+
+
+def _asset_file_bits() -> Dict[str, int]:
+    """媒体文件名（Windows 下为小写）-> 资源位"""
+    bits = {}
+    for name, extensions in MEDIA_ASSETS:
+        for ext in extensions:
+            file_name = name + ext
+            if _CASE_INSENSITIVE:
+                file_name = file_name.lower()
+            bits[file_name] = bits.get(file_name, 0) | ASSET_BITS[name]
+    return bits
+
+
+_ASSET_FILE_BITS = _asset_file_bits()
+
+
+def asset_bits(assets: Iterable[str]) -> int:
+    """资源名（如 "logo"、"video"）组合为位掩码"""
+    mask = 0
+    for name in assets:
+        if name not in ASSET_BITS:
+            raise ValueError(f"未知的媒体资源类型: {name}")
+        mask |= ASSET_BITS[name]
+    return mask
+
+
+def asset_mask_of(names: Iterable[str]) -> int:
+    """media 子目录的文件名对应的资源位掩码"""
+    get = _ASSET_FILE_BITS.get
+    mask = 0
+    for name in names:
+        mask |= get(name.lower() if _CASE_INSENSITIVE else name, 0)
+    return mask
+
+
+def _match_name(file_name: str, names: Tuple[str, ...]) -> Optional[str]:
+    """在目录文件名中查找 file_name，返回实际文件名（Windows 下不区分大小写）"""
+    if not _CASE_INSENSITIVE:
+        return file_name if file_name in names else None
+    file_name = file_name.lower()
+    for name in names:
+        if name.lower() == file_name:
+            return name
+    return None
+
+
+class Platform:
+    """平台实体：同一平台的游戏共享的名称、目录及按平台只计算一次的信息
+    
+    游戏通过平台 id 引用平台，文件和媒体路径使用预先拼好的目录前缀做字符串拼接，
+    不再为每次访问创建 Path 对象（只有找到的媒体文件才返回 Path）。
+    """
+    
+    # 游戏对象（非列式存储）共享的平台实体：(名称, 目录) -> Platform
+    _shared: Dict[Tuple[str, Optional[Path]], 'Platform'] = {}
+    
+    def __init__(self, platform_id: int, name: str, path: Optional[Path]):
+        self.id = platform_id
+        self.name = name
+        self.path = path
+        # 平台目录、media 目录的字符串形式，路径拼接使用 os.path 而非 Path
+        self.path_str = str(path) if path else ""
+        self.media_str = os.path.join(self.path_str, "media") if path else ""
+        # ROM 列表：规范化相对目录 -> 目录下条目的规范化名称，None 表示未建立
+        self._roms: Optional[Dict[str, set]] = None
+        self.rom_version = 0  # ROM 列表修改计数
+        # media 索引：规范化子目录名 -> (子目录名, 文件名元组, 子目录修改时间, 资源位掩码)，None 表示未建立
+        self._media: Optional[Dict[str, tuple]] = None
+        self.media_version = 0  # media 索引修改计数
+        # Header 原文及其解析结果（原文变化时重新解析）
+        self.header_text = ""
+        self._header: Optional[Tuple[str, PlatformHeader]] = None
+    
+    @classmethod
+    def shared(cls, name: str, path: Optional[Path]) -> 'Platform':
+        """获取 (名称, 目录) 对应的共享平台实体"""
+        key = (name, path)
+        platform = cls._shared.get(key)
+        if platform is None:
+            platform = cls._shared[key] = cls(-1, name, path)
+        return platform
+    
+    @classmethod
+    def clear_shared(cls):
+        """清空共享平台实体（打开项目时调用，不保留上一个项目的 ROM 和 media 索引）"""
+        cls._shared.clear()
+    
+    @property
+    def metadata_file(self) -> Optional[Path]:
+        return self.path / "metadata.pegasus.txt" if self.path else None
+    
+    @property
+    def header(self) -> PlatformHeader:
+        """已解析的 Header"""
+        text = self.header_text
+        parsed = self._header
+        if parsed is None or (parsed[0] is not text and parsed[0] != text):
+            parsed = self._header = (text, PlatformHeader(text))
+        return parsed[1]
+    
+    def file_path(self, file: str) -> str:
+        """平台目录下文件的完整路径"""
+        return os.path.join(self.path_str, file)
+    
+    def has_file(self, file: str) -> bool:
+        """平台目录下的文件是否存在，已建立 ROM 列表时只查列表"""
+        if not (self.path_str and file):
+            return False
+        if self._roms is not None:
+            parts = self._split_rom_path(file)
+            if parts is not None:
+                return parts[1] in self._rom_dir(parts[0])
+        return os.path.exists(os.path.join(self.path_str, file))
+    
+    def build_rom_index(self):
+        """列出平台目录（一次 os.scandir），之后检查 ROM 文件是否存在不再访问磁盘
+        
+        file 位于子目录时，该子目录在首次查询时列出一次。
+        """
+        self._roms = {"": self._list_dir(self.path_str)}
+        self.rom_version += 1
+    
+    def add_file(self, file: str):
+        """记录新增的 ROM 文件（执行任务复制文件后调用）"""
+        parts = self._split_rom_path(file) if self._roms is not None else None
+        if parts is not None:
+            self._rom_dir(parts[0]).add(parts[1])
+            self.rom_version += 1
+    
+    def discard_file(self, file: str):
+        """记录删除的 ROM 文件（执行任务删除文件后调用）"""
+        parts = self._split_rom_path(file) if self._roms is not None else None
+        if parts is not None:
+            self._rom_dir(parts[0]).discard(parts[1])
+            self.rom_version += 1
+    
+    @staticmethod
+    def _split_rom_path(file: str) -> Optional[Tuple[str, str]]:
+        """file 拆分为 (规范化的相对目录, 规范化的文件名)，绝对路径或位于平台目录之外时返回 None"""
+        if '/' not in file and os.sep not in file and not file.startswith('.'):
+            return "", os.path.normcase(file)
+        if os.path.isabs(file):
+            return None
+        relative = os.path.normcase(os.path.normpath(file))
+        if relative == os.curdir or relative == os.pardir or relative.startswith(os.pardir + os.sep):
+            return None
+        return os.path.split(relative)
+    
+    def _rom_dir(self, relative_dir: str) -> set:
+        names = self._roms.get(relative_dir)
+        if names is None:
+            names = self._roms[relative_dir] = self._list_dir(os.path.join(self.path_str, relative_dir))
+        return names
+    
+    @staticmethod
+    def _list_dir(path: str) -> set:
+        """目录下全部条目的规范化名称（文件和子目录，与 exists() 一致）"""
+        try:
+            with os.scandir(path) as entries:
+                return {os.path.normcase(entry.name) for entry in entries}
+        except OSError:
+            return set()
+    
+    def find_media(self, media_key: str, name: str, extensions: Iterable[str]) -> Optional[Path]:
+        """按扩展名顺序查找 media/<media_key>/<name><ext>，返回第一个存在的文件
+        
+        已建立 media 索引时只查索引，否则逐个探测文件。
+        """
+        if not self.media_str:
+            return None
+        if self._media is not None:
+            entry = self._media.get(os.path.normcase(media_key))
+            if entry is None:
+                return None
+            names = entry[1]
+            for ext in extensions:
+                file_name = _match_name(name + ext, names)
+                if file_name:
+                    return Path(os.path.join(self.media_str, entry[0], file_name))
+            return None
+        base = os.path.join(self.media_str, media_key, name)
+        for ext in extensions:
+            candidate = base + ext
+            if os.path.exists(candidate):
+                return Path(candidate)
+        return None
+    
+    def asset_mask(self, media_key: str) -> int:
+        """media/<media_key>/ 下存在的资源类型位掩码（见 MEDIA_ASSETS）
+        
+        已建立 media 索引时直接取索引中预先计算的掩码，否则逐个资源探测文件。
+        """
+        if not (self.media_str and media_key):
+            return 0
+        if self._media is not None:
+            entry = self._media.get(os.path.normcase(media_key))
+            return entry[3] if entry else 0
+        mask = 0
+        for name, extensions in MEDIA_ASSETS:
+            if self.find_media(media_key, name, extensions):
+                mask |= ASSET_BITS[name]
+        return mask
+    
+    def build_media_index(self):
+        """扫描 media 目录建立索引：每个子目录一次 os.scandir，之后查找媒体文件不再访问磁盘"""
+        media = {}
+        try:
+            with os.scandir(self.media_str) as entries:
+                for entry in entries:
+                    if entry.is_dir():
+                        media[os.path.normcase(entry.name)] = self._scan_media_dir(entry)
+        except OSError:
+            pass
+        self._media = media
+        self.media_version += 1
+    
+    def update_media_dir(self, media_key: str):
+        """重新扫描单个 media 子目录（执行任务修改了该目录后调用），未建立索引时忽略"""
+        if self._media is None:
+            return
+        key = os.path.normcase(media_key)
+        path = os.path.join(self.media_str, media_key)
+        self.media_version += 1
+        try:
+            st = os.stat(path)
+        except OSError:
+            self._media.pop(key, None)
+            return
+        names = self._list_media_dir(path)
+        self._media[key] = (media_key, names, st.st_mtime_ns, asset_mask_of(names))
+    
+    def refresh_media_index(self) -> List[str]:
+        """增量刷新 media 索引：只重新扫描修改时间变化的子目录，返回有变化的子目录名"""
+        if self._media is None:
+            self.build_media_index()
+            return list(self._media)
+        changed = []
+        seen = set()
+        try:
+            with os.scandir(self.media_str) as entries:
+                for entry in entries:
+                    if not entry.is_dir():
+                        continue
+                    key = os.path.normcase(entry.name)
+                    seen.add(key)
+                    current = self._media.get(key)
+                    if current is None or current[2] != entry.stat().st_mtime_ns:
+                        self._media[key] = self._scan_media_dir(entry)
+                        changed.append(key)
+        except OSError:
+            pass
+        for key in [k for k in self._media if k not in seen]:
+            del self._media[key]
+            changed.append(key)
+        if changed:
+            self.media_version += 1
+        return changed
+    
+    def _scan_media_dir(self, entry: os.DirEntry) -> tuple:
+        """子目录索引项：(目录名, 文件名元组, 目录修改时间, 资源位掩码)"""
+        try:
+            mtime_ns = entry.stat().st_mtime_ns
+        except OSError:
+            mtime_ns = 0
+        names = self._list_media_dir(entry.path)
+        return entry.name, names, mtime_ns, asset_mask_of(names)
+    
+    @staticmethod
+    def _list_media_dir(path: str) -> Tuple[str, ...]:
+        try:
+            with os.scandir(path) as entries:
+                # 文件名驻留，不同游戏的同名文件（logo.png 等）共享同一字符串
+                return tuple(sys.intern(entry.name) for entry in entries)
+        except OSError:
+            return ()
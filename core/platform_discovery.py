@@ -0,0 +1,154 @@
+"""
+平台目录发现模块
+"""
+
+import os
+import json
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+
+# 清单格式版本，结构变化时递增（2：不再记录隐藏目录）
+MANIFEST_VERSION = 2
+# 子目录数达到该值时才并行探测（线程池用于重叠网络存储的访问延迟）
+PARALLEL_PROBE_MIN_ENTRIES = 16
+
+
+def _is_platform_path(path: str) -> bool:
+    """目录下是否同时有元数据文件和 media 目录"""
+    return os.path.exists(os.path.join(path, "metadata.pegasus.txt")) and os.path.exists(os.path.join(path, "media"))
+
+
+def _mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def scan_directories(roms_root: Path, workers: int = 1) -> Tuple[List[str], List[str]]:
+    """扫描 Roms 根目录，返回 (全部子目录名, 平台目录名)，均按名称排序
+    
+    子目录类型直接取自 os.scandir 的目录项（大多数系统无需额外 stat），
+    只对子目录探测元数据文件和 media 目录，子目录较多时并行探测。
+    以 . 开头的隐藏目录（如回收站 .trash）不是平台，也不列入子目录。
+    """
+    directories = []
+    with os.scandir(roms_root) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir():
+                    directories.append(entry.name)
+            except OSError:
+                continue
+    directories.sort()
+    
+    paths = [os.path.join(roms_root, name) for name in directories]
+    workers = min(workers, len(paths))
+    if workers > 1 and len(paths) >= PARALLEL_PROBE_MIN_ENTRIES:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            flags = list(executor.map(_is_platform_path, paths))
+    else:
+        flags = [_is_platform_path(path) for path in paths]
+    return directories, [name for name, is_platform in zip(directories, flags) if is_platform]
+
+
+class PlatformDiscovery:
+    """Roms 根目录下的平台目录发现，结果持久化为清单
+    
+    清单记录根目录的修改时间、全部子目录、平台目录和非平台子目录的修改时间。
+    根目录的修改时间只在直接子项增删（或重命名）时变化；已有子目录中新建元数据文件或
+    media 目录会改变该子目录的修改时间。两者都未变化时直接使用上次的结果，不再探测
+    平台目录（非平台子目录通常很少，只需各 stat 一次）。
+    """
+    
+    def __init__(self, roms_root: Path, manifest_file: Optional[Path] = None, workers: int = 1):
+        self.roms_root = Path(roms_root)
+        self.manifest_file = manifest_file
+        self.workers = workers
+        # (根目录 mtime_ns, 全部子目录名, 平台目录名, {非平台子目录名: mtime_ns})
+        self._result: Optional[tuple] = None
+        self._loaded_manifest = False
+    
+    def platform_directories(self) -> List[Path]:
+        """平台目录（按名称排序）"""
+        return [self.roms_root / name for name in self._current()[2]]
+    
+    def platform_names(self) -> List[str]:
+        """平台目录名（按名称排序）"""
+        return list(self._current()[2])
+    
+    def directory_names(self) -> List[str]:
+        """根目录下全部子目录名（按名称排序）"""
+        return list(self._current()[1])
+    
+    def invalidate(self):
+        """丢弃缓存的结果（包括清单），下次访问时重新扫描"""
+        self._result = None
+        self._loaded_manifest = True
+        if self.manifest_file:
+            try:
+                self.manifest_file.unlink()
+            except OSError:
+                pass
+    
+    def _current(self) -> tuple:
+        """根目录及非平台子目录均未变化时返回已有结果，否则重新扫描"""
+        mtime_ns = _mtime_ns(self.roms_root)
+        if mtime_ns is None:
+            self._result = None
+            return 0, [], [], {}
+        
+        if self._result is None and not self._loaded_manifest:
+            self._loaded_manifest = True
+            self._result = self._load_manifest()
+        if self._result is not None and self._result[0] == mtime_ns and self._others_unchanged(self._result[3]):
+            return self._result
+        
+        directories, platforms = scan_directories(self.roms_root, self.workers)
+        platform_set = set(platforms)
+        others = {name: _mtime_ns(os.path.join(self.roms_root, name))
+                  for name in directories if name not in platform_set}
+        self._result = (mtime_ns, directories, platforms, others)
+        self._save_manifest()
+        return self._result
+    
+    def _others_unchanged(self, others: Dict[str, Optional[int]]) -> bool:
+        return all(_mtime_ns(os.path.join(self.roms_root, name)) == mtime_ns for name, mtime_ns in others.items())
+    
+    def _load_manifest(self) -> Optional[tuple]:
+        if not self.manifest_file:
+            return None
+        try:
+            with open(self.manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") != MANIFEST_VERSION or data.get("root") != str(self.roms_root):
+                return None
+            return (int(data["root_mtime_ns"]), list(data["directories"]), list(data["platforms"]),
+                    dict(data["others"]))
+        except Exception:
+            return None
+    
+    def _save_manifest(self):
+        """写入清单（先写临时文件再替换），失败时忽略"""
+        if not self.manifest_file:
+            return
+        mtime_ns, directories, platforms, others = self._result
+        try:
+            self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.manifest_file.with_name(self.manifest_file.name + ".tmp")
+            with open(tmp_file, 'w', encoding='utf-8') as f:
+                json.dump({
+                    "version": MANIFEST_VERSION,
+                    "root": str(self.roms_root),
+                    "root_mtime_ns": mtime_ns,
+                    "directories": directories,
+                    "platforms": platforms,
+                    "others": others,
+                }, f, ensure_ascii=False)
+            os.replace(tmp_file, self.manifest_file)
+        except Exception:
+            pass
@@ -0,0 +1,130 @@
+"""
+平台 Header 模块
+"""
+
+import re
+from typing import List, Dict, Optional
+
+
+# 行首字段名，如 "collection:"、"launch :"
+_HEADER_KEY_RE = re.compile(r'([A-Za-z0-9_-][A-Za-z0-9_.-]*)[ \t\f\v]*:')
+
+
+class _HeaderEntry:
+    """Header 中的一项：字段（含延续行）或注释/空行"""
+    
+    __slots__ = ('name', 'value', 'lines', 'modified')
+    
+    def __init__(self, name: Optional[str], lines: List[str], value: str = ""):
+        self.name = name  # 原始字段名，注释/空行为 None
+        self.value = value
+        self.lines = lines  # 原始文本行
+        self.modified = False
+
+
+class PlatformHeader:
+    """平台 Header（metadata.pegasus.txt 中第一个游戏之前的部分）
+    
+    按原顺序保存字段、注释和空行，字段名保留原始大小写，查询时不区分大小写。
+    重复的字段以后者为准。未修改时 to_text() 返回原文，修改后只重新生成改动的字段。
+    """
+    
+    def __init__(self, text: str = ""):
+        self._text = text or ""
+        self._modified = False
+        self._entries: List[_HeaderEntry] = []
+        self._index: Dict[str, _HeaderEntry] = {}  # 小写字段名 -> 字段
+        self._parse(self._text)
+    
+    def _parse(self, text: str):
+        """逐行解析：行首 key: 开始新字段，# 开头为注释，其余非空行为上一字段的延续行"""
+        current: Optional[_HeaderEntry] = None
+        blanks: List[str] = []  # 暂存的空行，后面是延续行时归入当前字段
+        for line in text.splitlines():
+            stripped = line.strip()
+            if not stripped:
+                blanks.append(line)
+                continue
+            m = _HEADER_KEY_RE.match(line)
+            if m:
+                self._flush_blanks(blanks)
+                current = _HeaderEntry(m.group(1), [line])
+                self._entries.append(current)
+                self._index[current.name.lower()] = current
+            elif stripped.startswith('#') or current is None:
+                self._flush_blanks(blanks)
+                self._entries.append(_HeaderEntry(None, [line]))
+            else:
+                current.lines.extend(blanks)
+                blanks.clear()
+                current.lines.append(line)
+        self._flush_blanks(blanks)
+        
+        for entry in self._entries:
+            if entry.name is not None:
+                entry.value = self._entry_value(entry)
+    
+    def _flush_blanks(self, blanks: List[str]):
+        for line in blanks:
+            self._entries.append(_HeaderEntry(None, [line]))
+        blanks.clear()
+    
+    @staticmethod
+    def _entry_value(entry: _HeaderEntry) -> str:
+        """字段值：首行冒号之后的内容加延续行，每行去除首尾空白后以换行连接"""
+        first = _HEADER_KEY_RE.match(entry.lines[0])
+        value = '\n'.join([entry.lines[0][first.end():]] + entry.lines[1:]).strip()
+        return '\n'.join(line.strip() for line in value.splitlines())
+    
+    def get(self, key: str, default: str = "") -> str:
+        """按字段名（不区分大小写）获取值"""
+        entry = self._index.get(key.lower())
+        return entry.value if entry is not None else default
+    
+    def __contains__(self, key: str) -> bool:
+        return key.lower() in self._index
+    
+    def set(self, key: str, value: str):
+        """设置字段值：已有字段原位修改并保留原字段名，否则追加到末尾"""
+        value = value or ""
+        entry = self._index.get(key.lower())
+        if entry is None:
+            entry = _HeaderEntry(key, [], value)
+            self._entries.append(entry)
+            self._index[key.lower()] = entry
+        elif entry.value == value:
+            return
+        entry.value = value
+        entry.modified = True
+        self._modified = True
+    
+    def fields(self) -> Dict[str, str]:
+        """全部字段（小写字段名 -> 值），按出现顺序"""
+        return {name: entry.value for name, entry in self._index.items()}
+    
+    @property
+    def launch(self) -> str:
+        return self.get("launch")
+    
+    @property
+    def extensions(self) -> str:
+        return self.get("extensions")
+    
+    @property
+    def collection(self) -> str:
+        return self.get("collection")
+    
+    def to_text(self) -> str:
+        """生成 Header 文本，未修改的字段和注释保持原文"""
+        if not self._modified:
+            return self._text
+        lines = []
+        for entry in self._entries:
+            if entry.modified:
+                lines.append(f"{entry.name}: " + entry.value.replace('\n', '\n  '))
+            else:
+                lines.extend(entry.lines)
+        return '\n'.join(lines)
+    
+    def __str__(self) -> str:
+        return self.to_text()
@@ -5,16 +5,32 @@
 import json
 from pathlib import Path
 from typing import Optional, Dict, Any
+from core.copy_engine import DEPLOY_COPY, DEPLOY_MODES, DEFAULT_DEVICE_WORKERS
+from core.file_sync import COMPARE_MTIME, COMPARE_MODES
+from core.trash import TRASH_DIR_NAME, DEFAULT_TRASH_RETENTION
 
 
 class Project:
     """项目类，管理项目信息和ROM目录"""
     
-    def __init__(self, name: str = "", roms_path: str = "", source_path: str = "", pegasus_path: str = ""):
+    def __init__(self, name: str = "", roms_path: str = "", source_path: str = "", pegasus_path: str = "",
+                 deploy_mode: str = DEPLOY_COPY, sync_compare: str = COMPARE_MTIME,
+                 trash_retention: int = DEFAULT_TRASH_RETENTION,
+                 source_device_workers: int = DEFAULT_DEVICE_WORKERS,
+                 target_device_workers: int = DEFAULT_DEVICE_WORKERS):
         self.name = name
         self.roms_path = Path(roms_path) if roms_path else None
         self.source_path = Path(source_path) if source_path else None
         self.pegasus_path = Path(pegasus_path) if pegasus_path else None
+        # 添加游戏时放置文件的方式：copy/hardlink/reflink/symlink
+        self.deploy_mode = deploy_mode if deploy_mode in DEPLOY_MODES else DEPLOY_COPY
+        # 目标文件已存在时判断未变化（跳过复制）的方式：mtime/content，空字符串表示总是复制
+        self.sync_compare = sync_compare if sync_compare in COMPARE_MODES else COMPARE_MTIME
+        # 回收站保留大小（字节），超出时从最早删除的游戏开始永久删除
+        self.trash_retention = max(0, int(trash_retention))
+        # 来源目录、收藏目录所在设备同时进行的复制数上限（机械硬盘、U 盘等设为 1）
+        self.source_device_workers = max(1, int(source_device_workers))
+        self.target_device_workers = max(1, int(target_device_workers))
         self.project_file = None
     
     def save(self, filepath: Path) -> bool:
@@ -24,7 +40,12 @@ class Project:
                 "name": self.name,
                 "roms_path": str(self.roms_path) if self.roms_path else "",
                 "source_path": str(self.source_path) if self.source_path else "",
-                "pegasus_path": str(self.pegasus_path) if self.pegasus_path else ""
+                "pegasus_path": str(self.pegasus_path) if self.pegasus_path else "",
+                "deploy_mode": self.deploy_mode,
+                "sync_compare": self.sync_compare,
+                "trash_retention": self.trash_retention,
+                "source_device_workers": self.source_device_workers,
+                "target_device_workers": self.target_device_workers
             }
             
             filepath.parent.mkdir(parents=True, exist_ok=True)
@@ -49,7 +70,12 @@ class Project:
                 name=data.get("name", ""),
                 roms_path=data.get("roms_path", ""),
                 source_path=data.get("source_path", ""),
-                pegasus_path=data.get("pegasus_path", "")
+                pegasus_path=data.get("pegasus_path", ""),
+                deploy_mode=data.get("deploy_mode", DEPLOY_COPY),
+                sync_compare=data.get("sync_compare", COMPARE_MTIME),
+                trash_retention=data.get("trash_retention", DEFAULT_TRASH_RETENTION),
+                source_device_workers=data.get("source_device_workers", DEFAULT_DEVICE_WORKERS),
+                target_device_workers=data.get("target_device_workers", DEFAULT_DEVICE_WORKERS)
             )
             project.project_file = filepath
             return project
@@ -57,6 +83,26 @@ class Project:
             print(f"加载项目失败: {e}")
             return None
     
+    def get_cache_dir(self) -> Optional[Path]:
+        """项目缓存目录（位于项目文件旁），项目未保存时返回 None"""
+        if not self.project_file:
+            return None
+        project_file = Path(self.project_file)
+        return project_file.parent / f"{project_file.stem}.cache"
+    
+    def get_journal_file(self) -> Optional[Path]:
+        """任务执行日志文件（位于项目文件旁，用于中断后恢复执行），项目未保存时返回 None"""
+        if not self.project_file:
+            return None
+        project_file = Path(self.project_file)
+        return project_file.parent / f"{project_file.stem}.journal"
+    
+    def get_trash_dir(self) -> Optional[Path]:
+        """回收站目录（位于收藏目录下，与游戏文件在同一磁盘），未设置收藏目录时返回 None"""
+        if not self.roms_path:
+            return None
+        return self.roms_path / TRASH_DIR_NAME
+    
     def is_valid(self) -> bool:
         """检查项目是否有效"""
         return bool(self.name and self.roms_path and self.source_path)
@@ -0,0 +1,210 @@
+"""
+任务执行日志模块
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional, Set, Tuple
+from core.metadata_parser import Game
+from core.task_system import Task, TaskType
+
+
+# 日志格式版本，结构变化时递增
+JOURNAL_VERSION = 1
+
+
+def _file_state(path) -> Optional[Tuple[int, int]]:
+    """文件的 (大小, mtime_ns)，不存在时为 None"""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return st.st_size, st.st_mtime_ns
+
+
+def game_record(game: Game) -> dict:
+    """游戏序列化为日志记录（懒加载字段在此解码）"""
+    return {
+        "game": game.game,
+        "file": game.file,
+        "sort_by": game.sort_by,
+        "developer": game.developer,
+        "description": game.description,
+        "extra_fields": dict(game.extra_fields),
+        "platform": game.platform,
+        "platform_path": str(game.platform_path) if game.platform_path else "",
+    }
+
+
+def game_from_record(record: dict) -> Game:
+    """由日志记录还原游戏"""
+    game = Game()
+    game.game = record.get("game", "")
+    game.file = record.get("file", "")
+    game.sort_by = record.get("sort_by", "")
+    game.developer = record.get("developer", "")
+    game.description = record.get("description", "")
+    game.extra_fields = dict(record.get("extra_fields") or {})
+    game.platform = record.get("platform", "")
+    game.platform_path = Path(record["platform_path"]) if record.get("platform_path") else None
+    return game
+
+
+class JournalState:
+    """中断的执行：计划的任务及已完成的部分"""
+    
+    def __init__(self, begin: dict):
+        self.time: str = begin.get("time", "")
+        self.roms_root: str = begin.get("roms_root", "")
+        self.headers: Dict[str, str] = dict(begin.get("headers") or {})
+        self.tasks: List[Tuple[TaskType, dict]] = [(TaskType[t["type"]], t["game"]) for t in begin.get("tasks", [])]
+        self.planned: Dict[str, str] = {}  # 目标文件 -> 来源文件
+        self.copied: Dict[str, Tuple[int, int]] = {}  # 目标文件 -> 复制时来源的 (大小, mtime_ns)
+        self.flushed: Set[str] = set()  # 已写入元数据的平台
+    
+    def pending_tasks(self) -> List[Tuple[TaskType, dict]]:
+        """尚未完成的任务：所属平台的元数据已写入的任务视为完成"""
+        return [(task_type, game) for task_type, game in self.tasks if game.get("platform") not in self.flushed]
+    
+    def is_copied(self, source, target) -> bool:
+        """目标文件已完整复制且来源未变化"""
+        recorded = self.copied.get(str(target))
+        if recorded is None or _file_state(source) != recorded:
+            return False
+        state = _file_state(target)
+        return state is not None and state[0] == recorded[0]
+    
+    def partial_files(self) -> List[str]:
+        """开始复制但未完成、大小与来源不一致的目标文件"""
+        partial = []
+        for target, source in self.planned.items():
+            if target in self.copied:
+                continue
+            state = _file_state(target)
+            source_state = _file_state(source)
+            if state is not None and (source_state is None or state[0] != source_state[0]):
+                partial.append(target)
+        return partial
+
+
+class TaskJournal:
+    """execute_tasks 的预写式日志，保存在项目文件旁
+    
+    执行开始时写入全部任务（含懒加载字段）和涉及平台的 Header，之后每次复制前后、
+    每个平台写入元数据后各追加一行 JSON；执行正常结束时删除日志。日志仍存在说明上次
+    执行中断（程序崩溃、磁盘拔出等），load() 读出计划及已完成的部分用于恢复执行。
+    计划和元数据写入记录会 fsync，复制记录只写入系统缓冲（程序崩溃不会丢失），
+    丢失的复制记录只会导致恢复时重新复制。截断的最后一行被忽略。可在多个线程中使用。
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = None
+        self._lock = threading.Lock()
+    
+    def exists(self) -> bool:
+        return self.path.exists()
+    
+    def begin(self, roms_root: Path, tasks: List[Task], headers: Dict[str, str]):
+        """开始一次执行：覆盖旧日志并写入计划"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._append({
+            "op": "begin",
+            "version": JOURNAL_VERSION,
+            "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+            "roms_root": str(roms_root),
+            "headers": headers,
+            "tasks": [{"type": task.task_type.name, "game": game_record(task.game)} for task in tasks],
+        }, sync=True)
+    
+    def copy_planned(self, source, target):
+        """即将复制（写入目标文件之前调用）"""
+        self._append({"op": "copy", "source": str(source), "target": str(target)})
+    
+    def copy_done(self, source, target):
+        """复制完成，记录来源的大小和修改时间"""
+        state = _file_state(source)
+        if state is not None:
+            self._append({"op": "copied", "target": str(target), "size": state[0], "mtime_ns": state[1]})
+    
+    def flushed(self, platform: str):
+        """平台的元数据已写入"""
+        self._append({"op": "flushed", "platform": platform}, sync=True)
+    
+    def finish(self):
+        """执行结束：关闭并删除日志"""
+        self.close()
+        try:
+            self.path.unlink()
+        except OSError:
+            pass
+    
+    def close(self):
+        """关闭日志文件（保留日志，用于执行异常中止时）"""
+        with self._lock:
+            if self._file:
+                self._file.close()
+                self._file = None
+    
+    def _append(self, record: dict, sync: bool = False):
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with self._lock:
+            if not self._file:
+                return
+            try:
+                self._file.write(line)
+                self._file.flush()
+                if sync:
+                    os.fsync(self._file.fileno())
+            except OSError:
+                # 日志所在磁盘不可写时停止记录，不影响任务执行
+                try:
+                    self._file.close()
+                except OSError:
+                    pass
+                self._file = None
+    
+    def load(self) -> Optional[JournalState]:
+        """读取中断的执行，日志不存在或无法识别时返回 None"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            return None
+        state = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            op = record.get("op")
+            if op == "begin":
+                if record.get("version") != JOURNAL_VERSION:
+                    return None
+                state = JournalState(record)
+            elif state is None:
+                continue
+            elif op == "copy":
+                state.planned[record["target"]] = record["source"]
+            elif op == "copied":
+                state.copied[record["target"]] = (record["size"], record["mtime_ns"])
+            elif op == "flushed":
+                state.flushed.add(record["platform"])
+        return state
+    
+    def discard(self) -> List[str]:
+        """放弃中断的执行：删除未复制完成的文件和日志，返回删除的文件"""
+        state = self.load()
+        removed = []
+        for target in state.partial_files() if state else []:
+            try:
+                os.unlink(target)
+                removed.append(target)
+            except OSError:
+                pass
+        self.finish()
+        return removed
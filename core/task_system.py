@@ -66,6 +66,10 @@ class TaskQueue:
         """清空任务队列"""
         self.tasks.clear()
     
+    def keep_pending(self):
+        """只保留待执行的任务（取消执行后移除已完成和失败的任务）"""
+        self.tasks = [t for t in self.tasks if t.status == TaskStatus.PENDING]
+    
     def get_task_count(self) -> dict:
         """获取任务统计"""
         count = {
@@ -0,0 +1,144 @@
+"""
+回收站模块
+"""
+
+import os
+import time
+import shutil
+import threading
+from pathlib import Path
+from typing import List, Optional
+from core.disk_usage import DiskUsage
+
+
+# 回收站目录名（位于 Roms 根目录下，与游戏文件在同一磁盘，移入只需重命名）
+TRASH_DIR_NAME = ".trash"
+# 默认保留的回收站大小
+DEFAULT_TRASH_RETENTION = 10 * 1024 * 1024 * 1024
+
+
+class TrashBatch:
+    """一次执行删除的游戏，目录结构与平台目录相同：
+    <平台>/<ROM 文件>、<平台>/media/<基名>/、<平台>/metadata.pegasus.txt（被删除的游戏块原文）
+    """
+    
+    def __init__(self, path: Path):
+        self.path = Path(path)
+    
+    @property
+    def name(self) -> str:
+        return self.path.name
+    
+    def platforms(self) -> List[str]:
+        try:
+            return sorted(entry.name for entry in os.scandir(self.path) if entry.is_dir())
+        except OSError:
+            return []
+    
+    def platform_path(self, platform: str) -> Path:
+        return self.path / platform
+    
+    def stage(self, source: Path, platform: str, relative: str) -> bool:
+        """把文件或目录移入回收站（<平台>/<relative>），不在同一磁盘等无法重命名时返回 False"""
+        target = self.path / platform / relative
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if target.exists():
+                # 同一批中重复删除同名文件时保留先删除的一份
+                return False
+            os.rename(source, target)
+            return True
+        except OSError:
+            return False
+    
+    def add_blocks(self, platform: str, blocks: List[bytes]):
+        """追加被删除的游戏块（每个平台每次执行写入一次）"""
+        platform_path = self.path / platform
+        (platform_path / "media").mkdir(parents=True, exist_ok=True)
+        with open(platform_path / "metadata.pegasus.txt", 'ab') as f:
+            for block in blocks:
+                f.write(block.rstrip(b'\r\n') + b'\n\n')
+    
+    def has_files(self) -> bool:
+        """是否还有 ROM 文件或 media 目录（元数据文件除外），无法读取时按有文件处理"""
+        for platform in self.platforms():
+            platform_path = self.path / platform
+            try:
+                with os.scandir(platform_path) as entries:
+                    if any(entry.name not in ("metadata.pegasus.txt", "media") for entry in entries):
+                        return True
+                with os.scandir(platform_path / "media") as entries:
+                    if any(True for _ in entries):
+                        return True
+            except FileNotFoundError:
+                continue
+            except OSError:
+                return True
+        return False
+    
+    def discard(self):
+        """永久删除"""
+        shutil.rmtree(self.path, ignore_errors=True)
+
+
+class Trash:
+    """项目的回收站：删除游戏时把 ROM 文件和 media 目录重命名移入，耗时与文件大小无关
+    
+    每次执行的删除为一批（按时间命名），可撤销最近一批。purge() 从最早的一批开始永久删除，
+    直到总大小不超过保留大小，purge_async() 在后台线程中进行。
+    """
+    
+    def __init__(self, root: Path, retention_bytes: int = DEFAULT_TRASH_RETENTION):
+        self.root = Path(root)
+        self.retention_bytes = max(0, retention_bytes)
+        self._usage = DiskUsage(1)
+        self._purge_lock = threading.Lock()
+    
+    def new_batch(self) -> TrashBatch:
+        """创建新的一批"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        for i in range(1000):
+            path = self.root / (stamp if i == 0 else f"{stamp}-{i}")
+            try:
+                path.mkdir()
+                return TrashBatch(path)
+            except FileExistsError:
+                continue
+        raise OSError(f"无法创建回收站目录: {self.root}")
+    
+    def batches(self) -> List[TrashBatch]:
+        """全部批次，最早的在前"""
+        try:
+            names = sorted(entry.name for entry in os.scandir(self.root) if entry.is_dir())
+        except OSError:
+            return []
+        return [TrashBatch(self.root / name) for name in names]
+    
+    def last_batch(self) -> Optional[TrashBatch]:
+        batches = self.batches()
+        return batches[-1] if batches else None
+    
+    def size(self) -> int:
+        return sum(self._usage.path_size(str(batch.path)) for batch in self.batches())
+    
+    def purge(self) -> int:
+        """从最早的一批开始永久删除，直到总大小不超过保留大小，返回删除的批次数"""
+        with self._purge_lock:
+            batches = self.batches()
+            sizes = [self._usage.path_size(str(batch.path)) for batch in batches]
+            total = sum(sizes)
+            purged = 0
+            for batch, size in zip(batches, sizes):
+                if total <= self.retention_bytes:
+                    break
+                batch.discard()
+                total -= size
+                purged += 1
+            return purged
+    
+    def purge_async(self) -> threading.Thread:
+        """在后台线程中清理"""
+        thread = threading.Thread(target=self.purge, name="trash-purge", daemon=True)
+        thread.start()
+        return thread
@@ -7,6 +7,7 @@
 import sys
 import os
 import ctypes
+import multiprocessing
 from pathlib import Path
 from ui.main_window import MainWindow
 from PyQt5.QtWidgets import QApplication
@@ -88,4 +89,6 @@ def main():
 
 
 if __name__ == "__main__":
+    # 打包后的程序中启用进程池（并行解析平台）所需
+    multiprocessing.freeze_support()
     main()
@@ -0,0 +1,200 @@
+"""
+游戏管理器测试
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from core.game_manager import GameManager
+from core.copy_engine import DEPLOY_COPY, DEPLOY_HARDLINK, DEPLOY_SYMLINK
+
+
+def write_metadata(platform_path: Path, descriptions: dict, extra_games: int = 0):
+    """写入元数据文件，并把修改时间推后以确保刷新能发现变化"""
+    blocks = ["collection: Test"]
+    for name, description in descriptions.items():
+        blocks.append(f"game: {name}\nfile: {name.lower()}.zip\ndescription: {description}")
+    for i in range(extra_games):
+        blocks.append(f"game: Extra {i}\nfile: extra{i}.zip")
+    metadata_file = platform_path / "metadata.pegasus.txt"
+    old_mtime = metadata_file.stat().st_mtime_ns if metadata_file.exists() else 0
+    metadata_file.write_text("\n\n".join(blocks) + "\n", encoding='utf-8')
+    mtime = max(metadata_file.stat().st_mtime_ns, old_mtime + 1_000_000_000)
+    os.utime(metadata_file, ns=(mtime, mtime))
+
+
+class RefreshTest(unittest.TestCase):
+    """增量刷新重新加载平台时复用原有的行"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.games = {f"Game{i}": f"first {i}" for i in range(50)}
+        for name in ("alpha", "beta"):
+            platform_path = self.root / name
+            (platform_path / "media").mkdir(parents=True)
+            write_metadata(platform_path, self.games)
+        self.manager = GameManager(self.root, lazy=True, workers=1)
+        self.manager.load_all_platforms()
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_repeated_refresh_keeps_row_count(self):
+        rows = len(self.manager.table)
+        self.assertEqual(rows, 100)
+        for round_ in range(5):
+            descriptions = {name: f"round {round_}" for name in self.games}
+            write_metadata(self.root / "alpha", descriptions)
+            changes = self.manager.refresh()
+            self.assertEqual(changes.metadata, {"alpha"})
+            self.assertEqual(len(self.manager.table), rows)
+            self.assertEqual(len(self.manager.get_all_games()), 100)
+            self.assertEqual(self.manager.get_platform_games("alpha")[0].description, f"round {round_}")
+        self.assertEqual(len(self.manager.get_all_games().filter("game1")), 22)
+    
+    def test_refresh_updates_held_games(self):
+        held = self.manager.get_platform_games("alpha")[3]
+        write_metadata(self.root / "alpha", dict(self.games, Game3="changed"))
+        self.manager.refresh()
+        self.assertEqual(held.description, "changed")
+        self.assertIn(held, self.manager.get_platform_games("alpha"))
+    
+    def test_refresh_appends_only_new_games(self):
+        write_metadata(self.root / "alpha", self.games, extra_games=5)
+        self.manager.refresh()
+        self.assertEqual(len(self.manager.table), 105)
+        self.assertEqual(len(self.manager.get_platform_games("alpha")), 55)
+        write_metadata(self.root / "alpha", self.games, extra_games=5)
+        self.manager.refresh()
+        self.assertEqual(len(self.manager.table), 105)
+    
+    def test_refresh_forgets_game_sizes(self):
+        game = self.manager.get_platform_games("alpha")[0]
+        self.assertEqual(self.manager.game_size(game), 0)
+        (self.root / "alpha" / game.file).write_bytes(b"x" * 100)
+        directory = self.root / "alpha"
+        mtime = directory.stat().st_mtime_ns + 1_000_000_000
+        os.utime(directory, ns=(mtime, mtime))
+        changes = self.manager.refresh()
+        self.assertEqual(changes.roms, {"alpha"})
+        self.assertIsNone(self.manager.disk_usage.cached_game_size(game))
+        self.assertEqual(self.manager.game_size(game), 100)
+
+
+class UndoRemovalTest(unittest.TestCase):
+    """撤销删除时仍有文件未恢复的回收站批次保留"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        (self.root / "alpha" / "media").mkdir(parents=True)
+        write_metadata(self.root / "alpha", {"Game0": "first"})
+        self.manager = GameManager(self.root, lazy=True, workers=1, trash_dir=self.root / ".trash")
+        self.manager.load_all_platforms()
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def stage_rom(self, relative: str):
+        rom = self.root / "alpha" / relative
+        rom.parent.mkdir(parents=True, exist_ok=True)
+        rom.write_bytes(b"rom")
+        batch = self.manager.trash.new_batch()
+        self.assertTrue(batch.stage(rom, "alpha", relative))
+        return batch
+    
+    def test_batch_without_metadata_is_kept(self):
+        batch = self.stage_rom("game0.zip")
+        self.assertEqual(self.manager.undo_last_removal(), 0)
+        self.assertTrue((batch.path / "alpha" / "game0.zip").exists())
+    
+    def test_failed_restore_keeps_batch(self):
+        batch = self.stage_rom("sub/game1.zip")
+        batch.add_blocks("alpha", [b"game: Game1\nfile: sub/game1.zip\n"])
+        # 原位置的父目录被同名文件占用，移回失败
+        shutil.rmtree(self.root / "alpha" / "sub")
+        (self.root / "alpha" / "sub").write_bytes(b"")
+        self.manager.undo_last_removal()
+        self.assertTrue((batch.path / "alpha" / "sub" / "game1.zip").exists())
+    
+    def test_restored_batch_is_discarded(self):
+        batch = self.stage_rom("game1.zip")
+        batch.add_blocks("alpha", [b"game: Game1\nfile: game1.zip\n"])
+        self.assertEqual(self.manager.undo_last_removal(), 1)
+        self.assertTrue((self.root / "alpha" / "game1.zip").exists())
+        self.assertFalse(batch.path.exists())
+    
+    def test_unstaged_file_is_kept(self):
+        rom = self.root / "alpha" / "game0.zip"
+        rom.write_bytes(b"rom")
+        self.manager._trash_batch = self.manager.trash.new_batch()
+        # 回收站中的平台目录被同名文件占用，无法移入
+        (self.manager._trash_batch.path / "alpha").write_bytes(b"")
+        with self.assertRaises(OSError):
+            self.manager._discard_path(rom, "alpha", "game0.zip")
+        self.assertTrue(rom.exists())
+
+
+class DiscoveryTest(unittest.TestCase):
+    """回收站等隐藏目录不作为平台或子目录列出"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        for name in ("alpha", ".trash", ".hidden"):
+            (self.root / name / "media").mkdir(parents=True)
+            write_metadata(self.root / name, {"Game0": "first"})
+        self.manager = GameManager(self.root, workers=1, trash_dir=self.root / ".trash")
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_hidden_directories_skipped(self):
+        self.assertEqual(self.manager.get_platform_names(), ["alpha"])
+        self.assertEqual(self.manager.discovery.platform_names(), ["alpha"])
+        self.assertEqual(sorted(self.manager.watcher.scan()), ["alpha"])
+
+
+class DeviceWorkersTest(unittest.TestCase):
+    """按设备设置的并发复制数在执行任务时交给复制引擎"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.manager = GameManager(self.root, workers=1)
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_limits_applied_on_execute(self):
+        self.manager.set_device_workers(self.root, 1)
+        self.manager.set_device_workers(self.root / "missing", 2)
+        self.assertEqual(self.manager.copy_engine._device_limits, {})
+        self.manager.execute_tasks()
+        self.assertEqual(self.manager.copy_engine._device_limits, {self.root.stat().st_dev: 1})
+
+
+class PlanCopyTest(unittest.TestCase):
+    """覆盖已有文件时计划需要的空间不为负数"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.manager = GameManager(self.root, workers=1)
+        self.source = self.root / "source.zip"
+        self.target = self.root / "target.zip"
+        self.source.write_bytes(b"s" * 10)
+        self.target.write_bytes(b"t" * 100)
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_overwrite_required_not_negative(self):
+        for mode in (DEPLOY_COPY, DEPLOY_HARDLINK, DEPLOY_SYMLINK):
+            with self.subTest(mode=mode):
+                self.manager.set_deploy_mode(mode)
+                op = self.manager._plan_copy(self.source, self.target, self.root.stat().st_dev)
+                self.assertTrue(op.overwrite)
+                self.assertEqual(op.required, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
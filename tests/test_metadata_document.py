@@ -0,0 +1,134 @@
+"""
+元数据文档模型测试
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from core.metadata_parser import MetadataParser
+from core.metadata_document import MetadataDocument
+
+
+SOURCE_METADATA = (
+    "collection: Source\n"
+    "\n"
+    "game: Alpha\n"
+    'file: "Alpha Game.zip"\n'
+    "Developer: Studio\n"
+    "assets.boxFront: media/Alpha Game/boxFront.png\n"
+    "x-ID: 42\n"
+    "description: first line\n"
+    "  second line\n"
+    "\n"
+    "game: Beta\n"
+    "file: beta.zip\n"
+)
+
+TARGET_METADATA = (
+    "collection: Target\n"
+    "\n"
+    "game: Gamma\n"
+    "file: gamma.zip\n"
+)
+
+APPENDED_BLOCK = SOURCE_METADATA.split("\n\n")[1] + "\n"
+
+
+def make_platform(root: Path, name: str, metadata: str) -> Path:
+    platform_path = root / name
+    (platform_path / "media").mkdir(parents=True)
+    (platform_path / "metadata.pegasus.txt").write_bytes(metadata.encode('utf-8'))
+    return platform_path
+
+
+class AppendedGameRoundTripTest(unittest.TestCase):
+    """追加到其他平台的游戏块应与来源块原文一致（懒加载与非懒加载相同）"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.source_path = make_platform(self.root, "source", SOURCE_METADATA)
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def append_alpha(self, lazy: bool) -> Path:
+        target_path = make_platform(self.root, f"target-{lazy}", TARGET_METADATA)
+        _, games = MetadataParser.parse_platform_directory(self.source_path, lazy=lazy)
+        doc = MetadataDocument.load(target_path / "metadata.pegasus.txt")
+        doc.append_game(games[0])
+        doc.save()
+        return target_path
+    
+    def test_appended_block_keeps_original_text(self):
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                target_path = self.append_alpha(lazy)
+                content = (target_path / "metadata.pegasus.txt").read_text(encoding='utf-8')
+                self.assertEqual(content, TARGET_METADATA + "\n" + APPENDED_BLOCK)
+    
+    def test_appended_game_parses_back(self):
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                target_path = self.append_alpha(lazy)
+                _, games = MetadataParser.parse_platform_directory(target_path)
+                self.assertEqual([game.game for game in games], ["Gamma", "Alpha"])
+                alpha = games[1]
+                self.assertEqual(alpha.file, "Alpha Game.zip")
+                self.assertEqual(alpha.developer, "Studio")
+                self.assertEqual(alpha.description, "first line\nsecond line")
+                self.assertEqual(alpha.extra_fields, {
+                    'assets.boxfront': "media/Alpha Game/boxFront.png",
+                    'x-id': "42",
+                })
+    
+    def test_modified_appended_game_keeps_other_fields(self):
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                target_path = make_platform(self.root, f"modified-{lazy}", TARGET_METADATA)
+                _, games = MetadataParser.parse_platform_directory(self.source_path, lazy=lazy)
+                alpha = games[0]
+                alpha.developer = "Other Studio"
+                doc = MetadataDocument.load(target_path / "metadata.pegasus.txt")
+                doc.append_game(alpha)
+                doc.save()
+                content = (target_path / "metadata.pegasus.txt").read_text(encoding='utf-8')
+                expected = APPENDED_BLOCK.replace("Developer: Studio", "Developer: Other Studio")
+                self.assertEqual(content, TARGET_METADATA + "\n" + expected)
+
+
+class ReplaceGameTest(unittest.TestCase):
+    """替换为内容相同的游戏时块保持不变"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.source_path = make_platform(self.root, "source", SOURCE_METADATA)
+        self.metadata_file = self.source_path / "metadata.pegasus.txt"
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_identical_game_keeps_block_clean(self):
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                _, old_games = MetadataParser.parse_platform_directory(self.source_path, lazy=lazy)
+                _, new_games = MetadataParser.parse_platform_directory(self.source_path, lazy=lazy)
+                doc = MetadataDocument.load(self.metadata_file)
+                for old_game, new_game in zip(old_games, new_games):
+                    doc.replace_game(old_game, new_game)
+                self.assertFalse(doc.is_dirty)
+    
+    def test_changed_game_marks_block_dirty(self):
+        _, old_games = MetadataParser.parse_platform_directory(self.source_path)
+        _, new_games = MetadataParser.parse_platform_directory(self.source_path)
+        new_games[1].developer = "Studio"
+        doc = MetadataDocument.load(self.metadata_file)
+        doc.replace_game(old_games[1], new_games[1])
+        self.assertTrue(doc.is_dirty)
+        doc.save()
+        self.assertEqual(self.metadata_file.read_text(encoding='utf-8'),
+                         SOURCE_METADATA + "developer: Studio\n")
+
+
+if __name__ == '__main__':
+    unittest.main()
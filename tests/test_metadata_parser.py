@@ -0,0 +1,110 @@
+"""
+元数据解析测试
+"""
+
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from core.metadata_parser import MetadataParser
+
+
+METADATA = (
+    "collection: Test\n"
+    "launch: emulator\n"
+    "  --fullscreen\n"
+    "\n"
+    "game: Alpha\n"
+    'file: "Alpha Game.zip"\n'
+    "Developer : Studio: Two\n"
+    "assets.boxFront: media/Alpha Game/boxFront.png\n"
+    "description: first line  \n"
+    "  second line\n"
+    "\tthird line\n"
+    "\n"
+    "\n"
+    "# game: Commented\n"
+    "file: commented.zip\n"
+    "\n"
+    "game: Beta\n"
+    "file:beta.zip\n"
+    "x-id: 1\n"
+    "x-id: 2\n"
+    "\n"
+    "game: 伽马\n"
+    "file: gamma.zip\n"
+    "description: 中文\n"
+    "继续\n"
+    "sort-by: 003"
+)
+
+EXPECTED = [
+    {'game': 'Alpha', 'file': '"Alpha Game.zip"', 'developer': 'Studio: Two',
+     'assets.boxfront': 'media/Alpha Game/boxFront.png', 'description': 'first line\nsecond line\nthird line'},
+    {'game': 'Beta', 'file': 'beta.zip', 'x-id': '2'},
+    {'game': '伽马', 'file': 'gamma.zip', 'description': '中文\n继续', 'sort-by': '003'},
+]
+
+
+def field_blocks(data: bytes, chunk_size: int = 0) -> list:
+    """按 chunk_size 切分数据后解析，返回 (块内容, 字段字典) 列表"""
+    chunks = [data[i:i + chunk_size] for i in range(0, len(data), chunk_size)] if chunk_size else [data]
+    return [(data[start:end].rstrip(b'\r\n'), fields)
+            for start, end, fields in MetadataParser._iter_field_blocks(chunks)]
+
+
+class FieldBlocksTest(unittest.TestCase):
+    """按空行切分的游戏块与字段，和换行符、分块读取的位置无关"""
+    
+    def setUp(self):
+        self.data = METADATA.encode('utf-8').split(b'\n\n', 1)[1]
+        self.expected = field_blocks(self.data)
+    
+    def test_fields(self):
+        self.assertEqual([fields for _, fields in self.expected], EXPECTED)
+    
+    def test_chunk_boundaries(self):
+        for chunk_size in (1, 2, 3, 7, 64):
+            with self.subTest(chunk_size=chunk_size):
+                self.assertEqual(field_blocks(self.data, chunk_size), self.expected)
+    
+    def test_newlines(self):
+        lines = self.data.split(b'\n')
+        for newline in (b'\r\n', b'\r'):
+            with self.subTest(newline=newline):
+                blocks = field_blocks(newline.join(lines), 5)
+                self.assertEqual([fields for _, fields in blocks], EXPECTED)
+                self.assertEqual([text.replace(newline, b'\n') for text, _ in blocks],
+                                 [text for text, _ in self.expected])
+        mixed = b''.join(line + (b'\r\n', b'\n', b'\r')[i % 3] for i, line in enumerate(lines))
+        self.assertEqual([fields for _, fields in field_blocks(mixed)], EXPECTED)
+
+
+class ParsePlatformTest(unittest.TestCase):
+    """解析平台目录（懒加载与非懒加载结果相同）"""
+    
+    def setUp(self):
+        self.root = Path(tempfile.mkdtemp())
+        self.platform_path = self.root / "test"
+        (self.platform_path / "media").mkdir(parents=True)
+        (self.platform_path / "metadata.pegasus.txt").write_bytes(METADATA.encode('utf-8'))
+    
+    def tearDown(self):
+        shutil.rmtree(self.root, ignore_errors=True)
+    
+    def test_parse(self):
+        for lazy in (False, True):
+            with self.subTest(lazy=lazy):
+                header, games = MetadataParser.parse_platform_directory(self.platform_path, lazy)
+                self.assertEqual(header, "collection: Test\nlaunch: emulator\n  --fullscreen")
+                self.assertEqual([(g.game, g.file, g.sort_by, g.developer, g.description, g.extra_fields)
+                                  for g in games], [
+                    ('Alpha', 'Alpha Game.zip', '', 'Studio: Two', 'first line\nsecond line\nthird line',
+                     {'assets.boxfront': 'media/Alpha Game/boxFront.png'}),
+                    ('Beta', 'beta.zip', '', '', '', {'x-id': '2'}),
+                    ('伽马', 'gamma.zip', '003', '', '中文\n继续', {}),
+                ])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,178 @@
+"""
+执行计划对话框
+"""
+
+from pathlib import Path
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
+                             QPushButton, QListWidget, QTreeWidget, QTreeWidgetItem)
+from PyQt5.QtCore import QThread, pyqtSignal
+from PyQt5.QtGui import QColor
+from core.disk_usage import format_size
+from core.execution_plan import ExecutionPlan, OP_COPY, OP_DELETE
+from core.task_system import TaskType
+from core.i18n import tr
+from core.theme import load_icon
+
+
+class PlanWorker(QThread):
+    """在后台线程中生成执行计划（需要 stat 每个来源和目标文件）"""
+    
+    finished = pyqtSignal(object)  # ExecutionPlan，失败时为异常
+    
+    def __init__(self, game_manager):
+        super().__init__()
+        self.game_manager = game_manager
+    
+    def run(self):
+        try:
+            result = self.game_manager.plan_tasks()
+        except Exception as e:
+            result = e
+        self.finished.emit(result)
+
+
+class ExecutionPlanDialog(QDialog):
+    """执行前的计划预览：文件操作、目标磁盘空间和冲突，确认后才执行任务
+    
+    空间不足时不能执行；生成计划不修改任何文件，取消即为一次空运行。
+    """
+    
+    def __init__(self, game_manager, parent=None):
+        super().__init__(parent)
+        self.game_manager = game_manager
+        self.plan: ExecutionPlan = None
+        self.init_ui()
+        
+        self.worker = PlanWorker(game_manager)
+        self.worker.finished.connect(self.on_plan_ready)
+        self.worker.start()
+    
+    def init_ui(self):
+        """初始化UI"""
+        self.setWindowTitle(tr("confirm_exec_title"))
+        icon_path = Path(__file__).parent.absolute() / "icon" / "pegasus.ico"
+        self.setWindowIcon(load_icon(icon_path))
+        self.setModal(True)
+        self.resize(800, 600)
+        
+        layout = QVBoxLayout()
+        self.setLayout(layout)
+        
+        # 汇总
+        self.summary_label = QLabel(tr("plan_computing"))
+        self.summary_label.setWordWrap(True)
+        layout.addWidget(self.summary_label)
+        
+        # 空间不足提示
+        self.space_label = QLabel()
+        self.space_label.setStyleSheet("color: #F44336; font-weight: bold;")
+        self.space_label.hide()
+        layout.addWidget(self.space_label)
+        
+        # 冲突和来源缺失等问题
+        self.issues_label = QLabel()
+        self.issues_label.hide()
+        layout.addWidget(self.issues_label)
+        
+        self.issues_list = QListWidget()
+        self.issues_list.setMaximumHeight(150)
+        self.issues_list.hide()
+        layout.addWidget(self.issues_list)
+        
+        # 每个任务的文件操作
+        self.operations_tree = QTreeWidget()
+        self.operations_tree.setHeaderLabels([tr("plan_col_operation"), tr("plan_col_target"),
+                                              tr("plan_col_size"), tr("plan_col_note")])
+        self.operations_tree.setColumnWidth(0, 260)
+        self.operations_tree.setColumnWidth(1, 320)
+        layout.addWidget(self.operations_tree)
+        
+        # 按钮
+        button_layout = QHBoxLayout()
+        button_layout.addStretch()
+        
+        self.execute_btn = QPushButton(tr("btn_execute"))
+        self.execute_btn.setEnabled(False)
+        self.execute_btn.clicked.connect(self.accept)
+        button_layout.addWidget(self.execute_btn)
+        
+        cancel_btn = QPushButton(tr("btn_cancel"))
+        cancel_btn.clicked.connect(self.reject)
+        button_layout.addWidget(cancel_btn)
+        
+        layout.addLayout(button_layout)
+    
+    def on_plan_ready(self, result):
+        """计划生成完成"""
+        if isinstance(result, Exception):
+            self.summary_label.setText(tr("plan_failed", error=str(result)))
+            return
+        plan = self.plan = result
+        
+        task_count = self.game_manager.task_queue.get_task_count()
+        lines = [
+            tr("plan_tasks",
+               add=task_count[TaskType.ADD],
+               remove=task_count[TaskType.REMOVE],
+               update=task_count[TaskType.UPDATE]),
+            tr("plan_copy",
+               count=plan.count(OP_COPY, unchanged=False),
+               size=format_size(plan.copy_bytes),
+               overwrite=plan.count(OP_COPY, overwrite=True, unchanged=False),
+               unchanged=plan.count(OP_COPY, unchanged=True)),
+            tr("plan_delete", count=plan.count(OP_DELETE), size=format_size(plan.delete_bytes)),
+        ]
+        if plan.free_bytes is None:
+            lines.append(tr("plan_space_unknown", required=format_size(plan.required_bytes)))
+        else:
+            lines.append(tr("plan_space", required=format_size(plan.required_bytes),
+                            free=format_size(plan.free_bytes)))
+        self.summary_label.setText("\n".join(lines))
+        
+        issues = plan.issues()
+        if issues:
+            self.issues_label.setText(tr("plan_issues", count=len(issues)))
+            self.issues_list.addItems([f"{task}: {issue}" for task, issue in issues])
+            self.issues_label.show()
+            self.issues_list.show()
+        
+        self._fill_operations(plan)
+        
+        if plan.has_enough_space:
+            self.execute_btn.setEnabled(True)
+        else:
+            self.space_label.setText(tr("plan_no_space"))
+            self.space_label.show()
+    
+    def _fill_operations(self, plan: ExecutionPlan):
+        """按任务列出文件操作"""
+        unchanged_color = QColor("#808080")
+        overwrite_color = QColor("#FF9800")
+        items = []
+        for task_plan in plan.tasks:
+            task_item = QTreeWidgetItem([str(task_plan.task)])
+            for op in task_plan.operations:
+                if op.unchanged:
+                    note = tr("plan_unchanged")
+                elif op.overwrite:
+                    note = tr("plan_overwrite")
+                else:
+                    note = ""
+                op_item = QTreeWidgetItem([tr(f"plan_op_{op.kind}"), str(op.target),
+                                           format_size(op.size), note])
+                if op.source is not None:
+                    op_item.setToolTip(1, str(op.source))
+                if op.unchanged:
+                    for column in range(4):
+                        op_item.setForeground(column, unchanged_color)
+                elif op.overwrite:
+                    op_item.setForeground(3, overwrite_color)
+                task_item.addChild(op_item)
+            items.append(task_item)
+        self.operations_tree.addTopLevelItems(items)
+    
+    def reject(self):
+        """取消时等待计划线程结束，避免线程在对话框销毁后仍在运行"""
+        if self.worker.isRunning():
+            self.worker.wait()
+        super().reject()
@@ -9,6 +9,8 @@ from PyQt5.QtCore import Qt, pyqtSignal, QSize, QEvent, QTimer
 from PyQt5.QtGui import QIcon, QPixmap, QKeySequence, QColor
 from typing import List, Set, Optional
 from core.metadata_parser import Game
+from core.game_table import GameRows
+from core.platform import MEDIA_ASSETS, ASSET_BITS
 from core.task_system import TaskQueue, TaskType
 from core.i18n import tr
 from core.theme import apply_titlebar_theme
@@ -30,6 +32,7 @@ class GameListWidget(QWidget):
         self.task_queue: Optional[TaskQueue] = None
         self.duplicate_checker = None  # 检查项目中是否已存在
         self.filter_text: str = ""
+        self.asset_filter: int = 0  # 必须具有的媒体资源位掩码
         # 分页配置
         self.page_size: int = 200
         self.current_page: int = 1
@@ -70,6 +73,21 @@ class GameListWidget(QWidget):
         
         layout.addLayout(search_layout)
         
+        # 媒体资源筛选（按预先计算的资源位掩码，不访问磁盘）
+        assets_layout = QHBoxLayout()
+        self.assets_label = QLabel(tr("assets_label"))
+        assets_layout.addWidget(self.assets_label)
+        self.asset_buttons = {}
+        for name, _ in MEDIA_ASSETS:
+            button = QPushButton(tr(f"asset_{name}"))
+            button.setCheckable(True)
+            button.setToolTip(tr("assets_tooltip"))
+            button.toggled.connect(self.on_asset_filter_changed)
+            assets_layout.addWidget(button)
+            self.asset_buttons[name] = button
+        assets_layout.addStretch()
+        layout.addLayout(assets_layout)
+        
         # 统计
         self.count_label = QLabel(tr("game_count_label", total=0, selected=0))
         layout.addWidget(self.count_label)
@@ -153,6 +171,10 @@ class GameListWidget(QWidget):
         self.search_label.setText(tr("search_label"))
         self.search_box.setPlaceholderText(tr("search_placeholder"))
         self.platform_label_ui.setText(tr("platform_label"))
+        self.assets_label.setText(tr("assets_label"))
+        for name, button in self.asset_buttons.items():
+            button.setText(tr(f"asset_{name}"))
+            button.setToolTip(tr("assets_tooltip"))
         # 下拉框需要特殊处理第一个元素
         self.platform_combo.setItemText(0, tr("all_platforms"))
         self.prev_page_btn.setText(tr("prev_page"))
@@ -207,8 +229,9 @@ class GameListWidget(QWidget):
 
             item = QListWidgetItem(item_text)
 
+            # get_logo_path 只返回已存在的文件（有 media 索引时不访问磁盘）
             logo_path = game.get_logo_path()
-            if logo_path and logo_path.exists():
+            if logo_path:
                 icon = QIcon(str(logo_path))
                 item.setIcon(icon)
 
@@ -388,6 +411,14 @@ class GameListWidget(QWidget):
         self.filter_text = text or ""
         self.apply_filters(show_loading=True, message=tr("filtering"))
     
+    def on_asset_filter_changed(self, checked: bool):
+        """媒体资源筛选按钮切换"""
+        self.asset_filter = 0
+        for name, button in self.asset_buttons.items():
+            if button.isChecked():
+                self.asset_filter |= ASSET_BITS[name]
+        self.apply_filters(show_loading=True, message=tr("filtering"))
+    
     def on_platform_changed(self, index: int):
         """平台下拉选择变更"""
         self.apply_filters(show_loading=True, message=tr("filtering"))
@@ -396,26 +427,32 @@ class GameListWidget(QWidget):
         self.platform_changed.emit(self.get_current_platform() or "")
     
     def apply_filters(self, show_loading: bool = False, message: str = ""):
-        """应用搜索与平台筛选"""
+        """应用搜索、平台与媒体资源筛选"""
         if show_loading:
             self._start_loading(message or tr("loading_games"))
         try:
             self.current_page = 1
             text = (self.filter_text or "").strip().lower()
             selected_platform = self.platform_combo.currentData()
-            filtered = []
-            for game in self.games:
-                platform_name = (game.platform or "")
-                if selected_platform and platform_name != selected_platform:
-                    continue
-                if text:
-                    developer = (game.developer or "")
-                    if (text not in game.game.lower() and
-                        text not in platform_name.lower() and
-                        text not in developer.lower()):
+            if isinstance(self.games, GameRows):
+                # 列式存储：按平台 id、拼接后的搜索文本和资源位掩码批量筛选
+                self.filtered_games = self.games.filter(text, selected_platform, self.asset_filter)
+            else:
+                filtered = []
+                for game in self.games:
+                    platform_name = (game.platform or "")
+                    if selected_platform and platform_name != selected_platform:
+                        continue
+                    if text:
+                        developer = (game.developer or "")
+                        if (text not in game.game.lower() and
+                            text not in platform_name.lower() and
+                            text not in developer.lower()):
+                            continue
+                    if self.asset_filter and game.asset_mask & self.asset_filter != self.asset_filter:
                         continue
-                filtered.append(game)
-            self.filtered_games = filtered
+                    filtered.append(game)
+                self.filtered_games = filtered
             self.update_list()
         finally:
             if show_loading:
@@ -4,25 +4,42 @@
 
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QTextEdit, QPushButton,
                              QHBoxLayout, QLabel, QProgressBar)
-from PyQt5.QtCore import Qt, pyqtSignal, QThread
+from PyQt5.QtCore import Qt, pyqtSignal, QThread, QTimer
 from PyQt5.QtGui import QTextCursor, QColor, QIcon
 from pathlib import Path
+from typing import Optional
 from core.i18n import tr
 from core.theme import load_icon
+from core.copy_engine import TransferProgress
+from core.disk_usage import format_size
+
+
+# 字节进度的刷新间隔（毫秒）
+PROGRESS_INTERVAL_MS = 500
+
+
+def _format_eta(seconds: Optional[float]) -> str:
+    """剩余时间格式化为 M:SS 或 H:MM:SS"""
+    if seconds is None:
+        return "--:--"
+    minutes, secs = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}" if hours else f"{minutes}:{secs:02d}"
 
 
 class TaskExecutor(QThread):
-    """任务执行线程"""
+    """任务执行线程，progress 提供字节进度以及暂停、取消"""
     
     finished = pyqtSignal(dict)
     
     def __init__(self, game_manager):
         super().__init__()
         self.game_manager = game_manager
+        self.progress = TransferProgress()
     
     def run(self):
         """执行任务"""
-        results = self.game_manager.execute_tasks()
+        results = self.game_manager.execute_tasks(self.progress)
         self.finished.emit(results)
 
 
@@ -33,8 +50,13 @@ class LogWindow(QDialog):
     
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.executor: Optional[TaskExecutor] = None
         self.init_ui()
         self.log_signal.connect(self._do_log)
+        # 定时刷新字节进度、速度和剩余时间
+        self.progress_timer = QTimer(self)
+        self.progress_timer.setInterval(PROGRESS_INTERVAL_MS)
+        self.progress_timer.timeout.connect(self._update_progress)
     
     def init_ui(self):
         """初始化UI"""
@@ -72,6 +94,17 @@ class LogWindow(QDialog):
         # 按钮
         button_layout = QHBoxLayout()
         
+        # 暂停/继续、停止（在数据块之间生效）
+        self.pause_btn = QPushButton(tr("btn_pause"))
+        self.pause_btn.clicked.connect(self.toggle_pause)
+        self.pause_btn.setEnabled(False)
+        button_layout.addWidget(self.pause_btn)
+        
+        self.stop_btn = QPushButton(tr("btn_stop"))
+        self.stop_btn.clicked.connect(self.stop_execution)
+        self.stop_btn.setEnabled(False)
+        button_layout.addWidget(self.stop_btn)
+        
         self.close_text = tr("btn_cancel")
         self.close_btn = QPushButton(self.close_text)
         self.close_btn.clicked.connect(self.accept)
@@ -128,18 +161,59 @@ class LogWindow(QDialog):
         
         # 启动线程
         self.executor.start()
+        self.pause_btn.setEnabled(True)
+        self.stop_btn.setEnabled(True)
+        self.progress_timer.start()
+    
+    def toggle_pause(self):
+        """暂停或继续执行"""
+        progress = self.executor.progress
+        if progress.paused:
+            progress.resume()
+            self.pause_btn.setText(tr("btn_pause"))
+        else:
+            progress.pause()
+            self.pause_btn.setText(tr("btn_resume"))
+        self._update_progress()
+    
+    def stop_execution(self):
+        """取消执行：正在复制的文件在下一块之前中止，已完成的任务照常写入元数据"""
+        self.executor.progress.cancel()
+        self.pause_btn.setEnabled(False)
+        self.stop_btn.setEnabled(False)
+        self.log(tr("log_cancelling"), "warning")
+    
+    def _update_progress(self):
+        """按字节进度更新进度条，状态栏显示已复制/总量、平均速度和剩余时间"""
+        progress = self.executor.progress
+        if progress.total_bytes <= 0:
+            return
+        self.progress_bar.setRange(0, 1000)
+        self.progress_bar.setValue(min(1000, progress.done_bytes * 1000 // progress.total_bytes))
+        text = tr("log_progress",
+                  done=format_size(progress.done_bytes),
+                  total=format_size(progress.total_bytes),
+                  rate=format_size(int(progress.rate())),
+                  eta=_format_eta(progress.eta()))
+        if progress.paused:
+            text += " " + tr("log_paused")
+        self.status_label.setText(text)
     
     def on_execution_finished(self, results: dict):
         """任务执行完成"""
+        self.progress_timer.stop()
+        self.pause_btn.setEnabled(False)
+        self.stop_btn.setEnabled(False)
         self.progress_bar.setRange(0, 1)
         self.progress_bar.setValue(1)
         
+        finished_text = tr("log_cancelled", count=results['cancelled']) if results.get('cancelled') else tr("log_finished")
         self.log("=" * 60, "info")
-        self.log(tr("log_finished"), "success")
+        self.log(finished_text, "warning" if results.get('cancelled') else "success")
         # 这里为了保持灵活性，不强制翻译内部的任务详情，因为 task_queue 可能会产生复杂的细节
         self.log("=" * 60, "info")
         
-        self.status_label.setText(tr("log_finished"))
+        self.status_label.setText(finished_text)
         self.close_btn.setEnabled(True)
         self.close_btn.setText(self.close_text)
 
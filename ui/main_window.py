@@ -9,18 +9,20 @@ import shutil
 from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
                              QSplitter, QPushButton, QLabel, QFileDialog,
                              QMessageBox, QInputDialog, QAction, QToolBar, QMenu,
-                             QSizePolicy, QProgressDialog, QApplication)
-from PyQt5.QtCore import Qt, QSettings, QTimer, QPoint
+                             QSizePolicy, QProgressDialog, QApplication, QDialog)
+from PyQt5.QtCore import Qt, QSettings, QTimer, QPoint, QEventLoop, QFileSystemWatcher, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon, QKeySequence
 from core.project import Project
 from core.game_manager import GameManager
+from core.platform import Platform
+from core.disk_usage import DiskUsage, SizeTotal, format_size
 from core.task_system import TaskType
 from core.i18n import tr, set_lang, get_lang
 from core.theme import build_stylesheet, available_themes, apply_titlebar_theme, load_icon
-from core.metadata_parser import MetadataParser
 from ui.game_list_widget import GameListWidget
 from ui.game_detail_widget import GameDetailWidget
 from ui.log_window import LogWindow
+from ui.execution_plan_dialog import ExecutionPlanDialog
 from ui.about_dialog import AboutDialog
 from ui.project_settings_dialog import ProjectSettingsDialog
 from ui.startup_dialog import StartupDialog
@@ -29,6 +31,24 @@ from ui.metadata_extract_dialog import MetadataExtractDialog
 from ui.metadata_merge_dialog import MetadataMergeDialog
 
 
+class DiskUsageWorker(QThread):
+    """后台统计游戏占用空间，每完成一批发出 progress 信号（结果保存在 DiskUsage 缓存中）"""
+    progress = pyqtSignal()
+    
+    def __init__(self, usage: DiskUsage, games: list, parent=None):
+        super().__init__(parent)
+        self.usage = usage
+        self.games = games
+    
+    def run(self):
+        batch = self.usage.workers * 16
+        for start in range(0, len(self.games), batch):
+            if self.isInterruptionRequested():
+                return
+            self.usage.game_sizes(self.games[start:start + batch])
+            self.progress.emit()
+
+
 class MainWindow(QMainWindow):
     """主窗口"""
     
@@ -38,6 +58,12 @@ class MainWindow(QMainWindow):
         self.source_manager = None
         self.project_manager = None
         self.current_view = "source"  # "source" or "project"
+        self._executing_tasks = False  # 执行任务期间不刷新游戏库
+        # 选中游戏和待添加任务的占用空间（集合变化时只统计新增的游戏）
+        self._selection_size: SizeTotal = None
+        self._queue_size: SizeTotal = None
+        self._disk_usage_worker: DiskUsageWorker = None
+        self._disk_usage_pending: list = []  # 后台统计进行中时新增的待统计游戏
         
         # 初始化设置
         self.settings = QSettings("PegasusGameFilter", "App")
@@ -97,8 +123,27 @@ class MainWindow(QMainWindow):
         self.status_label = QLabel(tr("status_no_project"))
         self.statusBar().addWidget(self.status_label)
         
+        self.missing_roms_label = QLabel()
+        self.statusBar().addPermanentWidget(self.missing_roms_label)
+        
+        self.disk_usage_label = QLabel()
+        self.statusBar().addPermanentWidget(self.disk_usage_label)
+        
         self.task_count_label = QLabel(tr("status_tasks", count=0))
         self.statusBar().addPermanentWidget(self.task_count_label)
+        
+        # 游戏库变化检测：文件系统通知触发检测（合并短时间内的多次通知），
+        # 并定时轮询作为补充（网络共享目录上文件系统通知不可靠）
+        self.library_watcher = QFileSystemWatcher(self)
+        self.library_watcher.directoryChanged.connect(self._on_library_path_changed)
+        self.library_watcher.fileChanged.connect(self._on_library_path_changed)
+        self.library_change_timer = QTimer(self)
+        self.library_change_timer.setSingleShot(True)
+        self.library_change_timer.setInterval(500)
+        self.library_change_timer.timeout.connect(self._refresh_current_view)
+        self.library_poll_timer = QTimer(self)
+        self.library_poll_timer.setInterval(10000)
+        self.library_poll_timer.timeout.connect(self._refresh_current_view)
     
     def create_menu_bar(self):
         """创建菜单栏"""
@@ -151,6 +196,12 @@ class MainWindow(QMainWindow):
         merge_action.setShortcut(QKeySequence("Ctrl+Alt+M"))
         merge_action.triggered.connect(self.merge_metadata_tool)
         tools_menu.addAction(merge_action)
+        
+        tools_menu.addSeparator()
+        undo_removal_action = QAction(tr("menu_undo_removal"), self)
+        undo_removal_action.setShortcut(QKeySequence("Ctrl+Alt+Z"))
+        undo_removal_action.triggered.connect(self.undo_last_removal)
+        tools_menu.addAction(undo_removal_action)
 
         # 设置菜单 (包含语言和主题)
         settings_menu = menubar.addMenu(tr("menu_settings"))
@@ -528,14 +579,25 @@ class MainWindow(QMainWindow):
     def init_managers(self):
         """初始化游戏管理器"""
         try:
-            # 加载来源目录游戏
-            self.source_manager = GameManager(self.project.source_path)
-            self.source_manager.load_all_platforms()
+            cache_dir = self.project.get_cache_dir()
+            # 游戏对象共享的平台实体只属于当前项目
+            Platform.clear_shared()
+            
+            # 加载来源目录游戏（懒加载描述等字段，降低大型游戏库的内存占用）
+            self.source_manager = GameManager(self.project.source_path, cache_dir, lazy=True)
+            self._load_platforms(self.source_manager)
             
             # 加载项目游戏
             self.project.roms_path.mkdir(parents=True, exist_ok=True)
-            self.project_manager = GameManager(self.project.roms_path)
-            self.project_manager.load_all_platforms()
+            self.project_manager = GameManager(self.project.roms_path, cache_dir, lazy=True,
+                                               journal_file=self.project.get_journal_file(),
+                                               trash_dir=self.project.get_trash_dir())
+            self.project_manager.set_deploy_mode(self.project.deploy_mode)
+            self.project_manager.set_trash_retention(self.project.trash_retention)
+            self.project_manager.set_sync_compare(self.project.sync_compare)
+            self.project_manager.set_device_workers(self.project.source_path, self.project.source_device_workers)
+            self.project_manager.set_device_workers(self.project.roms_path, self.project.target_device_workers)
+            self._load_platforms(self.project_manager)
             
             # 显示来源目录游戏
             self.current_view = "source"
@@ -543,10 +605,147 @@ class MainWindow(QMainWindow):
             self.game_list.set_platforms(self.source_manager.get_platform_names())
             self.game_list.set_task_queue(self.project_manager.task_queue)
             self.game_list.set_duplicate_checker(lambda g: self.project_manager.has_game(g) if self.project_manager else False)
+            self._update_watched_paths()
+            self.library_poll_timer.start()
+            self._reset_disk_usage()
+            self._offer_resume()
             
         except Exception as e:
             QMessageBox.critical(self, tr("error"), tr("msg_init_failed", error=str(e)))
     
+    def _offer_resume(self):
+        """上次执行中断时询问是否恢复：恢复则跳过已完成的部分继续执行，否则删除未复制完成的文件"""
+        state = self.project_manager.interrupted_execution()
+        if state is None:
+            return
+        msg = tr("resume_exec_msg", time=state.time, count=len(state.pending_tasks()),
+                 partial=len(state.partial_files()))
+        reply = QMessageBox.question(self, tr("resume_exec_title"), msg, QMessageBox.Yes | QMessageBox.No)
+        if reply == QMessageBox.Yes:
+            self.project_manager.resume_tasks(self.source_manager)
+            self.update_task_count()
+            self.execute_tasks()
+        else:
+            removed = self.project_manager.discard_interrupted_execution()
+            self.statusBar().showMessage(tr("resume_discarded", count=len(removed)), 3000)
+    
+    def _load_platforms(self, manager: GameManager):
+        """加载管理器的全部平台，状态栏显示进度，完成后提示加载失败的平台"""
+        manager.load_all_platforms(self._on_load_progress)
+        if self.project:
+            self.status_label.setText(tr("status_project", name=self.project.name))
+        self._update_missing_roms_label()
+        if manager.load_errors:
+            errors = "\n".join(f"{name}: {error}" for name, error in manager.load_errors.items())
+            QMessageBox.warning(self, tr("warning"), tr("msg_platform_load_errors", errors=errors))
+    
+    def _refresh_platforms(self, manager: GameManager) -> bool:
+        """增量刷新管理器（只重新加载文件有变化的平台），返回是否有变化"""
+        changes = manager.refresh()
+        if not changes:
+            return False
+        self._update_watched_paths()
+        self._update_missing_roms_label()
+        failed = [name for name in changes.added | changes.metadata if name in manager.load_errors]
+        if failed:
+            errors = "\n".join(f"{name}: {manager.load_errors[name]}" for name in failed)
+            QMessageBox.warning(self, tr("warning"), tr("msg_platform_load_errors", errors=errors))
+        return True
+    
+    def _update_watched_paths(self):
+        """监视两个管理器的 Roms 根目录、平台目录、media 目录和元数据文件"""
+        current = self.library_watcher.directories() + self.library_watcher.files()
+        if current:
+            self.library_watcher.removePaths(current)
+        for manager in (self.source_manager, self.project_manager):
+            if manager:
+                directories, files = manager.watcher.watched_paths()
+                self.library_watcher.addPaths(directories + files)
+    
+    def _on_library_path_changed(self, path: str):
+        self.library_change_timer.start()
+    
+    def _refresh_current_view(self):
+        """游戏库有变化时刷新当前视图（另一视图在切换时刷新）"""
+        if not self.project or self._executing_tasks:
+            return
+        manager = self.project_manager if self.current_view == "project" else self.source_manager
+        if manager and self._refresh_platforms(manager):
+            self.game_list.set_games(manager.get_all_games())
+            self.game_list.set_platforms(manager.get_platform_names())
+    
+    def _update_missing_roms_label(self):
+        """状态栏显示当前视图缺失 ROM 文件的游戏数（使用加载时建立的 ROM 列表，不访问磁盘）"""
+        manager = self.project_manager if self.current_view == "project" else self.source_manager
+        count = manager.count_missing_files() if self.project and manager else 0
+        self.missing_roms_label.setText(tr("status_missing_roms", count=count) if count else "")
+    
+    def _reset_disk_usage(self):
+        """重新创建占用空间统计（管理器或视图切换后，选中的游戏属于当前视图的管理器）"""
+        self._disk_usage_pending = []
+        self._stop_disk_usage_worker()
+        manager = self.project_manager if self.current_view == "project" else self.source_manager
+        self._selection_size = SizeTotal(manager.disk_usage) if manager else None
+        # 添加任务的游戏来自来源目录
+        self._queue_size = SizeTotal(self.source_manager.disk_usage) if self.source_manager else None
+        self._update_disk_usage()
+    
+    def _update_disk_usage(self):
+        """选中游戏或任务变化时增量更新占用空间，未统计的游戏交给后台线程"""
+        if not (self._selection_size and self._queue_size and self.project_manager):
+            self.disk_usage_label.setText("")
+            return
+        queue_games = [t.game for t in self.project_manager.task_queue.tasks if t.task_type == TaskType.ADD]
+        for total, games in ((self._selection_size, self.game_list.get_selected_games()),
+                             (self._queue_size, queue_games)):
+            missing = total.set_games(games)
+            if missing:
+                self._disk_usage_pending.append((total.usage, missing))
+        self._start_disk_usage_worker()
+        self._update_disk_usage_label()
+    
+    def _stop_disk_usage_worker(self):
+        """中断后台统计（当前一批完成后退出）"""
+        worker = self._disk_usage_worker
+        if worker:
+            self._disk_usage_worker = None
+            worker.requestInterruption()
+            worker.wait()
+    
+    def _start_disk_usage_worker(self):
+        if self._disk_usage_worker or not self._disk_usage_pending:
+            return
+        usage, games = self._disk_usage_pending.pop(0)
+        worker = DiskUsageWorker(usage, games, self)
+        worker.progress.connect(self._update_disk_usage_label)
+        worker.finished.connect(lambda: self._on_disk_usage_finished(worker))
+        self._disk_usage_worker = worker
+        worker.start()
+    
+    def _on_disk_usage_finished(self, worker: DiskUsageWorker):
+        if self._disk_usage_worker is worker:
+            self._disk_usage_worker = None
+            self._update_disk_usage_label()
+            self._start_disk_usage_worker()
+        worker.deleteLater()
+    
+    def _update_disk_usage_label(self):
+        """状态栏显示选中游戏和待添加任务的总大小，仍在统计时带省略号"""
+        if not (self._selection_size and self._queue_size):
+            return
+        done = self._selection_size.resolve() & self._queue_size.resolve()
+        if not (len(self._selection_size) or len(self._queue_size)):
+            self.disk_usage_label.setText("")
+            return
+        self.disk_usage_label.setText(tr("status_disk_usage",
+                                         selected=format_size(self._selection_size.total),
+                                         tasks=format_size(self._queue_size.total)) + ("" if done else " …"))
+    
+    def _on_load_progress(self, done: int, total: int, platform: str):
+        """平台加载进度"""
+        self.status_label.setText(tr("status_loading", done=done, total=total, platform=platform))
+        QApplication.processEvents(QEventLoop.ExcludeUserInputEvents)
+    
     def update_ui_state(self):
         """更新UI状态"""
         has_project = self.project is not None
@@ -580,6 +779,7 @@ class MainWindow(QMainWindow):
             self.update_task_count()
         else:
             self.status_label.setText(tr("status_no_project"))
+        self._update_missing_roms_label()
         self._update_execute_btn_label()
         self._update_view_label()
     
@@ -658,7 +858,7 @@ class MainWindow(QMainWindow):
             if not editable:
                 return  # 查看模式直接关闭
             new_header = dialog.get_header()
-            self.project_manager.headers[platform] = new_header
+            self.project_manager.set_header(platform, new_header)
             
             # 添加一个更新任务到队列
             from core.metadata_parser import Game
@@ -677,9 +877,9 @@ class MainWindow(QMainWindow):
         
         if self.current_view == "source":
             self.current_view = "project"
-            # 切到项目视图时重新扫描项目Roms目录，确保已有游戏被加载
+            # 切到项目视图时增量刷新项目Roms目录（只重新加载有变化的平台）
             try:
-                self.project_manager.load_all_platforms()
+                self._refresh_platforms(self.project_manager)
             except Exception as e:
                 QMessageBox.warning(self, "提示", f"加载收藏目录失败: {e}")
             self.game_list.set_games(self.project_manager.get_all_games())
@@ -688,9 +888,9 @@ class MainWindow(QMainWindow):
             self.game_detail.set_editable(True)
         else:
             self.current_view = "source"
-            # 返回来源视图时同步刷新来源目录
+            # 返回来源视图时增量刷新来源目录
             try:
-                self.source_manager.load_all_platforms()
+                self._refresh_platforms(self.source_manager)
             except Exception as e:
                 QMessageBox.warning(self, "提示", f"加载来源目录失败: {e}")
             self.game_list.set_games(self.source_manager.get_all_games())
@@ -705,6 +905,7 @@ class MainWindow(QMainWindow):
         self.game_detail.clear()
         # 删除按钮仅在项目视图可用，由选中控制
         self.execute_btn.setEnabled(False)
+        self._reset_disk_usage()
         self.update_task_count()
     
     def on_game_selected(self, game):
@@ -745,11 +946,9 @@ class MainWindow(QMainWindow):
             self.run_game_btn.setEnabled(has_project and has_game)
     
     def _get_launch_command(self, game, manager):
-        header = manager.headers.get(game.platform, "") if manager and hasattr(manager, "headers") else ""
-        if not header:
+        if not manager:
             return ""
-        fields = MetadataParser.parse_header_fields(header)
-        return (fields.get("launch", "") or "").strip()
+        return manager.get_header(game.platform).launch.strip()
 
     def run_selected_game(self):
         """运行当前选中的游戏"""
@@ -965,27 +1164,25 @@ class MainWindow(QMainWindow):
         # 2. 释放播放器当前占用的文件
         self.game_detail.stop_video()
         
-        # 3. 显示确认对话框
-        task_count = self.project_manager.task_queue.get_task_count()
-        msg = tr("confirm_exec_msg", 
-                 add=task_count[TaskType.ADD], 
-                 remove=task_count[TaskType.REMOVE], 
-                 update=task_count[TaskType.UPDATE])
-        
-        reply = QMessageBox.question(self, tr("confirm_exec_title"), msg,
-                                    QMessageBox.Yes | QMessageBox.No)
+        # 3. 显示执行计划（文件操作、磁盘空间和冲突），确认后执行
+        plan_dialog = ExecutionPlanDialog(self.project_manager, self)
+        self._apply_dialog_theme(plan_dialog)
         
-        if reply == QMessageBox.Yes:
+        if plan_dialog.exec_() == QDialog.Accepted:
             # 显示日志窗口
             log_window = LogWindow(self)
             self._apply_dialog_theme(log_window)
             if self.current_view == "source":
                 log_window.set_close_text(tr("btn_close"))
-            log_window.start_execution(self.project_manager)
-            log_window.exec_()
+            self._executing_tasks = True
+            try:
+                log_window.start_execution(self.project_manager)
+                log_window.exec_()
+            finally:
+                self._executing_tasks = False
             
-            # 刷新显示
-            self.project_manager.load_all_platforms()
+            # 刷新显示：只重新加载任务修改过的平台
+            self._refresh_platforms(self.project_manager)
             if self.current_view == "project":
                 self.game_list.set_games(self.project_manager.get_all_games())
                 self.game_list.set_platforms(self.project_manager.get_platform_names())
@@ -994,6 +1191,30 @@ class MainWindow(QMainWindow):
             self.update_task_count()
             self.execute_btn.setEnabled(False)
     
+    def undo_last_removal(self):
+        """撤销上次执行的删除：从回收站恢复游戏文件、media 目录和元数据"""
+        if not self.project_manager or not self.project_manager.trash:
+            return
+        batch = self.project_manager.trash.last_batch()
+        if batch is None:
+            QMessageBox.information(self, tr("info"), tr("msg_trash_empty"))
+            return
+        
+        reply = QMessageBox.question(self, tr("undo_removal_title"), tr("undo_removal_msg", name=batch.name),
+                                     QMessageBox.Yes | QMessageBox.No)
+        if reply != QMessageBox.Yes:
+            return
+        
+        self.game_detail.stop_video()
+        restored = self.project_manager.undo_last_removal()
+        
+        # 刷新显示：只重新加载恢复了游戏的平台
+        self._refresh_platforms(self.project_manager)
+        if self.current_view == "project":
+            self.game_list.set_games(self.project_manager.get_all_games())
+            self.game_list.set_platforms(self.project_manager.get_platform_names())
+        self.statusBar().showMessage(tr("undo_removal_done", count=restored), 3000)
+    
     def clear_tasks(self):
         """清空任务"""
         if self.project_manager:
@@ -1016,6 +1237,7 @@ class MainWindow(QMainWindow):
             # 如果有任务且在来源视图，启用“复制选择”按钮
             if self.current_view == "source" and has_tasks:
                 self.execute_btn.setEnabled(True)
+            self._update_disk_usage()
     
     def batch_add_games(self):
         """批量添加游戏"""
@@ -1131,3 +1353,8 @@ class MainWindow(QMainWindow):
         dialog = AboutDialog(self)
         self._apply_dialog_theme(dialog)
         dialog.exec_()
+
+    def closeEvent(self, event):
+        """关闭窗口前停止后台统计线程"""
+        self._stop_disk_usage_worker()
+        super().closeEvent(event)
@@ -1,25 +1,28 @@
 
 import os
-import shutil
 from pathlib import Path
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QRadioButton, 
-                             QButtonGroup, QMessageBox, QProgressBar)
+                             QButtonGroup, QMessageBox, QProgressBar, QComboBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from core.i18n import tr
 from core.theme import load_icon
 from core.metadata_parser import MetadataParser
+from core.file_sync import COMPARE_MODES, COMPARE_MTIME, SyncStats, sync_file
+from core.platform_header import PlatformHeader
 
 
 class ExtractionWorker(QThread):
     progress = pyqtSignal(int, int, str)
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, source_root, target_root, mode):
+    def __init__(self, source_root, target_root, mode, compare=COMPARE_MTIME):
         super().__init__()
         self.source_root = Path(source_root)
         self.target_root = Path(target_root)
         self.mode = mode # 1: meta+media, 2: meta only, 3: media only, 4: launch only
+        self.compare = compare # 目标已有相同文件时跳过复制
+        self.stats = SyncStats()
 
     def run(self):
         try:
@@ -50,13 +53,12 @@ class ExtractionWorker(QThread):
                         # 注意：目前的 Game 对象没有 launch 属性，launch 在 header 中
                         # 如果用户是想提取整个 metadata.pegasus.txt 但只保留 launch 逻辑，比较复杂
                         # 这里我们实现为：提取 metadata.pegasus.txt，但 Header 只保留 launch
-                        fields = MetadataParser.parse_header_fields(header)
-                        launch_val = fields.get("launch", "")
+                        launch_val = PlatformHeader(header).launch
                         new_header = f"launch: {launch_val}" if launch_val else ""
                         MetadataParser.write_metadata(games, target_platform_dir / "metadata.pegasus.txt", new_header)
                     else:
                         # 完整 metadata 或仅 metadata
-                        shutil.copy2(source_meta_file, target_platform_dir / "metadata.pegasus.txt")
+                        sync_file(source_meta_file, target_platform_dir / "metadata.pegasus.txt", self.compare, self.stats)
 
                 if self.mode in [1, 3]:
                     # 提取 media
@@ -72,9 +74,9 @@ class ExtractionWorker(QThread):
                                 # 拷贝 png, jpg, mp4 等符合 Pegasus 规则的文件
                                 for f in game_media.iterdir():
                                     if f.is_file() and f.suffix.lower() in ['.png', '.jpg', '.jpeg', '.mp4', '.avi', '.mkv']:
-                                        shutil.copy2(f, target_game_media / f.name)
+                                        sync_file(f, target_game_media / f.name, self.compare, self.stats)
 
-            self.finished.emit(True, f"提取完成！共处理 {total_platforms} 个平台。")
+            self.finished.emit(True, f"提取完成！共处理 {total_platforms} 个平台。\n文件同步: {self.stats.summary()}")
         except Exception as e:
             self.finished.emit(False, f"提取过程中发生错误: {str(e)}")
 
@@ -84,7 +86,7 @@ class MetadataExtractDialog(QDialog):
         self.setWindowTitle("提取元数据工具")
         icon_path = Path(__file__).parent.absolute() / "icon" / "pegasus.ico"
         self.setWindowIcon(load_icon(icon_path))
-        self.resize(500, 350)
+        self.resize(500, 400)
 
 
 
@@ -134,6 +136,13 @@ class MetadataExtractDialog(QDialog):
         self.mode_group.addButton(self.radio4, 4)
         layout.addWidget(self.radio4)
 
+        # 跳过未变化的文件
+        layout.addWidget(QLabel("跳过未变化的文件:"))
+        self.compare_combo = QComboBox()
+        for compare in COMPARE_MODES:
+            self.compare_combo.addItem(tr(f"sync_compare_{compare or 'none'}"), compare)
+        layout.addWidget(self.compare_combo)
+
         # 进度条
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -179,7 +188,7 @@ class MetadataExtractDialog(QDialog):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        self.worker = ExtractionWorker(src, dst, mode)
+        self.worker = ExtractionWorker(src, dst, mode, self.compare_combo.currentData())
         self.worker.progress.connect(self.update_progress)
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
@@ -1,10 +1,9 @@
 
 import os
-import shutil
 from pathlib import Path
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel, 
                              QLineEdit, QPushButton, QFileDialog, QRadioButton, 
-                             QButtonGroup, QMessageBox, QProgressBar)
+                             QButtonGroup, QMessageBox, QProgressBar, QComboBox)
 from PyQt5.QtCore import Qt, QThread, pyqtSignal
 from PyQt5.QtGui import QIcon
 from core.i18n import tr
@@ -12,16 +11,20 @@ from core.theme import load_icon
 
 
 from core.metadata_parser import MetadataParser
+from core.file_sync import COMPARE_MODES, COMPARE_MTIME, SyncStats, sync_file
+from core.platform_header import PlatformHeader
 
 class MergeWorker(QThread):
     progress = pyqtSignal(int, int, str)
     finished = pyqtSignal(bool, str)
 
-    def __init__(self, source_root, target_root, mode):
+    def __init__(self, source_root, target_root, mode, compare=COMPARE_MTIME):
         super().__init__()
         self.source_root = Path(source_root)
         self.target_root = Path(target_root)
         self.mode = mode # 1: meta+media, 2: meta only, 3: media only, 4: launch only
+        self.compare = compare # 目标已有相同文件时跳过复制
+        self.stats = SyncStats()
 
     def run(self):
         try:
@@ -49,28 +52,23 @@ class MergeWorker(QThread):
                         if self.mode == 4:
                             # 仅整合 launch 字段
                             header, games = MetadataParser.parse_platform_directory(p_dir)
-                            fields = MetadataParser.parse_header_fields(header)
-                            launch_val = fields.get("launch", "")
+                            launch_val = PlatformHeader(header).launch
                             
                             # 读取目标 metadata 保持其内容，仅替换 launch
                             target_meta_path = target_platform_dir / "metadata.pegasus.txt"
                             if target_meta_path.exists():
                                 t_header, t_games = MetadataParser.parse_platform_directory(target_platform_dir)
-                                t_fields = MetadataParser.parse_header_fields(t_header)
-                                t_fields["launch"] = launch_val
-                                # 重新构造 header
-                                new_h_lines = []
-                                for k, v in t_fields.items():
-                                    new_h_lines.append(f"{k}: {v}")
-                                new_h_str = "\n".join(new_h_lines)
-                                MetadataParser.write_metadata(t_games, target_meta_path, new_h_str)
+                                # 其余字段保持原有顺序、大小写和注释
+                                new_header = PlatformHeader(t_header)
+                                new_header.set("launch", launch_val)
+                                MetadataParser.write_metadata(t_games, target_meta_path, new_header.to_text())
                             else:
                                 # 目标不存在，直接写一个新的精简版
                                 new_h = f"launch: {launch_val}" if launch_val else ""
                                 MetadataParser.write_metadata(games, target_meta_path, new_h)
                         else:
                             # 覆盖 metadata.pegasus.txt
-                            shutil.copy2(source_meta_file, target_platform_dir / "metadata.pegasus.txt")
+                            sync_file(source_meta_file, target_platform_dir / "metadata.pegasus.txt", self.compare, self.stats)
 
                 if self.mode in [1, 3]:
                     # 整合 media
@@ -87,9 +85,9 @@ class MergeWorker(QThread):
                             
                             for f in files:
                                 if Path(f).suffix.lower() in ['.png', '.jpg', '.jpeg', '.mp4', '.avi', '.mkv']:
-                                    shutil.copy2(Path(root) / f, t_root / f)
+                                    sync_file(Path(root) / f, t_root / f, self.compare, self.stats)
 
-            self.finished.emit(True, f"整合完成！共处理 {total_platforms} 个平台。")
+            self.finished.emit(True, f"整合完成！共处理 {total_platforms} 个平台。\n文件同步: {self.stats.summary()}")
         except Exception as e:
             self.finished.emit(False, f"整合过程中发生错误: {str(e)}")
 
@@ -99,7 +97,7 @@ class MetadataMergeDialog(QDialog):
         self.setWindowTitle("整合元数据工具")
         icon_path = Path(__file__).parent.absolute() / "icon" / "pegasus.ico"
         self.setWindowIcon(load_icon(icon_path))
-        self.resize(500, 380)
+        self.resize(500, 430)
 
 
 
@@ -149,6 +147,13 @@ class MetadataMergeDialog(QDialog):
         self.mode_group.addButton(self.radio4, 4)
         layout.addWidget(self.radio4)
 
+        # 跳过未变化的文件
+        layout.addWidget(QLabel("跳过未变化的文件:"))
+        self.compare_combo = QComboBox()
+        for compare in COMPARE_MODES:
+            self.compare_combo.addItem(tr(f"sync_compare_{compare or 'none'}"), compare)
+        layout.addWidget(self.compare_combo)
+
         # 进度条
         self.progress_bar = QProgressBar()
         self.progress_bar.setVisible(False)
@@ -203,7 +208,7 @@ class MetadataMergeDialog(QDialog):
         self.progress_bar.setVisible(True)
         self.progress_bar.setValue(0)
         
-        self.worker = MergeWorker(src, dst, mode)
+        self.worker = MergeWorker(src, dst, mode, self.compare_combo.currentData())
         self.worker.progress.connect(self.update_progress)
         self.worker.finished.connect(self.on_finished)
         self.worker.start()
@@ -5,14 +5,19 @@
 from pathlib import Path
 from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QLineEdit,
                              QPushButton, QHBoxLayout, QFileDialog,
-                             QMessageBox)
+                             QMessageBox, QComboBox, QSpinBox)
 from PyQt5.QtCore import Qt
 from PyQt5.QtGui import QIcon
 from core.project import Project
+from core.copy_engine import DEPLOY_MODES, DEFAULT_WORKERS
+from core.file_sync import COMPARE_MODES
 from core.i18n import tr
 from core.theme import load_icon
 
 
+GB = 1024 * 1024 * 1024
+
+
 class ProjectSettingsDialog(QDialog):
     """项目设置对话框"""
     
@@ -79,6 +84,43 @@ class ProjectSettingsDialog(QDialog):
 
         form_layout.addRow("Pegasus G (可选)", pegasus_layout)
         
+        # 文件部署方式（复制/硬链接/克隆/符号链接）
+        self.deploy_mode_combo = QComboBox()
+        for mode in DEPLOY_MODES:
+            self.deploy_mode_combo.addItem(tr(f"deploy_{mode}"), mode)
+        self.deploy_mode_combo.setCurrentIndex(max(0, self.deploy_mode_combo.findData(self.project.deploy_mode)))
+        self.deploy_mode_combo.setToolTip(tr("dialog_deploy_mode_tooltip"))
+        form_layout.addRow(tr("dialog_deploy_mode"), self.deploy_mode_combo)
+        
+        # 跳过未变化文件的比较方式
+        self.sync_compare_combo = QComboBox()
+        for compare in COMPARE_MODES:
+            self.sync_compare_combo.addItem(tr(f"sync_compare_{compare or 'none'}"), compare)
+        self.sync_compare_combo.setCurrentIndex(max(0, self.sync_compare_combo.findData(self.project.sync_compare)))
+        self.sync_compare_combo.setToolTip(tr("dialog_sync_compare_tooltip"))
+        form_layout.addRow(tr("dialog_sync_compare"), self.sync_compare_combo)
+        
+        # 回收站保留大小（GB），0 表示删除后在后台立即清空
+        self.trash_retention_spin = QSpinBox()
+        self.trash_retention_spin.setRange(0, 100000)
+        self.trash_retention_spin.setSuffix(" GB")
+        self.trash_retention_spin.setValue(round(self.project.trash_retention / GB))
+        self.trash_retention_spin.setToolTip(tr("dialog_trash_retention_tooltip"))
+        form_layout.addRow(tr("dialog_trash_retention"), self.trash_retention_spin)
+        
+        # 来源目录、收藏目录所在设备同时进行的复制数
+        self.source_workers_spin = QSpinBox()
+        self.source_workers_spin.setRange(1, DEFAULT_WORKERS)
+        self.source_workers_spin.setValue(min(self.project.source_device_workers, DEFAULT_WORKERS))
+        self.source_workers_spin.setToolTip(tr("dialog_device_workers_tooltip"))
+        form_layout.addRow(tr("dialog_source_device_workers"), self.source_workers_spin)
+        
+        self.target_workers_spin = QSpinBox()
+        self.target_workers_spin.setRange(1, DEFAULT_WORKERS)
+        self.target_workers_spin.setValue(min(self.project.target_device_workers, DEFAULT_WORKERS))
+        self.target_workers_spin.setToolTip(tr("dialog_device_workers_tooltip"))
+        form_layout.addRow(tr("dialog_target_device_workers"), self.target_workers_spin)
+        
         layout.addLayout(form_layout)
         
         layout.addStretch()
@@ -139,6 +181,11 @@ class ProjectSettingsDialog(QDialog):
         self.project.roms_path = Path(roms_path)
         self.project.source_path = Path(source_path)
         self.project.pegasus_path = Path(pegasus_path) if pegasus_path else None
+        self.project.deploy_mode = self.deploy_mode_combo.currentData()
+        self.project.sync_compare = self.sync_compare_combo.currentData()
+        self.project.trash_retention = self.trash_retention_spin.value() * GB
+        self.project.source_device_workers = self.source_workers_spin.value()
+        self.project.target_device_workers = self.target_workers_spin.value()
         
         # 保存项目文件
         if self.project.project_file: